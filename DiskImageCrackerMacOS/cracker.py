@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
-import subprocess, time, os, glob, sys, gzip, shutil, urllib.request, multiprocessing, threading, termios, tty, select
+import subprocess, time, os, glob, sys, gzip, bz2, lzma, shutil, urllib.request, multiprocessing, threading, termios, tty, select
+import hashlib, struct, queue, argparse, plistlib, random, tempfile, json, signal, collections, math, mmap, bisect
+import socket, asyncio, re, heapq, contextlib, cProfile, pstats, platform
+from abc import ABC, abstractmethod
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from itertools import accumulate
+from multiprocessing import shared_memory
 from threading import Event
 from datetime import timedelta
 from rich.console import Console
@@ -7,19 +15,99 @@ from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn, TimeRemainingColumn
 from rich.live import Live
 from rich.panel import Panel
+from rich.console import Group
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+try:
+    import pwd as _pwd_db
+except ImportError:
+    _pwd_db = None
 
 console = Console()
 
 # ========================= Config =========================
 CPU_CORES = multiprocessing.cpu_count()
-MAX_WORKERS = max(4, CPU_CORES // 2)
+POOL_BATCH_SIZE = 16
+KDF_LANE_BATCH = 4096
+KDF_CANCEL_EVERY = 16
+POOL_INFLIGHT_PER_WORKER = 2
+POOL_POLL_INTERVAL = 0.1
+POOL_JOIN_TIMEOUT = 2.0
+SLAB_BYTES_PER_CANDIDATE = 64
+TUNE_FILE = "tuning.json"
+TUNE_WINDOW_SECS = 10.0
+TUNE_MIN_EVENTS = 8
+TUNE_MARGIN = 0.05
+TUNE_DROP = 0.3
+TUNE_MEMORY = 6
+TUNE_ATTACH_MAX = 8
 DETACH_SWEEP = r"hdiutil info | grep '/dev/disk' | awk '{print $1}' | xargs -n1 sudo hdiutil detach -force"
 ATTACH_POLL_INTERVAL = 0.05
 ATTACH_KILL_GRACE = 0.5
+ATTACH_INFLIGHT = 1
 ETA_THRESHOLD_SECS = 120
 DEFAULT_RATE = 12.0
 WORDLISTS_FOLDER = "wordlists"
 SUPPORTED_IMAGE_GLOBS = ["*.sparsebundle", "*.dmg", "*.sparseimage"]
+HDIUTIL_AVAILABLE = shutil.which("hdiutil") is not None
+STATE_DIR = ".cracker_state"
+CHECKPOINT_FILE = "checkpoints.json"
+CHECKPOINT_INTERVAL = 5.0
+IMAGE_INDEX_FILE = "images.json"
+SCAN_THREADS = 16
+FAST_SUFFIXES = ["1", "12", "123", "1234", "!", "01", "@", "#"]
+FAST_PAIR_WORDS = 4
+FAST_MIN_WORD = 3
+FAST_LANE_MAX = 2000
+FAST_LANE_YIELD = 10
+DEDUP_DIR = "dedup"
+DEDUP_CAPACITY = 10_000_000
+DEDUP_FP_RATE = 1e-6
+DEDUP_SAVE_INTERVAL = 60.0
+BLOOM_MAGIC = b"CRKBLOOM"
+INDEX_DIR = "index"
+INDEX_BLOCK = 1 << 20
+INDEX_THREADS = max(2, min(8, CPU_CORES))
+INDEX_MAGIC = b"CRKLIDX1"
+COMPRESSED_EXTS = (".gz", ".bz2", ".xz", ".zst")
+COMPRESSED_SAMPLE = 1 << 20
+COMPRESSED_END = 1 << 62
+DECOMPRESS_CHUNK = 1 << 20
+DECOMPRESS_QUEUE = 8
+DASH_REFRESH = 8
+METRICS_EWMA_SECS = 30.0
+METRICS_EXPORT_INTERVAL = 10.0
+DIST_UNIT_CANDIDATES = 4096
+DIST_LEASE_SECS = 60.0
+DIST_HEARTBEAT = 1.0
+DIST_IDLE_WAIT = 1.0
+DIST_STOP_GRACE = 2.0
+DIST_CONNECT_WAIT = 60.0
+DIST_DEFAULT_HOST = "127.0.0.1"
+MERGE_RANK_BITS = 40
+PROFILE_BUCKETS = 32
+PROFILE_TOP = 25
+SUITE_MIN_EXP = 4
+SUITE_MAX_EXP = 8
+SUITE_STREAM_MAX = 10 ** 6
+SUITE_DEDUP_MAX = 10 ** 7
+SUITE_VERIFY_SAMPLE = 64
+SUITE_PIPELINE_LINES = 5000
+BENCH_FILE = "bench.jsonl"
+SCHED_SLICE_SECS = 300.0
+SCHED_ATTACH_SECS = 0.5
+SCHED_CALIBRATE_ITERATIONS = 20000
+ENCRCDSA_MAGIC = b"encrcdsa"
+ENCRCDSA_HEADER_READ = 64 * 1024
 
 
 # ========================= Input watcher (simple line-based) =========================
@@ -42,7 +130,11 @@ class InputWatcher:
             try:
                 r, _, _ = select.select([sys.stdin], [], [], 0.1)
                 if r:
-                    line = sys.stdin.readline().strip().lower()
+                    line = sys.stdin.readline()
+                    if not line:
+                        # stdin closed (nohup, cron, < /dev/null): nothing more to watch
+                        break
+                    line = line.strip().lower()
                     if line == "s":
                         self.skip_file.set()
                     elif line == "b":
@@ -75,9 +167,15 @@ def run_shell(cmd: str):
     return subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
 
-def clean_mounts():
-    console.print("[yellow][*] Cleaning up mounted disks before starting...[/yellow]")
-    run_shell(DETACH_SWEEP)
+def clean_mounts(backend, images):
+    # only mounts of the images about to be tried; anything else attached is left alone
+    wanted = {os.path.realpath(p) for p in images}
+    mounts = [m for m in backend.list_mounts() if m[0] and os.path.realpath(m[0]) in wanted]
+    if not mounts:
+        return
+    console.print(f"[yellow][*] Detaching {len(mounts)} device(s) left mounted from these images...[/yellow]")
+    for image in sorted({m[0] for m in mounts}):
+        backend.detach(image)
 
 
 # discover images: sparsebundle, dmg, sparseimage
@@ -90,9 +188,150 @@ def discover_images():
 
 def discover_password_files():
     local = glob.glob("*.txt")
+    for ext in COMPRESSED_EXTS:
+        if ext == ".zst" and zstd is None:
+            for f in glob.glob("*.txt.zst"):
+                console.print(f"[yellow][!] Skipping {f}: install zstandard to read .zst wordlists.[/yellow]")
+            continue
+        local.extend(glob.glob("*.txt" + ext))
     return sorted(local, key=lambda f: os.path.getsize(f))
 
 
+# ---------- Stage profiling ----------
+# Opt-in (--stages / --profile). Each pipeline stage adds its wall time to a
+# counter and a log2-microsecond histogram. When off, stage() hands out one
+# shared no-op context and profiled() returns the iterator untouched.
+
+class _Stage:
+    __slots__ = ("stats", "name", "t0")
+
+    def __init__(self, stats, name: str):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add(self.name, time.perf_counter() - self.t0)
+
+
+class StageStats:
+    def __init__(self):
+        self.stages = {}
+        self.inner = {}
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def add(self, name: str, secs: float, items: int = 1):
+        bucket = min(PROFILE_BUCKETS - 1, int(secs * 1e6).bit_length())
+        with self.lock:
+            s = self.stages.get(name)
+            if s is None:
+                s = self.stages[name] = {"calls": 0, "items": 0, "secs": 0.0, "hist": [0] * PROFILE_BUCKETS}
+            s["calls"] += 1
+            s["items"] += items
+            s["secs"] += secs
+            s["hist"][bucket] += 1
+
+    def stage(self, name: str):
+        return _Stage(self, name)
+
+    def iter(self, items, name: str, inner: str = None):
+        # time spent producing each item; with inner, the report subtracts that stage's share
+        if inner is not None:
+            self.inner[name] = inner
+        it = iter(items)
+        clock = time.perf_counter
+        try:
+            while True:
+                t0 = clock()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                self.add(name, clock() - t0)
+                yield item
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+
+    @staticmethod
+    def _quantile_us(hist, q: float) -> int:
+        # upper edge of the histogram bucket holding the q-quantile
+        total = sum(hist)
+        seen = 0
+        for b, n in enumerate(hist):
+            seen += n
+            if total and seen >= q * total:
+                return 1 << b
+        return 0
+
+    def summary(self) -> dict:
+        wall = time.perf_counter() - self.started
+        out = {"wall_secs": round(wall, 6), "stages": {}}
+        with self.lock:
+            stages = {k: dict(v, hist=list(v["hist"])) for k, v in self.stages.items()}
+        for name, s in stages.items():
+            own = s["secs"] - stages.get(self.inner.get(name), {}).get("secs", 0.0)
+            out["stages"][name] = {
+                "calls": s["calls"], "items": s["items"], "secs": round(own, 6),
+                "share": round(own / wall, 4) if wall > 0 else 0.0,
+                "items_per_sec": round(s["items"] / own, 1) if own > 0 else None,
+                "p50_us": self._quantile_us(s["hist"], 0.5), "p99_us": self._quantile_us(s["hist"], 0.99),
+            }
+        return out
+
+    def table(self):
+        summary = self.summary()
+        tbl = Table(show_header=True, header_style="bold magenta",
+                    title=f"Time per stage ({summary['wall_secs']:.1f}s wall)")
+        tbl.add_column("Stage", style="cyan")
+        tbl.add_column("Calls", justify="right")
+        tbl.add_column("Seconds", justify="right")
+        tbl.add_column("Of wall", justify="right", style="green")
+        tbl.add_column("Items/sec", justify="right")
+        tbl.add_column("p50 / p99", justify="right")
+        for name, s in sorted(summary["stages"].items(), key=lambda kv: -kv[1]["secs"]):
+            rate = f"{s['items_per_sec']:,.0f}" if s["items_per_sec"] else ""
+            tbl.add_row(name, human_int(s["calls"]), f"{s['secs']:.3f}", f"{s['share'] * 100:.1f}%", rate,
+                        f"≤{s['p50_us']:,}µs / ≤{s['p99_us']:,}µs")
+        return tbl
+
+
+PROFILE = None
+_NO_STAGE = contextlib.nullcontext()
+
+
+def stage(name: str):
+    return PROFILE.stage(name) if PROFILE is not None else _NO_STAGE
+
+
+def stage_add(name: str, secs: float, items: int = 1):
+    if PROFILE is not None:
+        PROFILE.add(name, secs, items)
+
+
+def profiled(items, name: str, inner: str = None):
+    return PROFILE.iter(items, name, inner) if PROFILE is not None else items
+
+
+def report_profile(profiler=None, path: str = None):
+    # stage table always; with --profile also the pstats dump, its top entries and the stages as JSON
+    if PROFILE is None:
+        return
+    console.rule("[bold cyan]Profile")
+    if profiler is not None:
+        profiler.dump_stats(path)
+        pstats.Stats(profiler, stream=sys.stdout).strip_dirs().sort_stats("tottime").print_stats(PROFILE_TOP)
+        atomic_write_bytes(path + ".stages.json", [json.dumps(PROFILE.summary(), indent=1).encode()])
+    console.print(PROFILE.table())
+    if profiler is not None:
+        console.print(f"[blue][*] cProfile data in {path} (python -m pstats {path}), stages in {path}.stages.json[/blue]")
+
+
 # ---------- Modes ----------
 
 def get_mode() -> int:
@@ -112,19 +351,8 @@ def get_mode() -> int:
 
 # ---------- Wordlist helpers (left available if needed) ----------
 
-def _decompress_gz_if_needed(path: str) -> str:
-    if not path.endswith(".gz"):
-        return path
-    out = path[:-3]
-    if os.path.exists(out) and os.path.getsize(out) > 0:
-        return out
-    console.print(f"[yellow][*] Decompressing {os.path.basename(path)} → {os.path.basename(out)}[/yellow]")
-    with gzip.open(path, "rb") as f_in, open(out, "wb") as f_out:
-        shutil.copyfileobj(f_in, f_out)
-    return out
-
-
-# (ensure_remote_wordlists and generator left in place but unused in Mode 1)
+# (ensure_remote_wordlists is left in place but unused in Mode 1; generate_candidates
+# feeds the fast lane)
 
 def ensure_remote_wordlists():
     os.makedirs(WORDLISTS_FOLDER, exist_ok=True)
@@ -140,8 +368,10 @@ def ensure_remote_wordlists():
     except NameError:
         # No remote lists configured
         pass
-    expanded = [_decompress_gz_if_needed(p) for p in lists]
-    expanded.extend(glob.glob(os.path.join(WORDLISTS_FOLDER, "*.txt")))
+    # compressed downloads are streamed as they are, not inflated to disk
+    expanded = list(lists)
+    for ext in ("",) + COMPRESSED_EXTS:
+        expanded.extend(glob.glob(os.path.join(WORDLISTS_FOLDER, "*.txt" + ext)))
     seen, dedup = set(), []
     for p in expanded:
         if p not in seen:
@@ -150,410 +380,4692 @@ def ensure_remote_wordlists():
     return sorted(dedup, key=lambda f: os.path.getsize(f))
 
 
-def generate_candidates():
-    words = ["smash", "power", "secret", "apple", "dragon", "hunter"]
-    suffixes = ["", "1", "12", "123", "!", "2024", "2025"]
-    for w in words:
-        for sfx in suffixes:
-            yield f"{w}{sfx}".encode()
-            yield f"{w.capitalize()}{sfx}".encode()
-    for w1 in words:
-        for w2 in words:
-            if w1 == w2:
-                continue
-            yield f"{w1}{w2}".encode()
-            yield f"{w1}-{w2}".encode()
-            yield f"{w1}{w2}123".encode()
+FAST_LEET = str.maketrans({"a": "@", "o": "0", "e": "3", "i": "1", "s": "$"})
 
 
-# ---------- Attach attempt (INTERRUPTIBLE) ----------
+def generate_candidates(words, years=()):
+    # most likely first: each word as given and re-cased, then with a year, then with a
+    # common suffix, then leetspeak, then pairs of the leading words
+    ys = [str(y) for y in years] + [str(y)[2:] for y in years]
 
-def safe_detach_volume_from_image(image_path):
-    # determine a reasonable volume name guess from filename
-    base = os.path.basename(image_path)
-    for ext in ('.sparsebundle', '.dmg', '.sparseimage'):
-        if base.lower().endswith(ext):
-            name = base[:-len(ext)]
-            break
-    else:
-        name = os.path.splitext(base)[0]
-    vol = f"/Volumes/{name}"
-    subprocess.run(["hdiutil", "detach", vol], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    def cased(w):
+        return (w, w.lower(), w.capitalize(), w.upper())
 
+    def tiers():
+        for w in words:
+            yield from cased(w)
+        for w in words:
+            for v in cased(w):
+                for y in ys:
+                    yield v + y
+                    yield v + y + "!"
+        for w in words:
+            for v in cased(w):
+                for sfx in FAST_SUFFIXES:
+                    yield v + sfx
+        for w in words:
+            for v in (w.lower(), w.capitalize()):
+                yield v.translate(FAST_LEET)
+                yield from (v.translate(FAST_LEET) + y for y in ys)
+        lead = words[:FAST_PAIR_WORDS]
+        for a in lead:
+            for b in lead:
+                if a != b:
+                    yield a + b
+                    yield a.capitalize() + b.capitalize()
+                    yield a + "-" + b
+        yield from ys
 
-def _terminate_proc(proc: subprocess.Popen):
-    try:
-        if proc.poll() is None:
-            proc.terminate()
-            try:
-                proc.wait(timeout=ATTACH_KILL_GRACE)
-            except subprocess.TimeoutExpired:
-                proc.kill()
-    except Exception:
-        pass
-    run_shell(DETACH_SWEEP)
+    seen = set()
+    for c in tiers():
+        if c and c not in seen:
+            seen.add(c)
+            yield c.encode("utf-8", "surrogateescape")
 
 
-def try_password_interruptible(image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event):
-    if stop_event.is_set():
-        return ("ok", False)
-    # Use hdiutil attach; works for sparsebundle, dmg, sparseimage.
-    proc = subprocess.Popen(
-        ["hdiutil", "attach", image_path, "-stdinpass", "-nobrowse", "-quiet", "-readonly", "-noverify"],
-        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-    )
-    try:
-        try:
-            proc.stdin.write(pwd_bytes)
-            proc.stdin.flush()
-        except Exception:
-            pass
-        finally:
-            try:
-                proc.stdin.close()
-            except Exception:
-                pass
-        while True:
-            rc = proc.poll()
-            if rc is not None:
-                return ("ok", rc == 0)
-            if watcher.quit_all.is_set():
-                _terminate_proc(proc)
-                return ("quit", False)
-            if watcher.skip_bundle.is_set():
-                _terminate_proc(proc)
-                return ("skip_bundle", False)
-            if watcher.skip_file.is_set():
-                _terminate_proc(proc)
-                return ("skip_file", False)
-            if stop_event.is_set():
-                _terminate_proc(proc)
-                return ("ok", False)
-            time.sleep(ATTACH_POLL_INTERVAL)
-    finally:
-        try:
-            if proc.poll() is None:
-                proc.terminate()
-                try:
-                    proc.wait(timeout=ATTACH_KILL_GRACE)
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-        except Exception:
-            pass
+# ---------- Offline encrcdsa verifier ----------
+# encrcdsa v2 images keep the volume key wrapped with a password-derived key:
+# PBKDF2-HMAC-SHA1(password, salt, iterations) -> 3DES-EDE-CBC unwrap. A correct
+# password yields a blob that ends in "CKIE" plus valid PKCS#7 padding, so each
+# candidate can be checked in-process without attaching the image.
 
+_DES_IP = [58, 50, 42, 34, 26, 18, 10, 2, 60, 52, 44, 36, 28, 20, 12, 4,
+           62, 54, 46, 38, 30, 22, 14, 6, 64, 56, 48, 40, 32, 24, 16, 8,
+           57, 49, 41, 33, 25, 17, 9, 1, 59, 51, 43, 35, 27, 19, 11, 3,
+           61, 53, 45, 37, 29, 21, 13, 5, 63, 55, 47, 39, 31, 23, 15, 7]
+_DES_FP = [40, 8, 48, 16, 56, 24, 64, 32, 39, 7, 47, 15, 55, 23, 63, 31,
+           38, 6, 46, 14, 54, 22, 62, 30, 37, 5, 45, 13, 53, 21, 61, 29,
+           36, 4, 44, 12, 52, 20, 60, 28, 35, 3, 43, 11, 51, 19, 59, 27,
+           34, 2, 42, 10, 50, 18, 58, 26, 33, 1, 41, 9, 49, 17, 57, 25]
+_DES_E = [32, 1, 2, 3, 4, 5, 4, 5, 6, 7, 8, 9, 8, 9, 10, 11, 12, 13, 12, 13, 14, 15, 16, 17,
+          16, 17, 18, 19, 20, 21, 20, 21, 22, 23, 24, 25, 24, 25, 26, 27, 28, 29, 28, 29, 30, 31, 32, 1]
+_DES_P = [16, 7, 20, 21, 29, 12, 28, 17, 1, 15, 23, 26, 5, 18, 31, 10,
+          2, 8, 24, 14, 32, 27, 3, 9, 19, 13, 30, 6, 22, 11, 4, 25]
+_DES_PC1 = [57, 49, 41, 33, 25, 17, 9, 1, 58, 50, 42, 34, 26, 18,
+            10, 2, 59, 51, 43, 35, 27, 19, 11, 3, 60, 52, 44, 36,
+            63, 55, 47, 39, 31, 23, 15, 7, 62, 54, 46, 38, 30, 22,
+            14, 6, 61, 53, 45, 37, 29, 21, 13, 5, 28, 20, 12, 4]
+_DES_PC2 = [14, 17, 11, 24, 1, 5, 3, 28, 15, 6, 21, 10, 23, 19, 12, 4,
+            26, 8, 16, 7, 27, 20, 13, 2, 41, 52, 31, 37, 47, 55, 30, 40,
+            51, 45, 33, 48, 44, 49, 39, 56, 34, 53, 46, 42, 50, 36, 29, 32]
+_DES_SHIFTS = [1, 1, 2, 2, 2, 2, 2, 2, 1, 2, 2, 2, 2, 2, 2, 1]
+_DES_SBOX = [
+    [14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7, 0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8,
+     4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0, 15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13],
+    [15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10, 3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5,
+     0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15, 13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9],
+    [10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8, 13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1,
+     13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7, 1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12],
+    [7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15, 13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9,
+     10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4, 3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14],
+    [2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9, 14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6,
+     4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14, 11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3],
+    [12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11, 10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8,
+     9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6, 4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13],
+    [4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1, 13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6,
+     1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2, 6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12],
+    [13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7, 1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2,
+     7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8, 2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11],
+]
 
-# ---------- Helpers ----------
 
-def estimate_line_count_fast(path: str, sample_bytes: int = 1_000_000) -> int:
-    try:
-        total_size = os.path.getsize(path)
-        if total_size == 0:
-            return 0
-        with open(path, "rb") as f:
-            chunk = f.read(min(sample_bytes, total_size))
-            if not chunk:
-                return 0
-            nl = chunk.count(b"\n")
-            if nl == 0:
-                avg = 10.0
-            else:
-                avg = len(chunk) / nl
-            estimate = int(max(1, total_size / max(1.0, avg)))
-            return estimate
-    except Exception:
-        return 0
+def _des_permute_slow(x: int, table, in_bits: int) -> int:
+    out = 0
+    n = len(table)
+    for j, src in enumerate(table):
+        out |= ((x >> (in_bits - src)) & 1) << (n - 1 - j)
+    return out
 
 
-def count_lines_exact_if_small(path: str, size_threshold_bytes: int = 5_000_000) -> int:
-    try:
-        if os.path.getsize(path) <= size_threshold_bytes:
-            with open(path, "rb") as f:
-                return sum(1 for _ in f)
-        else:
-            return estimate_line_count_fast(path)
-    except FileNotFoundError:
-        return 0
+def _des_byte_tables(table, in_bits: int):
+    # one 256-entry lookup per input byte, so a permutation is in_bits/8 ORs
+    return [[_des_permute_slow(v << (in_bits - 8 - 8 * c), table, in_bits) for v in range(256)]
+            for c in range(in_bits // 8)]
 
 
-def load_file_binary_lines(path):
-    with open(path, "rb") as f:
-        for raw in f:
-            pwd = raw.rstrip(b"\r\n")
-            if pwd:
-                yield pwd
+def _des_apply(x: int, tables, in_bits: int) -> int:
+    out = 0
+    shift = in_bits - 8
+    for t in tables:
+        out |= t[(x >> shift) & 0xFF]
+        shift -= 8
+    return out
 
 
-def make_dashboard(bundle, label, dash):
-    rate = dash["checked"] / max(time.time() - dash["start"], 1)
-    todo = max(dash["total"] - dash["checked"], 0)
-    eta = (todo / rate) if rate > 0 else 0
-    body = f"""
-    [cyan]Image:[/cyan] {bundle}
-    [yellow]Source:[/yellow] {os.path.basename(label)}
-    [green]Checked:[/green] {human_int(dash['checked'])} / {human_int(dash['total'])}
-    [magenta]Rate:[/magenta] {rate:.1f}/sec
-    [blue]ETA:[/blue] {str(timedelta(seconds=int(eta)))}
-    """
-    return Panel(body, title="Cracker Status", border_style="bold blue")
+_DES_IP_T = _des_byte_tables(_DES_IP, 64)
+_DES_FP_T = _des_byte_tables(_DES_FP, 64)
+_DES_E_T = _des_byte_tables(_DES_E, 32)
+_DES_PC1_T = _des_byte_tables(_DES_PC1, 64)
+_DES_PC2_T = _des_byte_tables(_DES_PC2, 56)
+# S-box output already run through P, indexed by the 6-bit group value
+_DES_SP = [[_des_permute_slow(_DES_SBOX[i][((v >> 4) & 2 | v & 1) * 16 + ((v >> 1) & 0xF)] << (28 - 4 * i), _DES_P, 32)
+            for v in range(64)] for i in range(8)]
 
 
-# ---------- Long ETA prompt with countdown ----------
+def des_key_schedule(key8: bytes):
+    k = _des_apply(int.from_bytes(key8, "big"), _DES_PC1_T, 64)
+    c, d = k >> 28, k & 0xFFFFFFF
+    subkeys = []
+    for s in _DES_SHIFTS:
+        c = ((c << s) | (c >> (28 - s))) & 0xFFFFFFF
+        d = ((d << s) | (d >> (28 - s))) & 0xFFFFFFF
+        subkeys.append(_des_apply((c << 28) | d, _DES_PC2_T, 56))
+    return subkeys
 
-def prompt_skip_or_jump_if_slow(current_idx: int, sources: list, sizes_bytes: list, eta_seconds: float):
-    if eta_seconds <= ETA_THRESHOLD_SECS:
-        return "continue"
-    console.rule("[bold yellow]Long ETA Detected")
-    console.print(f"[yellow]Estimated time for current file: {str(timedelta(seconds=int(eta_seconds)))} (> 2 minutes).[/yellow]")
-    console.print("[cyan]Press Enter to continue, type 's' to skip, or enter a number to jump.[/cyan]")
-    tbl = Table(show_header=True, header_style="bold magenta")
-    tbl.add_column("#", justify="right", style="cyan", no_wrap=True)
-    tbl.add_column("Wordlist", style="white")
-    tbl.add_column("Size", justify="right", style="green")
-    for i, src in enumerate(sources, start=1):
-        fname = os.path.basename(src)
-        sz = sizes_bytes[i - 1]
-        marker = " " if (i - 1) != current_idx else "→ "
-        tbl.add_row(str(i), f"{marker}{fname}", human_size(sz))
-    console.print(tbl)
 
-    countdown = min(30, max(5, int(eta_seconds))) if eta_seconds >= 5 else 5
-    countdown = min(30, countdown)
+def des_block(block: int, subkeys) -> int:
+    x = _des_apply(block, _DES_IP_T, 64)
+    l, r = x >> 32, x & 0xFFFFFFFF
+    sp = _DES_SP
+    for k in subkeys:
+        e = _des_apply(r, _DES_E_T, 32) ^ k
+        f = (sp[0][(e >> 42) & 0x3F] | sp[1][(e >> 36) & 0x3F] | sp[2][(e >> 30) & 0x3F] |
+             sp[3][(e >> 24) & 0x3F] | sp[4][(e >> 18) & 0x3F] | sp[5][(e >> 12) & 0x3F] |
+             sp[6][(e >> 6) & 0x3F] | sp[7][e & 0x3F])
+        l, r = r, l ^ f
+    return _des_apply((r << 32) | l, _DES_FP_T, 64)
 
-    start = time.time()
-    remaining = countdown
-    printed_notices = []
-    if countdown >= 30:
-        console.print(f"[dim]You have [bold yellow]30s[/bold yellow] to choose...[/dim]")
-        printed_notices.append(30)
-    if countdown >= 20 and 20 not in printed_notices:
-        console.print(f"[dim]You have [bold yellow]20s[/bold yellow] to choose...[/dim]")
-        printed_notices.append(20)
-    last_notice = printed_notices[-1] if printed_notices else None
 
-    while True:
+def des3_decrypt_block(key24: bytes, block: bytes) -> bytes:
+    return des3_decrypt_blocks(key24, [block])[0]
+
+
+def des3_decrypt_blocks(key24: bytes, blocks):
+    k1, k2, k3 = (des_key_schedule(key24[i:i + 8]) for i in (0, 8, 16))
+    k1r, k3r = k1[::-1], k3[::-1]
+    out = []
+    for block in blocks:
+        x = int.from_bytes(block, "big")
+        x = des_block(des_block(des_block(x, k3r), k2), k1r)
+        out.append(x.to_bytes(8, "big"))
+    return out
+
+
+def des3_encrypt_blocks(key24: bytes, blocks):
+    # only the benchmarks need this direction, to build synthetic headers
+    k1, k2, k3 = (des_key_schedule(key24[i:i + 8]) for i in (0, 8, 16))
+    k2r = k2[::-1]
+    out = []
+    for block in blocks:
+        x = int.from_bytes(block, "big")
+        x = des_block(des_block(des_block(x, k1), k2r), k3)
+        out.append(x.to_bytes(8, "big"))
+    return out
+
+
+def find_encrcdsa_source(image_path):
+    # sparsebundles keep the header in <bundle>/token, flat images at offset 0
+    candidates = [os.path.join(image_path, "token")] if os.path.isdir(image_path) else [image_path]
+    for path in candidates:
         try:
-            r, _, _ = select.select([sys.stdin], [], [], 1.0)
-            if r:
-                ans = sys.stdin.readline().strip().lower()
-                if ans == "":
-                    return "continue"
-                if ans == "s":
-                    return "skip"
-                try:
-                    jump = int(ans)
-                    if 1 <= jump <= len(sources):
-                        return jump - 1
-                    else:
-                        console.print(f"[red]Please enter a number 1–{len(sources)}.[/red]")
-                except ValueError:
-                    console.print("Invalid input. Enter nothing, 's', or a number.")
-            elapsed = int(time.time() - start)
-            remaining = countdown - elapsed
-            if remaining <= 0:
-                console.print("[dim]No input — continuing.[/dim]")
-                return "continue"
-            if remaining % 10 == 0 and remaining != last_notice:
-                console.print(f"[dim]You have [bold yellow]{remaining}s[/bold yellow] to choose...[/dim]")
-                last_notice = remaining
-        except KeyboardInterrupt:
-            console.print("[dim]Interrupted — continuing.[/dim]")
-            return "continue"
+            with open(path, "rb") as f:
+                if f.read(len(ENCRCDSA_MAGIC)) == ENCRCDSA_MAGIC:
+                    return path
+        except OSError:
+            continue
+    return None
 
 
-# ---------- Cracking one image ----------
+def parse_encrcdsa_header(data: bytes) -> dict:
+    if data[:8] != ENCRCDSA_MAGIC:
+        raise ValueError("not an encrcdsa header")
+    version, = struct.unpack_from(">I", data, 8)
+    if version != 2:
+        raise ValueError(f"unsupported encrcdsa version {version}")
+    key_bits, = struct.unpack_from(">I", data, 0x18)
+    uuid = data[0x24:0x34]
+    key_count, = struct.unpack_from(">I", data, 0x48)
+    for i in range(key_count):
+        kind, offset, size = struct.unpack_from(">IQQ", data, 0x4C + i * 20)
+        if kind != 1:
+            continue
+        h = data[offset:offset + size]
+        kdf_alg, _prng, iterations, salt_len = struct.unpack_from(">IIII", h, 0)
+        iv_len, = struct.unpack_from(">I", h, 0x30)
+        blob_alg, _padding, blob_mode, blob_len = struct.unpack_from(">IIII", h, 0x58)
+        if kdf_alg != 103 or blob_alg != 17 or blob_mode != 6:
+            raise ValueError(f"unsupported key wrap (kdf={kdf_alg}, cipher={blob_alg}, mode={blob_mode})")
+        if blob_len < 16 or blob_len % 8:
+            raise ValueError(f"bad wrapped key size {blob_len}")
+        return {
+            "version": version,
+            "key_bits": key_bits,
+            "uuid": uuid.hex(),
+            "iterations": iterations,
+            "salt": bytes(h[0x10:0x10 + salt_len]),
+            "iv": bytes(h[0x34:0x34 + iv_len]),
+            "keyblob": bytes(h[0x68:0x68 + blob_len]),
+        }
+    raise ValueError("no password key entry in header")
 
-def crack_bundle(bundle, sources, mode, watcher: InputWatcher):
-    console.rule(f"[bold green]Starting: {bundle}")
-    safe_detach_volume_from_image(bundle)
-    run_shell(DETACH_SWEEP)
 
-    run_start = time.time()
-    bundle_checked = 0
-    processed = [False] * len(sources)
-    sizes_bytes = [os.path.getsize(s) if os.path.exists(s) else 0 for s in sources]
-
-    with Progress(
-        SpinnerColumn(), BarColumn(), "[progress.percentage]{task.percentage:>3.0f}%",
-        TextColumn("{task.description}"), TimeElapsedColumn(), TimeRemainingColumn(),
-        console=console, transient=True,
-    ) as progress:
-        i = 0
-        while i < len(sources):
-            while i < len(sources) and processed[i]:
-                i += 1
-            if i >= len(sources):
-                break
-            if watcher.quit_all.is_set():
-                return "quit"
-            if watcher.skip_bundle.is_set():
-                console.print("[yellow][!] Skipping bundle by request.[/yellow]")
-                watcher.skip_bundle.clear()
-                return "skipped_bundle"
-
-            source = sources[i]
-            est_lines = estimate_line_count_fast(source)
-            elapsed = max(0.0001, time.time() - run_start)
-            rate = max(DEFAULT_RATE, bundle_checked / elapsed)
-            eta_seconds = est_lines / max(rate, 0.0001)
-            decision = prompt_skip_or_jump_if_slow(i, sources, sizes_bytes, eta_seconds)
-            if decision == "skip":
-                console.print(f"[yellow][!] Skipping {source} by request.[/yellow]")
-                processed[i] = True
-                continue
-            elif isinstance(decision, int):
-                i = decision
-                continue
+class EncrcdsaVerifier:
+    def __init__(self, header: dict):
+        self.header = header
+        self.salt = header["salt"]
+        self.iterations = header["iterations"]
+        blob = header["keyblob"]
+        # only the last two CBC blocks are needed: the "CKIE" marker and the padding
+        self._prev = (header["iv"] + blob)[-24:-8]
+        self._tail = blob[-16:]
 
-            total_for_bar = count_lines_exact_if_small(source)
-            if total_for_bar <= 0:
-                processed[i] = True
-                i += 1
-                continue
-            candidates = load_file_binary_lines(source)
-            label = source
-
-            console.print(f"[blue][*] Using source {source} ({human_int(total_for_bar)} entries)[/blue]")
-            task = progress.add_task(f"[cyan]{os.path.basename(label)}", total=total_for_bar)
-            dash = {"start": time.time(), "checked": 0, "total": total_for_bar}
-            found_event = Event()
-            with Live(make_dashboard(bundle, label, dash), refresh_per_second=8, console=console) as live:
-                for pwd in candidates:
-                    if watcher.quit_all.is_set():
-                        return "quit"
-                    if watcher.skip_bundle.is_set():
-                        console.print("[yellow][!] Skipping bundle by request.[/yellow]")
-                        watcher.skip_bundle.clear()
-                        return "skipped_bundle"
-                    if watcher.skip_file.is_set():
-                        console.print("[yellow][!] Skipping current source by request.[/yellow]")
-                        watcher.skip_file.clear()
-                        break
+    @classmethod
+    def from_image(cls, image_path):
+        src = find_encrcdsa_source(image_path)
+        if src is None:
+            return None
+        with open(src, "rb") as f:
+            data = f.read(ENCRCDSA_HEADER_READ)
+        return cls(parse_encrcdsa_header(data))
 
-                    status, ok = try_password_interruptible(bundle, pwd, watcher, found_event)
-                    if status == "quit":
-                        return "quit"
-                    if status == "skip_bundle":
-                        console.print("[yellow][!] Skipping bundle by request.[/yellow]")
-                        watcher.skip_bundle.clear()
-                        return "skipped_bundle"
-                    if status == "skip_file":
-                        console.print("[yellow][!] Skipping current source by request.[/yellow]")
-                        break
+    def derive(self, pwd_bytes: bytes) -> bytes:
+        return hashlib.pbkdf2_hmac("sha1", pwd_bytes, self.salt, self.iterations, 24)
 
-                    dash["checked"] += 1
-                    progress.update(task, advance=1)
-                    live.update(make_dashboard(bundle, label, dash))
-
-                    if ok:
-                        elapsed = time.time() - run_start
-                        console.rule("[bold green]SUCCESS")
-                        try:
-                            shown = pwd.decode("utf-8")
-                        except UnicodeDecodeError:
-                            shown = None
-                        if shown:
-                            console.print(f"[bold green][+] PASSWORD FOUND:[/bold green] [white on green]{shown}[/white on green]")
-                        console.print(f"[bold green][+] BYTES:[/bold green] {pwd!r}")
-                        console.print(f"[bold green][+] Time:[/bold green] {elapsed:.1f}s")
-                        safe_detach_volume_from_image(bundle)
-                        run_shell(DETACH_SWEEP)
-                        return "found"
-
-            processed[i] = True
-            bundle_checked += dash["checked"]
-            i += 1
+    def check_key(self, key24: bytes) -> bool:
+        d1, d2 = des3_decrypt_blocks(key24, [self._tail[:8], self._tail[8:]])
+        p1 = bytes(a ^ b for a, b in zip(d1, self._prev[:8]))
+        p2 = bytes(a ^ b for a, b in zip(d2, self._prev[8:]))
+        pad = p2[-1]
+        if not 1 <= pad <= 8 or p2[-pad:] != bytes([pad]) * pad:
+            return False
+        return b"CKIE" in (p1 + p2)[:16 - pad]
 
-    console.rule("[bold red]No Match")
-    console.print(f"[red][-] No match for {bundle}.[/red]")
-    return "no_match"
+    def check(self, pwd_bytes: bytes) -> bool:
+        return self.check_key(self.derive(pwd_bytes))
 
+    def check_batch(self, passwords, cancel=None):
+        # returns the indices that verified, or None if cancelled midway
+        hits = []
+        for j, pwd in enumerate(passwords):
+            if cancel is not None and cancel():
+                return None
+            if self.check(pwd):
+                hits.append(j)
+        return hits
 
-# ---------- Bundle order UI ----------
 
-def choose_bundle_order(bundles):
-    console.rule("[bold cyan]Bundle Ordering")
-    auto_table = Table(show_header=True, header_style="bold magenta")
-    auto_table.add_column("#", justify="right", style="cyan", no_wrap=True)
-    auto_table.add_column("Bundle", style="white")
-    for i, b in enumerate(bundles, start=1):
-        auto_table.add_row(str(i), b)
-    console.print(auto_table)
-    resp = input("Press Enter to keep this auto order, or type 'm' to manually reorder: ").strip().lower()
-    if resp not in ("m", "manual", "y", "yes"):
-        return bundles[:]
+# ---------- Batched PBKDF2-HMAC-SHA1 (NumPy lanes) ----------
+# Every candidate is one lane; SHA-1 rounds run as uint32 array ops over all
+# lanes at once. HMAC inner/outer pad states are computed once per candidate,
+# so each PBKDF2 iteration costs exactly two compressions per lane.
+# Benchmark only (--bench kdf / --bench suite): every iteration costs milliseconds
+# of array-op overhead whatever the lane count, so it never beats hashlib and the
+# verifier pool does not use it.
 
-    n = len(bundles)
-    assigned, used = {}, set()
-    for idx, b in enumerate(bundles, start=1):
-        while True:
-            default_pos = idx
-            raw = input(f"Position for {b} (1–{n}) [Enter for {default_pos}]: ").strip()
-            if raw == "":
-                pos = default_pos
-            else:
-                try:
-                    pos = int(raw)
-                except Exception:
-                    console.print("[red]Please enter a number.[/red]")
-                    continue
-            if not (1 <= pos <= n):
-                console.print(f"[red]Invalid position (1–{n}).[/red]")
-                continue
-            if pos in used:
-                console.print(f"[red]Position {pos} already taken.[/red]")
-                continue
-            assigned[b] = pos
-            used.add(pos)
-            break
+_SHA1_IV = (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476, 0xC3D2E1F0)
 
-    ordered = [None] * n
-    for b, p in assigned.items():
-        ordered[p - 1] = b
-    ordered = [b for b in ordered if b is not None]
 
-    final = Table(show_header=True, header_style="bold green")
-    final.add_column("Order", justify="right", style="green", no_wrap=True)
-    final.add_column("Bundle", style="white")
-    for i, b in enumerate(ordered, start=1):
-        final.add_row(str(i), b)
-    console.print(final)
-    confirm = input("Press Enter to confirm this order, or type 'r' to redo: ").strip().lower()
-    if confirm in ("r", "redo"):
-        return choose_bundle_order(bundles)
-    return ordered
+def _sha1_schedule(words):
+    w = list(words)
+    for t in range(16, 80):
+        x = w[t - 3] ^ w[t - 8] ^ w[t - 14] ^ w[t - 16]
+        if isinstance(x, np.ndarray):
+            hi = x >> np.uint32(31)
+            x <<= np.uint32(1)
+            x |= hi
+        else:
+            x = np.uint32(((int(x) << 1) | (int(x) >> 31)) & 0xFFFFFFFF)
+        w.append(x)
+    return w
 
 
-# ============================= Main =============================
-if __name__ == "__main__":
-    clean_mounts()
-    # Mode selection reduced to Mode 1 only
-    mode = get_mode()
-    bundles = discover_images()
-    if not bundles:
-        console.print("[red]No supported disk images (.sparsebundle, .dmg, .sparseimage) found in this folder.[/red]")
-        sys.exit(1)
+def _sha1_compress(state, words):
+    # state: 5 uint32 arrays of shape (N,); words: 16 arrays of shape (N,) or uint32 scalars.
+    # Rounds run in place on preallocated lanes to keep temporaries out of the hot loop.
+    w = _sha1_schedule(words)
+    a, b, c, d, e = (v.copy() for v in state)
+    f = np.empty_like(a)
+    tmp = np.empty_like(a)
+    ks = (np.uint32(0x5A827999), np.uint32(0x6ED9EBA1), np.uint32(0x8F1BBCDC), np.uint32(0xCA62C1D6))
+    for t in range(80):
+        if t < 20:
+            np.bitwise_xor(c, d, out=f)
+            f &= b
+            f ^= d
+        elif t < 40 or t >= 60:
+            np.bitwise_xor(b, c, out=f)
+            f ^= d
+        else:
+            np.bitwise_or(b, c, out=f)
+            f &= d
+            np.bitwise_and(b, c, out=tmp)
+            f |= tmp
+        f += e
+        f += ks[t // 20]
+        f += w[t]
+        np.left_shift(a, np.uint32(5), out=tmp)
+        f += tmp
+        np.right_shift(a, np.uint32(27), out=tmp)
+        f += tmp
+        np.right_shift(b, np.uint32(2), out=tmp)
+        b <<= np.uint32(30)
+        b |= tmp
+        # rotate the registers; the retired e buffer becomes the next f
+        a, b, c, d, e, f = f, a, b, c, d, e
+    return [s + x for s, x in zip(state, (a, b, c, d, e))]
 
-    # Only Local Wordlists mode is available
-    sources = discover_password_files()
 
-    if not sources:
-        console.print("[red]No sources found for this mode.[/red]")
-        sys.exit(1)
+def _sha1_pad_words(msg: bytes, prefix_len: int):
+    # big-endian words of msg with SHA-1 padding, as if prefix_len bytes preceded it
+    total = prefix_len + len(msg)
+    padded = msg + b"\x80" + b"\x00" * ((55 - total) % 64) + struct.pack(">Q", total * 8)
+    n = len(padded) // 4
+    return [np.uint32(v) for v in struct.unpack(f">{n}I", padded)]
 
-    # Decide bundle order (manual or auto)
-    ordered = choose_bundle_order(bundles)
 
-    console.rule("[bold cyan]Summary")
-    console.print(f"[cyan]Mode:[/cyan] 1 (Local Wordlists)")
-    console.print(f"[cyan]Detected {len(bundles)} images[/cyan]")
-    console.print(f"[cyan]Sources:[/cyan] {sources}")
+def pbkdf2_hmac_sha1_batch(passwords, salt: bytes, iterations: int, dklen: int, cancel=None):
+    n = len(passwords)
+    keys = np.zeros((n, 64), dtype=np.uint8)
+    for i, pwd in enumerate(passwords):
+        pwd = bytes(pwd)
+        if len(pwd) > 64:
+            pwd = hashlib.sha1(pwd).digest()
+        keys[i, :len(pwd)] = np.frombuffer(pwd, dtype=np.uint8)
+    iv = [np.full(n, v, dtype=np.uint32) for v in _SHA1_IV]
+    ipad_words = (keys ^ 0x36).view(">u4").astype(np.uint32).T
+    opad_words = (keys ^ 0x5C).view(">u4").astype(np.uint32).T
+    inner = _sha1_compress(iv, list(ipad_words))
+    outer = _sha1_compress(iv, list(opad_words))
+    # constant tail of a one-block HMAC message carrying a 20-byte digest
+    digest_tail = _sha1_pad_words(b"\x00" * 20, 64)[5:]
 
-    watcher = InputWatcher()
-    watcher.start()
+    out = np.empty((n, ((dklen + 19) // 20) * 20), dtype=np.uint8)
+    for block in range((dklen + 19) // 20):
+        msg_words = _sha1_pad_words(salt + struct.pack(">I", block + 1), 64)
+        st = inner
+        for j in range(0, len(msg_words), 16):
+            st = _sha1_compress(st, msg_words[j:j + 16])
+        u = _sha1_compress(outer, st + digest_tail)
+        acc = [x.copy() for x in u]
+        for it in range(1, iterations):
+            if cancel is not None and it % KDF_CANCEL_EVERY == 0 and cancel():
+                return None
+            u = _sha1_compress(outer, _sha1_compress(inner, u + digest_tail) + digest_tail)
+            for a, x in zip(acc, u):
+                a ^= x
+        out[:, block * 20:(block + 1) * 20] = np.stack(acc, axis=1).astype(">u4").view(np.uint8)
+    return np.ascontiguousarray(out[:, :dklen])
+
+
+
+def load_verifier(image_path):
     try:
-        for b in ordered:
-            if watcher.quit_all.is_set():
-                break
-            crack_bundle(b, sources, mode, watcher)
+        return EncrcdsaVerifier.from_image(image_path)
+    except (OSError, ValueError, struct.error) as e:
+        console.print(f"[yellow][!] Offline verifier unavailable for {image_path}: {e}[/yellow]")
+        return None
+
+
+# ---------- Attach attempt (INTERRUPTIBLE) ----------
+
+async def _attach_once(hdiutil: str, image_path, pwd: bytes, mounts=None) -> bool:
+    # -plist output names the device nodes of a successful attach so they can be detached precisely
+    t0 = time.perf_counter()
+    with stage("attach.spawn"):
+        proc = await asyncio.create_subprocess_exec(
+            hdiutil, "attach", image_path, "-stdinpass", "-nobrowse", "-plist", "-readonly", "-noverify",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+    try:
+        out, _ = await proc.communicate(pwd)
+        stage_add("attach.process", time.perf_counter() - t0)
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(proc.wait(), ATTACH_KILL_GRACE)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+        if mounts is not None:
+            # it may have mounted just before the signal landed
+            mounts.suspect(image_path)
+        raise
+    if proc.returncode == 0 and mounts is not None:
+        mounts.record_attach_output(image_path, out)
+    return proc.returncode == 0
+
+
+async def _watch_events(watcher: InputWatcher, stop_event: Event = None) -> str:
+    # keypresses arrive on threading.Events; attempt exits never wait on this
+    while True:
+        status = watcher_status(watcher)
+        if status != "ok":
+            return status
+        if stop_event is not None and stop_event.is_set():
+            return "stopped"
+        await asyncio.sleep(ATTACH_POLL_INTERVAL)
+
+
+async def attach_stream_async(hdiutil: str, image_path, candidates, inflight: int, watcher: InputWatcher,
+                              on_checked, on_verified=None, stop_event: Event = None, mounts=None, tuner=None):
+    # keeps up to `inflight` attaches (or the tuner's level) running and awaits whichever exits first;
+    # on_checked(n, committed_pos, committed_n) follows run_source_pooled's watermark rules.
+    # returns (status, found_pwd); status is ok / found / stopped / quit / skip_bundle / skip_file
+    running = {}
+    ends = {}
+    order = collections.deque()
+    completed = set()
+    committed_n = 0
+    seq = 0
+    pending = iter(candidates)
+    status, found = "ok", None
+    watch = asyncio.ensure_future(_watch_events(watcher, stop_event))
+    if tuner is not None:
+        tuner.resume()
+    try:
+        while True:
+            while status == "ok" and pending is not None and len(running) < (tuner.level if tuner else inflight):
+                item = next(pending, None)
+                if item is None:
+                    pending = None
+                    break
+                pwd = bytes(item[0])
+                running[asyncio.ensure_future(_attach_once(hdiutil, image_path, pwd, mounts))] = (seq, pwd)
+                ends[seq] = item[1]
+                order.append(seq)
+                seq += 1
+            if not running:
+                return (status, found)
+            done, _ = await asyncio.wait(list(running) + [watch], return_when=asyncio.FIRST_COMPLETED)
+            # attempts that exited in the same wakeup as a key press are counted first, so a hit is never dropped
+            for task in done:
+                if task is watch:
+                    continue
+                s, pwd = running.pop(task)
+                ok = task.result()
+                completed.add(s)
+                committed = None
+                while order and order[0] in completed:
+                    done_seq = order.popleft()
+                    completed.discard(done_seq)
+                    committed = ends.pop(done_seq)
+                    committed_n += 1
+                if on_verified is not None:
+                    on_verified((pwd,))
+                on_checked(1, committed, committed_n)
+                if tuner is not None:
+                    tuner.record(1)
+                if ok and found is None:
+                    status, found = "found", pwd
+            if status == "found":
+                return (status, found)
+            if watch in done:
+                return (watch.result(), None)
+    finally:
+        # a hit or watcher event terminates every attempt still running
+        watch.cancel()
+        for task in running:
+            task.cancel()
+        await asyncio.gather(watch, *running, return_exceptions=True)
+
+
+def try_password_interruptible(image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event,
+                               hdiutil: str = "hdiutil", mounts=None):
+    if stop_event.is_set():
+        return ("ok", False)
+    mounts = mounts if mounts is not None else MOUNTS
+    # Use hdiutil attach; works for sparsebundle, dmg, sparseimage.
+    with stage("attach.interruptible"):
+        status, found = asyncio.run(attach_stream_async(hdiutil, image_path, [(pwd_bytes, 0)], 1, watcher,
+                                                        lambda *_: None, stop_event=stop_event, mounts=mounts))
+    if status == "found":
+        return ("ok", True)
+    mounts.release(image_path)
+    return ("ok", False) if status == "stopped" else (status, False)
+
+
+def watcher_status(watcher: InputWatcher) -> str:
+    if watcher.quit_all.is_set():
+        return "quit"
+    if watcher.skip_bundle.is_set():
+        return "skip_bundle"
+    if watcher.skip_file.is_set():
+        return "skip_file"
+    return "ok"
+
+
+# ---------- Attach backends ----------
+# crack_bundle only talks to a backend: the real hdiutil path, the offline
+# verifier (optionally confirming hits through another backend) or a fake used
+# to measure and regression-test the candidate loop without a Mac.
+
+def hdiutil_mounts(hdiutil: str = "hdiutil"):
+    if shutil.which(hdiutil) is None:
+        return []
+    res = subprocess.run([hdiutil, "info", "-plist"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        info = plistlib.loads(res.stdout)
+    except Exception:
+        return []
+    mounts = []
+    for img in info.get("images", []):
+        for ent in img.get("system-entities", []):
+            if "dev-entry" in ent:
+                mounts.append((img.get("image-path", ""), ent["dev-entry"]))
+    return mounts
+
+
+class MountRegistry:
+    # device nodes this process attached, per image. Detaches only those (whole disks,
+    # all at once); the blanket DETACH_SWEEP is left as a last resort at shutdown.
+    def __init__(self, hdiutil: str = "hdiutil"):
+        self.hdiutil = hdiutil
+        self.devices = {}
+        self.suspects = set()
+        self.lock = threading.Lock()
+
+    def record(self, image_path, devs):
+        with self.lock:
+            self.devices.setdefault(os.path.realpath(image_path), set()).update(devs)
+
+    def record_attach_output(self, image_path, out: bytes):
+        try:
+            info = plistlib.loads(out)
+            devs = [ent["dev-entry"] for ent in info.get("system-entities", []) if "dev-entry" in ent]
+        except Exception:
+            devs = []
+        if devs:
+            self.record(image_path, devs)
+        else:
+            self.suspect(image_path)
+
+    def suspect(self, image_path):
+        with self.lock:
+            self.suspects.add(os.path.realpath(image_path))
+
+    def adopt(self, image_paths=None):
+        with stage("mounts.adopt"):
+            self._adopt(image_paths)
+
+    def _adopt(self, image_paths):
+        # one `hdiutil info` to pick up mounts we could not see directly (terminated
+        # attempts, earlier runs) for the given images, or for the suspects
+        with self.lock:
+            wanted = {os.path.realpath(p) for p in image_paths} if image_paths is not None else set(self.suspects)
+            self.suspects -= wanted
+        if not wanted:
+            return
+        for img, dev in hdiutil_mounts(self.hdiutil):
+            if img and os.path.realpath(img) in wanted:
+                self.record(img, [dev])
+
+    def _detach_all(self, devs, force: bool):
+        cmd = [self.hdiutil, "detach"] + (["-force"] if force else [])
+        procs = [(dev, subprocess.Popen(cmd + [dev], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+                 for dev in devs]
+        return [dev for dev, p in procs if p.wait() != 0]
+
+    def detach(self, image_path=None):
+        # -> device nodes that would not detach even with -force
+        with stage("mounts.detach"):
+            return self._detach(image_path)
+
+    def _detach(self, image_path):
+        with self.lock:
+            keys = list(self.devices) if image_path is None else [os.path.realpath(image_path)]
+            devs = set()
+            for key in keys:
+                devs |= self.devices.pop(key, set())
+        if not devs or shutil.which(self.hdiutil) is None:
+            return []
+        # detaching /dev/diskN takes its slices (/dev/diskNs1...) with it
+        wholes = sorted({re.sub(r"s\d+$", "", dev) for dev in devs})
+        failed = self._detach_all(wholes, force=False)
+        return self._detach_all(failed, force=True) if failed else []
+
+    def release(self, image_path):
+        self.adopt()
+        self.detach(image_path)
+
+    def shutdown(self):
+        self.adopt()
+        if self.detach() and HDIUTIL_AVAILABLE:
+            run_shell(DETACH_SWEEP)
+
+
+MOUNTS = MountRegistry()
+
+
+class AttachBackend(ABC):
+    name = "base"
+
+    def can_attempt(self, image_path) -> bool:
+        return True
+
+    def confirms(self, image_path) -> bool:
+        return True
+
+    def offline_verifier(self, image_path):
+        return None
+
+    @abstractmethod
+    def attach(self, image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event):
+        ...
+
+    def streams(self, image_path) -> bool:
+        # True when attach_stream can run a whole candidate source concurrently
+        return False
+
+    def attach_stream(self, image_path, candidates, watcher: InputWatcher, on_checked, on_verified=None):
+        # one attempt at a time; backends that overlap attempts override this and streams()
+        stop_event = Event()
+        n = 0
+        for pwd, pos in candidates:
+            status, ok = self.attach(image_path, pwd, watcher, stop_event)
+            if status != "ok":
+                return (status, None)
+            n += 1
+            if on_verified is not None:
+                on_verified((pwd,))
+            on_checked(1, pos, n)
+            if ok:
+                return ("found", bytes(pwd))
+        return ("ok", None)
+
+    def confirm(self, image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event):
+        return self.attach(image_path, pwd_bytes, watcher, stop_event)
+
+    def detach(self, image_path):
+        pass
+
+    def list_mounts(self):
+        return []
+
+    def sweep(self):
+        pass
+
+
+class HdiutilBackend(AttachBackend):
+    name = "hdiutil"
+
+    def __init__(self, inflight: int = ATTACH_INFLIGHT, hdiutil: str = "hdiutil", mounts: MountRegistry = None):
+        self.inflight = max(1, inflight)
+        self.hdiutil = hdiutil
+        if mounts is None:
+            mounts = MOUNTS if hdiutil == "hdiutil" else MountRegistry(hdiutil)
+        self.mounts = mounts
+        self.tuner = None
+        if TUNING is not None:
+            self.tuner = TUNING.tuner("hdiutil", 1, max(self.inflight, TUNE_ATTACH_MAX), self.inflight)
+
+    def can_attempt(self, image_path) -> bool:
+        return shutil.which(self.hdiutil) is not None
+
+    def attach(self, image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event):
+        return try_password_interruptible(image_path, pwd_bytes, watcher, stop_event, self.hdiutil, self.mounts)
+
+    def streams(self, image_path) -> bool:
+        return self.can_attempt(image_path)
+
+    def attach_stream(self, image_path, candidates, watcher: InputWatcher, on_checked, on_verified=None):
+        status, found = asyncio.run(attach_stream_async(self.hdiutil, image_path, candidates, self.inflight, watcher,
+                                                        on_checked, on_verified, mounts=self.mounts, tuner=self.tuner))
+        if status not in ("ok", "found"):
+            self.mounts.release(image_path)
+        return (status, found)
+
+    def detach(self, image_path):
+        self.mounts.adopt([image_path])
+        return self.mounts.detach(image_path)
+
+    def list_mounts(self):
+        return hdiutil_mounts(self.hdiutil)
+
+    def sweep(self):
+        self.mounts.shutdown()
+
+
+class VerifierBackend(AttachBackend):
+    name = "verifier"
+
+    def __init__(self, confirm_backend=None):
+        self.confirm_backend = confirm_backend
+        self._verifiers = {}
+
+    def offline_verifier(self, image_path):
+        if image_path not in self._verifiers:
+            self._verifiers[image_path] = load_verifier(image_path)
+        return self._verifiers[image_path]
+
+    def can_attempt(self, image_path) -> bool:
+        if self.offline_verifier(image_path) is not None:
+            return True
+        return self.confirm_backend is not None and self.confirm_backend.can_attempt(image_path)
+
+    def confirms(self, image_path) -> bool:
+        return self.confirm_backend is not None and self.confirm_backend.can_attempt(image_path)
+
+    def attach(self, image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event):
+        verifier = self.offline_verifier(image_path)
+        if verifier is None:
+            return self.confirm_backend.attach(image_path, pwd_bytes, watcher, stop_event)
+        if not verifier.check(pwd_bytes):
+            return ("ok", False)
+        return self.confirm(image_path, pwd_bytes, watcher, stop_event)
+
+    def streams(self, image_path) -> bool:
+        # images without an offline verifier go straight to the confirming backend
+        return (self.offline_verifier(image_path) is None and self.confirm_backend is not None
+                and self.confirm_backend.streams(image_path))
+
+    def attach_stream(self, image_path, candidates, watcher: InputWatcher, on_checked, on_verified=None):
+        return self.confirm_backend.attach_stream(image_path, candidates, watcher, on_checked, on_verified)
+
+    def confirm(self, image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event):
+        if not self.confirms(image_path):
+            return ("ok", True)
+        # offline hit: confirm with a real attach before reporting it
+        status, ok = self.confirm_backend.attach(image_path, pwd_bytes, watcher, stop_event)
+        if status == "ok" and not ok:
+            console.print("[yellow][!] Offline verifier hit was rejected by the attach backend; continuing.[/yellow]")
+        return (status, ok)
+
+    def detach(self, image_path):
+        if self.confirm_backend is not None:
+            self.confirm_backend.detach(image_path)
+
+    def list_mounts(self):
+        return self.confirm_backend.list_mounts() if self.confirm_backend is not None else []
+
+    def sweep(self):
+        if self.confirm_backend is not None:
+            self.confirm_backend.sweep()
+
+
+class FakeBackend(AttachBackend):
+    # simulated hdiutil: fixed latency plus jitter, a failure exit code, and
+    # attempts (1-based) listed in hang_on that block until cancelled
+    name = "fake"
+
+    def __init__(self, password=None, latency: float = 0.0, jitter: float = 0.0, fail_code: int = 1,
+                 hang_on=(), hang_secs=None, seed: int = 0):
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_code = fail_code
+        self.hang_on = set(hang_on)
+        self.hang_secs = hang_secs
+        self.attempts = 0
+        self.latencies = []
+        self.return_codes = {}
+        self.hanging = Event()
+        self._rng = random.Random(seed)
+        self._mounts = {}
+
+    def _wait(self, secs, watcher: InputWatcher, stop_event: Event):
+        deadline = None if secs is None else time.perf_counter() + secs
+        while True:
+            status = watcher_status(watcher)
+            if status != "ok":
+                return status
+            if stop_event.is_set():
+                return "stopped"
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                return None
+            time.sleep(ATTACH_POLL_INTERVAL if remaining is None else min(remaining, ATTACH_POLL_INTERVAL))
+
+    def attach(self, image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event):
+        self.attempts += 1
+        t0 = time.perf_counter()
+        try:
+            if self.attempts in self.hang_on:
+                self.hanging.set()
+                interrupted = self._wait(self.hang_secs, watcher, stop_event)
+            else:
+                interrupted = self._wait(self.latency + self._rng.uniform(0, self.jitter), watcher, stop_event)
+            if interrupted == "stopped":
+                return ("ok", False)
+            if interrupted is not None:
+                return (interrupted, False)
+            rc = 0 if self.password is not None and bytes(pwd_bytes) == self.password else self.fail_code
+            self.return_codes[rc] = self.return_codes.get(rc, 0) + 1
+            if rc == 0:
+                self._mounts[image_path] = f"/dev/fake{len(self._mounts) + 1}"
+            return ("ok", rc == 0)
+        finally:
+            self.latencies.append(time.perf_counter() - t0)
+
+    def detach(self, image_path):
+        self._mounts.pop(image_path, None)
+
+    def list_mounts(self):
+        return [(img, dev) for img, dev in self._mounts.items()]
+
+    def sweep(self):
+        self._mounts.clear()
+
+
+def default_backend(attach_inflight: int = ATTACH_INFLIGHT):
+    return VerifierBackend(HdiutilBackend(attach_inflight) if HDIUTIL_AVAILABLE else None)
+
+
+# ---------- Concurrency tuner ----------
+# Opt-in (--tune). The verifier pool's worker count and the hdiutil in-flight count
+# become a level that is hill-climbed on measured throughput. Each window of at
+# least TUNE_WINDOW_SECS scores the current level. A neighbour not measured in the
+# last TUNE_MEMORY windows is probed if the trend points that way (up while adding
+# helped, down while it did not); otherwise the best of level-1..level+1 is taken,
+# preferring fewer when rates are within TUNE_MARGIN. A step up that cuts the rate
+# by TUNE_DROP halves the level (AIMD). The best level per backend and host is
+# saved so the next run starts there.
+
+class ConcurrencyTuner:
+    def __init__(self, store, key: str, low: int, high: int, start: int, clock=time.monotonic):
+        self.store = store
+        self.key = key
+        self.low = max(1, low)
+        self.high = max(self.low, high)
+        self.level = min(self.high, max(self.low, start))
+        self.best_level, self.best_rate = self.level, 0.0
+        self.rates = {}
+        self.seen = {}
+        self.windows = 0
+        self.prev_level = None
+        self.note = "measuring"
+        self.clock = clock
+        self.resume()
+
+    def resume(self):
+        # a fresh window, e.g. after idle time between sources that should not count against the level
+        self.window_start = self.clock()
+        self.done = 0
+        self.events = 0
+        if self.store is not None:
+            self.store.active = self
+
+    def record(self, n: int = 1):
+        self.done += n
+        self.events += 1
+        elapsed = self.clock() - self.window_start
+        if elapsed >= TUNE_WINDOW_SECS and self.events >= TUNE_MIN_EVENTS:
+            self.adjust(self.done / elapsed)
+            self.resume()
+
+    def _fresh(self, level: int) -> bool:
+        return level in self.rates and self.windows - self.seen[level] <= TUNE_MEMORY
+
+    def adjust(self, rate: float):
+        # one decision from the rate measured at the current level
+        level, prev = self.level, self.prev_level
+        self.rates[level] = (self.rates[level] + rate) / 2 if self._fresh(level) else rate
+        self.seen[level] = self.windows
+        self.windows += 1
+        self.prev_level = level
+        if rate > self.best_rate:
+            self.best_level, self.best_rate = level, rate
+        if prev is not None and prev < level and rate < self.rates[prev] * (1 - TUNE_DROP):
+            self.level = max(self.low, level // 2)
+            self.note = f"{rate:.1f}/s collapsed at {level}, halved"
+            return
+        here, up, down = self.rates[level], level + 1, level - 1
+        if up <= self.high and not self._fresh(up) and (
+                not self._fresh(down) or here > self.rates[down] * (1 + TUNE_MARGIN)):
+            self.level = up
+        elif down >= self.low and not self._fresh(down) and (
+                not self._fresh(up) or here >= self.rates[up] * (1 - TUNE_MARGIN)):
+            self.level = down
+        if self.level != level:
+            self.note = f"{rate:.1f}/s at {level}, probing {self.level}"
+            return
+        around = [k for k in (down, level, up) if k == level or self._fresh(k)]
+        top = max(self.rates[k] for k in around)
+        self.level = min(k for k in around if self.rates[k] >= top * (1 - TUNE_MARGIN))
+        self.note = f"{rate:.1f}/s at {level}, " + ("holding" if self.level == level else f"moving to {self.level}")
+
+    def status(self) -> str:
+        return f"{self.level} in flight (best {self.best_level} at {self.best_rate:.1f}/s; {self.note})"
+
+
+class TuningStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._data = self._load()
+        self.tuners = {}
+        self.active = None
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def tuner(self, backend: str, low: int, high: int, default: int) -> ConcurrencyTuner:
+        key = f"{backend}|{platform.node()}|{CPU_CORES}"
+        if key not in self.tuners:
+            saved = self._data.get(key, {}).get("level")
+            self.tuners[key] = ConcurrencyTuner(self, key, low, high, saved or default)
+        return self.tuners[key]
+
+    def save(self):
+        measured = {key: t for key, t in self.tuners.items() if t.best_rate > 0}
+        if not measured:
+            return
+        for key, t in measured.items():
+            self._data[key] = {"level": t.best_level, "rate": round(t.best_rate, 3), "updated": time.time()}
+        atomic_write_bytes(self.path, [json.dumps(self._data, indent=1).encode()])
+
+
+TUNING = None
+
+
+# ---------- Candidate slabs ----------
+# Batches reach the verifier processes through a fixed ring of shared-memory slabs
+# instead of being pickled onto the task queue; only the slab index crosses over.
+# A slab is [count][length] as native u32, then the passwords joined by newlines:
+# candidates come from lines, and join/split run in C where an offset table would
+# cost more to build than pickling does. There is one slab per in-flight batch, so
+# memory stays the same however long the wordlist is. A batch that does not fit,
+# or has a newline inside a candidate, goes by queue instead.
+
+class SlabRing:
+    def __init__(self, slabs: int, slab_bytes: int):
+        self.slab_bytes = slab_bytes
+        self.shms = [shared_memory.SharedMemory(create=True, size=slab_bytes) for _ in range(slabs)]
+        self.names = [s.name for s in self.shms]
+        self.bufs = [s.buf for s in self.shms]
+        self.free = collections.deque(range(slabs))
+
+    def pack(self, batch):
+        # -> slab index, or None when every slab is busy or the batch cannot go in one
+        data = b"\n".join(batch)
+        if not self.free or 8 + len(data) > self.slab_bytes or data.count(b"\n") != len(batch) - 1:
+            return None
+        slab = self.free.popleft()
+        buf = self.bufs[slab]
+        struct.pack_into("II", buf, 0, len(batch), len(data))
+        buf[8:8 + len(data)] = data
+        return slab
+
+    def release(self, slab: int):
+        self.free.append(slab)
+
+    def close(self):
+        self.bufs = []
+        for s in self.shms:
+            s.close()
+            try:
+                s.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def read_slab(buf) -> list:
+    n, size = struct.unpack_from("II", buf, 0)
+    return bytes(buf[8:8 + size]).split(b"\n") if n else []
+
+
+def attach_slabs(names):
+    return [shared_memory.SharedMemory(name=name) for name in names]
+
+
+def detach_slabs(slabs):
+    # the ring's owner unlinks them; a worker only drops its own mapping
+    for s in slabs:
+        s.close()
+
+
+# ---------- Verification pool ----------
+
+def batched(iterable, n: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _pool_worker(headers: dict, tasks, results, cancel, slab_names):
+    verifiers = {t: EncrcdsaVerifier(h) for t, h in headers.items()}
+    slabs = attach_slabs(slab_names)
+    try:
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+            batch_id, batch, targets = item
+            t0 = time.perf_counter()
+            try:
+                if isinstance(batch, int):
+                    batch = read_slab(slabs[batch].buf)
+                # the same candidate list is checked against every target image, so a batch
+                # crosses the process boundary once no matter how many images are pending.
+                # cancel is polled between candidates, so latency stays bounded by one derivation
+                hits = []
+                for t in targets:
+                    found = verifiers[t].check_batch(batch, cancel.is_set)
+                    if found is None:
+                        hits = None
+                        break
+                    hits.extend((t, j) for j in found)
+            except Exception as exc:
+                # reported instead of dying, so the parent stops with the cause rather than waiting forever
+                results.put((batch_id, "error", repr(exc), time.perf_counter() - t0))
+                continue
+            busy = time.perf_counter() - t0
+            if hits is None:
+                results.put((batch_id, 0, [], busy))
+            else:
+                results.put((batch_id, len(batch), hits, busy))
+    finally:
+        detach_slabs(slabs)
+
+
+class PoolError(RuntimeError):
+    pass
+
+
+class VerifierPool:
+    # headers maps a target id to its parsed encrcdsa header; single-image runs use {0: header}
+    def __init__(self, headers: dict, workers: int):
+        self.workers = workers
+        self.targets = tuple(headers)
+        self.batch_size = POOL_BATCH_SIZE
+        self.limit = workers * POOL_INFLIGHT_PER_WORKER
+        self.tuner = TUNING.tuner("verifier", 1, workers, workers) if TUNING is not None else None
+        self.tasks = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.cancel = multiprocessing.Event()
+        self.ring = SlabRing(self.limit, self.batch_size * SLAB_BYTES_PER_CANDIDATE)
+        self.busy_secs = 0.0
+        self._next_id = 0
+        self._slab_of = {}
+        self._procs = [
+            multiprocessing.Process(target=_pool_worker, daemon=True,
+                                    args=(headers, self.tasks, self.results, self.cancel, self.ring.names))
+            for _ in range(workers)
+        ]
+
+    @property
+    def max_inflight(self) -> int:
+        # tuned: one batch per allowed worker, so only `level` processes are ever busy
+        return self.tuner.level if self.tuner is not None else self.limit
+
+    @property
+    def active(self) -> int:
+        return self.tuner.level if self.tuner is not None else self.workers
+
+    def start(self):
+        with stage("pool.spawn"):
+            for p in self._procs:
+                p.start()
+
+    def submit(self, batch, targets=None) -> int:
+        batch_id = self._next_id
+        self._next_id += 1
+        slab = self.ring.pack(batch)
+        if slab is not None:
+            self._slab_of[batch_id] = slab
+        self.tasks.put((batch_id, batch if slab is None else slab,
+                        tuple(targets) if targets is not None else self.targets))
+        return batch_id
+
+    def get_result(self, timeout: float):
+        # -> (batch_id, checked, hits); raises queue.Empty like Queue.get, and PoolError
+        # when a worker reported an exception or died
+        try:
+            with stage("pool.wait"):
+                batch_id, checked, hits, busy = self.results.get(timeout=timeout)
+        except queue.Empty:
+            dead = [p for p in self._procs if not p.is_alive()]
+            if dead:
+                raise PoolError(f"verifier worker exited unexpectedly (exit code {dead[0].exitcode})")
+            raise
+        slab = self._slab_of.pop(batch_id, None)
+        if slab is not None:
+            self.ring.release(slab)
+        if checked == "error":
+            raise PoolError(f"verifier worker failed: {hits}")
+        self.busy_secs += busy
+        stage_add("verify.workers", busy, checked)
+        if self.tuner is not None:
+            self.tuner.record(checked)
+        return batch_id, checked, hits
+
+    def close(self):
+        self.cancel.set()
+        for _ in self._procs:
+            self.tasks.put(None)
+        deadline = time.time() + POOL_JOIN_TIMEOUT
+        for p in self._procs:
+            p.join(timeout=max(0.0, deadline - time.time()))
+            if p.is_alive():
+                p.terminate()
+        self.ring.close()
+
+
+def run_source_pooled(pool: VerifierPool, backend: AttachBackend, image_path, candidates, watcher: InputWatcher,
+                      on_checked, on_verified=None, targets=None):
+    # candidates yields (pwd, resume_pos); on_checked(n, committed_pos, committed_n) reports the
+    # position up to which every candidate has been verified (None while results arrive out of order).
+    # returns (status, found_pwd); status is ok / found / quit / skip_bundle / skip_file
+    inflight = {}
+    ends = {}
+    order = collections.deque()
+    completed = set()
+    committed_n = 0
+    pending = iter(batched(candidates, pool.batch_size))
+    if pool.tuner is not None:
+        pool.tuner.resume()
+    status, found = "ok", None
+    confirm_stop = Event()
+    try:
+        while True:
+            while status == "ok" and pending is not None and len(inflight) < pool.max_inflight:
+                items = next(pending, None)
+                if items is None:
+                    pending = None
+                    break
+                batch = [bytes(pwd) for pwd, _ in items]
+                batch_id = pool.submit(batch, targets)
+                inflight[batch_id] = batch
+                ends[batch_id] = (len(batch), items[-1][1])
+                order.append(batch_id)
+            if not inflight:
+                return (status, found)
+            if status == "ok":
+                status = watcher_status(watcher)
+                if status != "ok":
+                    pool.cancel.set()
+            try:
+                batch_id, checked, hits = pool.get_result(POOL_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            batch = inflight.pop(batch_id, None)
+            if batch is None:
+                continue
+            # a cancelled batch never completes, and neither does one with a hit left unconfirmed:
+            # both pin the watermark, so a resume re-checks them
+            settled = checked == len(batch)
+            for _, j in hits:
+                if found is not None:
+                    break
+                if status != "ok":
+                    settled = False
+                    break
+                with stage("confirm"):
+                    confirm_status, ok = backend.confirm(image_path, batch[j], watcher, confirm_stop)
+                if confirm_status != "ok":
+                    status = confirm_status
+                    settled = False
+                    pool.cancel.set()
+                elif ok:
+                    status, found = "found", batch[j]
+                    pool.cancel.set()
+            committed = None
+            if settled:
+                # only now may the dedup filter remember the batch: a dropped hit must stay retryable
+                if on_verified is not None:
+                    on_verified(batch)
+                completed.add(batch_id)
+                while order and order[0] in completed:
+                    done_id = order.popleft()
+                    completed.discard(done_id)
+                    n, committed = ends.pop(done_id)
+                    committed_n += n
+            on_checked(checked, committed, committed_n)
+    finally:
+        # drain what is still queued so the pool can be reused for the next source
+        while inflight:
+            try:
+                batch_id, _, _ = pool.get_result(POOL_JOIN_TIMEOUT)
+            except (queue.Empty, PoolError):
+                break
+            inflight.pop(batch_id, None)
+        pool.cancel.clear()
+
+
+# ---------- Checkpoints ----------
+# Resume state per (image, wordlist): the byte offset below which every
+# candidate has been verified. Flushed atomically every CHECKPOINT_INTERVAL.
+
+def atomic_write_bytes(path: str, chunks):
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def image_identity(image_path) -> str:
+    entry = IMAGES.lookup(image_path) if IMAGES is not None else None
+    if entry is not None and entry["identity"]:
+        return entry["identity"]
+    return _image_identity(image_path)
+
+
+def _image_identity(image_path) -> str:
+    plist = os.path.join(image_path, "Info.plist")
+    if os.path.isdir(image_path) and os.path.exists(plist):
+        try:
+            with open(plist, "rb") as f:
+                uuid = plistlib.load(f).get("uuid")
+            if uuid:
+                return f"uuid:{uuid}"
+        except Exception:
+            pass
+    src = find_encrcdsa_source(image_path) or (image_path if os.path.isfile(image_path) else None)
+    if src is not None:
+        with open(src, "rb") as f:
+            return "sha1:" + hashlib.sha1(f.read(ENCRCDSA_HEADER_READ)).hexdigest()
+    return "path:" + os.path.abspath(image_path)
+
+
+def checkpoint_key(image_id: str, source, rules=None) -> str:
+    if isinstance(source, FastLane):
+        return f"{image_id}|fast:{source.digest}"
+    if isinstance(source, MaskSource):
+        return f"{image_id}|mask:{source.spec}|{source.start}:{source.stop}"
+    if isinstance(source, MergedSource):
+        key = f"{image_id}|merge:{source.spec}"
+    else:
+        st = os.stat(source)
+        key = f"{image_id}|{os.path.abspath(source)}|{st.st_size}|{st.st_mtime_ns}"
+    return key if rules is None else f"{key}|rules:{rules.digest}"
+
+
+class CheckpointStore:
+    def __init__(self, path: str, interval: float = CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._data = self._load()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str):
+        return self._data.get(key)
+
+    def update(self, key: str, offset: int, checked: int, done: bool = False):
+        self._data[key] = {"offset": offset, "checked": checked, "done": done, "updated": time.time()}
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if not self._dirty:
+            return
+        with stage("checkpoint"):
+            atomic_write_bytes(self.path, [json.dumps(self._data, indent=1).encode()])
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+
+# ---------- Image index ----------
+# What each image is, read from its bytes once: type, encryption, UUID, band size and
+# KDF parameters, plus whether its password has been recovered. Entries are keyed by
+# absolute path and kept while size and mtime of the files they came from match, so
+# a rescan only stats. --scan walks directory trees one level at a time across a
+# thread pool; sparsebundles are recognised by their Info.plist, files by magic.
+
+def _image_sources(image_path):
+    # the files an entry depends on: a bundle's Info.plist and token, or the image itself
+    if os.path.isdir(image_path):
+        return [p for p in (os.path.join(image_path, "Info.plist"), os.path.join(image_path, "token"))
+                if os.path.exists(p)]
+    return [image_path]
+
+
+def probe_image(image_path) -> dict:
+    info = {"kind": None, "encrypted": False, "uuid": None, "band_size": None, "kdf": None, "identity": None}
+    header = None
+    if os.path.isdir(image_path):
+        try:
+            with open(os.path.join(image_path, "Info.plist"), "rb") as f:
+                plist = plistlib.load(f)
+        except Exception:
+            return info
+        if plist.get("diskimage-bundle-type") != "com.apple.diskimage.sparsebundle":
+            return info
+        info.update(kind="sparsebundle", uuid=plist.get("uuid"), band_size=plist.get("band-size"))
+        token = os.path.join(image_path, "token")
+        header = token if os.path.isfile(token) else None
+    else:
+        with open(image_path, "rb") as f:
+            head = f.read(8)
+            size = os.fstat(f.fileno()).st_size
+            f.seek(max(0, size - 512))
+            tail = f.read(512)
+        if head == ENCRCDSA_MAGIC:
+            info["kind"] = "encrcdsa"
+        elif head[:4] == b"sprs":
+            info["kind"] = "sparseimage"
+        elif size >= 512 and tail[:4] == b"koly":
+            info["kind"] = "udif"
+        elif tail[-8:] == b"cdsaencr":
+            info.update(kind="cdsaencr", encrypted=True)
+        else:
+            return info
+        header = image_path
+    if header is not None:
+        with open(header, "rb") as f:
+            data = f.read(ENCRCDSA_HEADER_READ)
+        if data[:8] == ENCRCDSA_MAGIC:
+            info["encrypted"] = True
+            try:
+                h = parse_encrcdsa_header(data)
+                info["kdf"] = {"iterations": h["iterations"], "key_bits": h["key_bits"], "salt_len": len(h["salt"])}
+                info["uuid"] = info["uuid"] or h["uuid"]
+            except (ValueError, struct.error):
+                pass
+        elif header != image_path:
+            # v1 tokens keep their header at the end
+            with open(header, "rb") as f:
+                f.seek(max(0, os.fstat(f.fileno()).st_size - 8))
+                info["encrypted"] = f.read(8) == b"cdsaencr"
+    info["identity"] = _image_identity(image_path)
+    return info
+
+
+class ImageIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self._data = self._load()
+        self._dirty = False
+        self.probed = 0
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, image_path) -> dict:
+        # -> cached entry, re-probed if any of its files changed; None if the path is gone
+        key = os.path.abspath(image_path)
+        try:
+            sig = [[st.st_size, st.st_mtime_ns] for st in map(os.stat, _image_sources(image_path))]
+            entry = self._data.get(key)
+            if entry is not None and entry["sig"] == sig:
+                return entry
+            entry = dict(probe_image(image_path), sig=sig, found=False)
+        except OSError:
+            return None
+        with self.lock:
+            self._data[key] = entry
+            self._dirty = True
+            self.probed += 1
+        return entry
+
+    def mark_found(self, image_path):
+        entry = self.lookup(image_path)
+        if entry is None:
+            return
+        with self.lock:
+            entry.update(found=True, found_at=time.time())
+            self._dirty = True
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._data, indent=1).encode()
+            self._dirty = False
+        atomic_write_bytes(self.path, [data])
+
+
+IMAGES = None
+
+
+def _scan_dir(path: str):
+    # -> (subdirectories to descend into, image candidates); dot entries are skipped
+    dirs, hits = [], []
+    try:
+        entries = [e for e in os.scandir(path) if not e.name.startswith(".")]
+    except OSError:
+        return dirs, hits
+    names = {e.name for e in entries}
+    if "Info.plist" in names and ("bands" in names or "token" in names):
+        return dirs, [path]
+    for e in entries:
+        try:
+            if e.is_dir(follow_symlinks=False):
+                dirs.append(e.path)
+            elif e.is_file() and e.stat().st_size >= 512:
+                hits.append(e.path)
+        except OSError:
+            continue
+    return dirs, hits
+
+
+def scan_images(roots, index: ImageIndex, threads: int = SCAN_THREADS):
+    t0 = time.perf_counter()
+    frontier = sorted({os.path.abspath(r) for r in roots})
+    seen, candidates = set(frontier), set()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        while frontier:
+            next_level = []
+            for dirs, hits in ex.map(_scan_dir, frontier):
+                next_level.extend(d for d in dirs if d not in seen)
+                candidates.update(hits)
+            seen.update(next_level)
+            frontier = next_level
+        candidates = sorted(candidates)
+        probed_before = index.probed
+        entries = list(ex.map(index.lookup, candidates))
+    images = sorted(p for p, e in zip(candidates, entries) if e is not None and e["kind"] is not None)
+    index.flush()
+    console.print(f"[blue][*] Scanned {human_int(len(seen))} folders, {human_int(len(candidates))} files: "
+                  f"{len(images)} images ({index.probed - probed_before} read, the rest cached) "
+                  f"in {time.perf_counter() - t0:.1f}s[/blue]")
+    return images
+
+
+def settle_images(images, index: ImageIndex, include_found: bool = False):
+    # drops images that need no attempt at all: unencrypted ones and ones already recovered
+    keep = []
+    for image in images:
+        entry = index.lookup(image)
+        if entry is not None and entry["kind"] is not None and not entry["encrypted"]:
+            console.print(f"[blue][*] Skipping {image}: not encrypted[/blue]")
+        elif entry is not None and entry["found"] and not include_found:
+            console.print(f"[blue][*] Skipping {image}: password already recovered "
+                          f"(--include-found to try again)[/blue]")
+        else:
+            keep.append(image)
+    index.flush()
+    return keep
+
+
+def show_images(images, index: ImageIndex):
+    tbl = Table(show_header=True, header_style="bold magenta", title="Images")
+    tbl.add_column("Image", style="cyan")
+    tbl.add_column("Type")
+    tbl.add_column("Band size", justify="right")
+    tbl.add_column("KDF iterations", justify="right")
+    tbl.add_column("Status")
+    for image in images:
+        entry = index.lookup(image) or {}
+        kdf = entry.get("kdf") or {}
+        status = ("[green]recovered[/green]" if entry.get("found") else
+                  "encrypted" if entry.get("encrypted") else "[dim]not encrypted[/dim]")
+        tbl.add_row(os.path.relpath(image), entry.get("kind") or "?", human_int(entry["band_size"]) if entry.get("band_size") else "",
+                    human_int(kdf["iterations"]) if kdf else "", status)
+    console.print(tbl)
+
+
+# ---------- Candidate dedup ----------
+# A Bloom filter per image remembers every candidate that has been verified, so
+# overlapping wordlists (and reruns, when persisted) never re-test a password.
+# Candidates only enter the filter once verified; in-flight ones sit in a
+# small pending set so a crash or cancel can't mark an untried password as seen.
+
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float):
+        self.m = max(64, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.k = max(1, int(round(self.m / capacity * math.log(2))))
+        self.count = 0
+        self.bits = bytearray((self.m + 7) // 8)
+
+    @staticmethod
+    def digest(item) -> bytes:
+        return hashlib.blake2b(item, digest_size=16).digest()
+
+    def _indexes(self, d: bytes):
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def contains_digest(self, d: bytes) -> bool:
+        bits = self.bits
+        for idx in self._indexes(d):
+            if not bits[idx >> 3] & (1 << (idx & 7)):
+                return False
+        return True
+
+    def add_digest(self, d: bytes):
+        bits = self.bits
+        for idx in self._indexes(d):
+            bits[idx >> 3] |= 1 << (idx & 7)
+        self.count += 1
+
+    def __contains__(self, item) -> bool:
+        return self.contains_digest(self.digest(item))
+
+    def add(self, item):
+        self.add_digest(self.digest(item))
+
+    def save(self, path: str):
+        header = BLOOM_MAGIC + struct.pack(">QIQ", self.m, self.k, self.count)
+        atomic_write_bytes(path, [header, self.bits])
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "rb") as f:
+            head = f.read(len(BLOOM_MAGIC) + 20)
+            if head[:len(BLOOM_MAGIC)] != BLOOM_MAGIC:
+                raise ValueError("not a bloom filter file")
+            m, k, count = struct.unpack_from(">QIQ", head, len(BLOOM_MAGIC))
+            bf = cls.__new__(cls)
+            bf.m, bf.k, bf.count = m, k, count
+            bf.bits = bytearray((m + 7) // 8)
+            if f.readinto(bf.bits) != len(bf.bits):
+                raise ValueError("truncated bloom filter file")
+        return bf
+
+
+class CandidateDedup:
+    def __init__(self, bloom: BloomFilter, path: str = None):
+        self.bloom = bloom
+        self.path = path
+        self.pending = set()
+        self.skipped = 0
+        self._last_save = time.monotonic()
+
+    def filter(self, candidates):
+        # works on digests, so zero-copy memoryview candidates are never copied here
+        bloom, pending, digest = self.bloom, self.pending, BloomFilter.digest
+        for pwd, pos in candidates:
+            d = digest(pwd)
+            if d in pending or bloom.contains_digest(d):
+                self.skipped += 1
+                continue
+            pending.add(d)
+            yield pwd, pos
+
+    def verified(self, pwds):
+        for pwd in pwds:
+            d = BloomFilter.digest(pwd)
+            self.bloom.add_digest(d)
+            self.pending.discard(d)
+        if self.path is not None and time.monotonic() - self._last_save >= DEDUP_SAVE_INTERVAL:
+            self.save()
+
+    def end_source(self):
+        # anything still pending was never verified (skip/cancel) and may be offered again
+        self.pending.clear()
+
+    def save(self):
+        if self.path is not None:
+            self.bloom.save(self.path)
+            self._last_save = time.monotonic()
+
+
+def open_dedup(image_id: str, capacity: int = DEDUP_CAPACITY, fp_rate: float = DEDUP_FP_RATE, persist: bool = False):
+    path = None
+    if persist:
+        name = hashlib.sha1(image_id.encode()).hexdigest() + ".bloom"
+        path = os.path.join(STATE_DIR, DEDUP_DIR, name)
+        if os.path.exists(path):
+            try:
+                bloom = BloomFilter.load(path)
+                console.print(f"[blue][*] Dedup filter loaded: {human_int(bloom.count)} candidates already tried[/blue]")
+                return CandidateDedup(bloom, path)
+            except (OSError, ValueError, struct.error) as e:
+                console.print(f"[yellow][!] Ignoring unreadable dedup filter {path}: {e}[/yellow]")
+    return CandidateDedup(BloomFilter(capacity, fp_rate), path)
+
+
+# ---------- Wordlist index (mmap reader) ----------
+# The index stores, per INDEX_BLOCK of the file, how many newlines precede it.
+# That is 8 bytes per MiB, gives exact line counts without reading the list,
+# and turns "offset of line N" into a bisect plus a scan of one block.
+
+class WordlistIndex:
+    def __init__(self, path: str, size: int, mtime_ns: int, block: int, cum, last_partial: bool):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.block = block
+        self.cum = cum
+        self.last_partial = last_partial
+
+    @property
+    def lines(self) -> int:
+        return self.cum[-1] + (1 if self.last_partial else 0)
+
+    def offset_of_line(self, n: int) -> int:
+        if n <= 0:
+            return 0
+        if n > self.cum[-1]:
+            return self.size
+        b = bisect.bisect_left(self.cum, n) - 1
+        need = n - self.cum[b]
+        with open(self.path, "rb") as f:
+            data = os.pread(f.fileno(), self.block, b * self.block)
+        pos = -1
+        for _ in range(need):
+            pos = data.find(b"\n", pos + 1)
+        return b * self.block + pos + 1
+
+    def save(self, idx_path: str):
+        header = INDEX_MAGIC + struct.pack(">QQIQB", self.size, self.mtime_ns, self.block, len(self.cum),
+                                           1 if self.last_partial else 0)
+        atomic_write_bytes(idx_path, [header, array("Q", self.cum).tobytes()])
+
+    @classmethod
+    def load(cls, idx_path: str, path: str, st):
+        with open(idx_path, "rb") as f:
+            head = f.read(len(INDEX_MAGIC) + 29)
+            if head[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                return None
+            size, mtime_ns, block, n, last_partial = struct.unpack_from(">QQIQB", head, len(INDEX_MAGIC))
+            if size != st.st_size or mtime_ns != st.st_mtime_ns:
+                return None
+            body = f.read(8 * n)
+        if len(body) != 8 * n:
+            # truncated by a crash or a full disk: rebuild rather than trust it
+            return None
+        cum = array("Q")
+        cum.frombytes(body)
+        return cls(path, size, mtime_ns, block, cum, bool(last_partial))
+
+    @classmethod
+    def build(cls, path: str, st, block: int = INDEX_BLOCK):
+        size = st.st_size
+        nblocks = (size + block - 1) // block
+        with open(path, "rb") as f:
+            fd = f.fileno()
+
+            def count_block(b):
+                # pread releases the GIL, so threads overlap the I/O of different blocks
+                return os.pread(fd, block, b * block).count(b"\n")
+
+            with ThreadPoolExecutor(max_workers=INDEX_THREADS) as ex:
+                counts = list(ex.map(count_block, range(nblocks)))
+            last_partial = size > 0 and os.pread(fd, 1, size - 1) != b"\n"
+        cum = array("Q", [0])
+        cum.extend(accumulate(counts))
+        return cls(path, size, st.st_mtime_ns, block, cum, last_partial)
+
+
+def wordlist_index(path: str) -> WordlistIndex:
+    st = os.stat(path)
+    idx_path = os.path.join(STATE_DIR, INDEX_DIR, hashlib.sha1(os.path.abspath(path).encode()).hexdigest() + ".idx")
+    try:
+        idx = WordlistIndex.load(idx_path, path, st)
+        if idx is not None:
+            return idx
+    except (OSError, struct.error):
+        pass
+    idx = WordlistIndex.build(path, st)
+    try:
+        idx.save(idx_path)
+    except OSError:
+        pass
+    return idx
+
+
+def _scan_lines(buf, mv, pos: int, size: int, base: int = 0):
+    find = buf.find
+    while pos < size:
+        nl = find(b"\n", pos, size)
+        stop = size if nl < 0 else nl
+        end = size if nl < 0 else nl + 1
+        while stop > pos and buf[stop - 1] == 13:
+            stop -= 1
+        if stop > pos:
+            yield mv[pos:stop], base + end
+        pos = end
+
+
+def iter_lines_mmap(path, start: int = 0):
+    # yields (memoryview of the line, offset just past it) straight out of the page cache
+    size = os.path.getsize(path)
+    if start >= size:
+        return
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    mv = memoryview(mm)
+    try:
+        yield from _scan_lines(mm, mv, start, size)
+    finally:
+        mv.release()
+        try:
+            mm.close()
+        except BufferError:
+            # callers still hold line views; the mapping goes away with the last one
+            pass
+
+
+def iter_lines_buffer(data: bytes, base: int = 0):
+    # same as iter_lines_mmap over an in-memory slice that started at file offset base
+    return _scan_lines(data, memoryview(data), 0, len(data), base)
+
+
+# ---------- Compressed wordlists ----------
+# .gz / .bz2 / .xz / .zst lists are decompressed on a reader thread (the codecs
+# release the GIL) into a small queue of chunks and split into lines as they
+# arrive, so there is no temp file and the first candidate comes out at once.
+# Positions are uncompressed byte offsets: a resume decodes and drops the prefix.
+# Until one full pass has recorded the exact line count, the keyspace is
+# estimated from the compressed bytes consumed so far.
+
+def is_compressed(path) -> bool:
+    return isinstance(path, str) and path.lower().endswith(COMPRESSED_EXTS)
+
+
+def open_decompressed(path: str, raw):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".gz":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if ext == ".bz2":
+        return bz2.BZ2File(raw)
+    if ext == ".xz":
+        return lzma.LZMAFile(raw)
+    if zstd is None:
+        raise ValueError(f"{path}: .zst wordlists need the zstandard module")
+    return zstd.ZstdDecompressor().stream_reader(raw)
+
+
+def _compressed_index_path(path: str) -> str:
+    return os.path.join(STATE_DIR, INDEX_DIR, hashlib.sha1(os.path.abspath(path).encode()).hexdigest() + ".zidx")
+
+
+def _save_compressed_index(path: str, st, lines: int, length: int):
+    info = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "lines": lines, "length": length}
+    try:
+        atomic_write_bytes(_compressed_index_path(path), [json.dumps(info).encode()])
+    except OSError:
+        pass
+
+
+def compressed_span(path: str):
+    # -> (lines, end offset); end is COMPRESSED_END while the uncompressed length is unknown
+    st = os.stat(path)
+    try:
+        with open(_compressed_index_path(path), "r") as f:
+            info = json.load(f)
+        if info["size"] == st.st_size and info["mtime_ns"] == st.st_mtime_ns:
+            return info["lines"], info["length"]
+    except (OSError, ValueError, KeyError):
+        pass
+    with open(path, "rb") as raw, open_decompressed(path, raw) as f:
+        data = f.read(COMPRESSED_SAMPLE)
+        used = raw.tell()
+    lines = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+    if len(data) < COMPRESSED_SAMPLE:
+        _save_compressed_index(path, st, lines, len(data))
+        return lines, len(data)
+    return int(lines * st.st_size / max(1, used)), COMPRESSED_END
+
+
+def _decompress_reader(path: str, chunks: queue.Queue, stop: Event):
+    def put(item):
+        # a consumer that stopped reading never drains the queue, so never block on it for good
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=POOL_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    try:
+        with open(path, "rb") as raw, open_decompressed(path, raw) as f:
+            while not stop.is_set():
+                data = f.read(DECOMPRESS_CHUNK)
+                put((data, raw.tell()))
+                if not data:
+                    return
+    except Exception as e:
+        put((e, None))
+
+
+def iter_lines_compressed(path: str, start: int = 0, progress: dict = None):
+    # yields (memoryview of the line, uncompressed offset just past it); progress gets the
+    # compressed bytes consumed ("raw_pos" of "raw_size") and the lines decoded so far
+    progress = progress if progress is not None else {}
+    st = os.stat(path)
+    progress.update(raw_pos=0, raw_size=st.st_size, lines=0, done=False)
+    chunks = queue.Queue(maxsize=DECOMPRESS_QUEUE)
+    stop = Event()
+    threading.Thread(target=_decompress_reader, args=(path, chunks, stop), daemon=True).start()
+    base, carry = 0, b""
+    try:
+        while True:
+            data, raw_pos = chunks.get()
+            if isinstance(data, Exception):
+                raise OSError(f"{path}: {data}") from data
+            if data:
+                progress["lines"] += data.count(b"\n")
+            buf = carry + data if carry else data
+            # only complete lines, unless the stream has ended
+            limit = len(buf) if not data else buf.rfind(b"\n") + 1
+            if base + limit > start:
+                yield from _scan_lines(buf, memoryview(buf), max(0, start - base), limit, base)
+            progress["raw_pos"] = raw_pos
+            base += limit
+            carry = buf[limit:]
+            if not data:
+                # a last line without a newline still counts, as in WordlistIndex.lines
+                if buf and not buf.endswith(b"\n"):
+                    progress["lines"] += 1
+                break
+        progress["done"] = True
+        _save_compressed_index(path, st, progress["lines"], base)
+    finally:
+        stop.set()
+
+
+# ---------- Candidate rules ----------
+# hashcat-style rules ("c $2 $0 $2 $4", "sa@ so0", "d", ...) are parsed once into
+# plain Python callables; runs of appends, prepends and substitutions collapse into
+# a single concatenation or bytes.translate. Every rule is applied to every base
+# word (no rejection rules), so the keyspace is exactly words * rules.
+
+RULE_ARITY = {
+    ":": 0, "l": 0, "u": 0, "c": 0, "C": 0, "t": 0, "T": 1, "r": 0, "d": 0, "p": 1, "f": 0,
+    "{": 0, "}": 0, "$": 1, "^": 1, "[": 0, "]": 0, "D": 1, "x": 2, "O": 2, "i": 2, "o": 2,
+    "'": 1, "s": 2, "@": 1, "z": 1, "Z": 1, "q": 0, "E": 0, "k": 0, "K": 0, "*": 2, "y": 1, "Y": 1,
+}
+
+
+def _rule_pos(ch: str) -> int:
+    # positions and counts are 0-9 then A-Z
+    n = int(ch, 36) if ch.isalnum() else -1
+    if n < 0 or (ch.isalpha() and not ch.isupper()):
+        raise ValueError(f"bad position {ch!r}")
+    return n
+
+
+def _swap_at(w: bytes, a: int, b: int) -> bytes:
+    if a >= len(w) or b >= len(w) or a == b:
+        return w
+    buf = bytearray(w)
+    buf[a], buf[b] = buf[b], buf[a]
+    return bytes(buf)
+
+
+def _rule_fn(op: str, args: str):
+    a = args.encode("latin-1")
+    if op == "l":
+        return bytes.lower
+    if op == "u":
+        return bytes.upper
+    if op == "c":
+        return lambda w: w[:1].upper() + w[1:].lower()
+    if op == "C":
+        return lambda w: w[:1].lower() + w[1:].upper()
+    if op == "t":
+        return bytes.swapcase
+    if op == "r":
+        return lambda w: w[::-1]
+    if op == "d":
+        return lambda w: w + w
+    if op == "f":
+        return lambda w: w + w[::-1]
+    if op == "{":
+        return lambda w: w[1:] + w[:1]
+    if op == "}":
+        return lambda w: w[-1:] + w[:-1]
+    if op == "[":
+        return lambda w: w[1:]
+    if op == "]":
+        return lambda w: w[:-1]
+    if op == "q":
+        return lambda w: bytes(b for b in w for _ in (0, 1))
+    if op == "E":
+        return lambda w: b" ".join(p[:1].upper() + p[1:] for p in w.lower().split(b" "))
+    if op == "k":
+        return lambda w: _swap_at(w, 0, 1)
+    if op == "K":
+        return lambda w: _swap_at(w, len(w) - 1, len(w) - 2) if len(w) >= 2 else w
+    if op == "*":
+        n, m = _rule_pos(args[0]), _rule_pos(args[1])
+        return lambda w: _swap_at(w, n, m)
+    n = _rule_pos(args[0]) if op in "TpDxO'zZyYio" else 0
+    if op == "T":
+        return lambda w: w[:n] + w[n:n + 1].swapcase() + w[n + 1:]
+    if op == "p":
+        return lambda w: w * (n + 1)
+    if op == "D":
+        return lambda w: w[:n] + w[n + 1:]
+    if op == "x":
+        m = _rule_pos(args[1])
+        return lambda w: w[n:n + m] if n + m <= len(w) else w
+    if op == "O":
+        m = _rule_pos(args[1])
+        return lambda w: w[:n] + w[n + m:] if n + m <= len(w) else w
+    if op == "i":
+        x = a[1:]
+        return lambda w: w[:n] + x + w[n:] if n <= len(w) else w
+    if op == "o":
+        x = a[1:]
+        return lambda w: w[:n] + x + w[n + 1:] if n < len(w) else w
+    if op == "'":
+        return lambda w: w[:n]
+    if op == "z":
+        return lambda w: w[:1] * n + w
+    if op == "Z":
+        return lambda w: w + w[-1:] * n
+    if op == "y":
+        return lambda w: w[:n] + w if n <= len(w) else w
+    if op == "Y":
+        return lambda w: w + w[len(w) - n:] if n <= len(w) else w
+    raise ValueError(f"unsupported rule function {op!r}")
+
+
+def parse_rule(line: str):
+    # -> [(op, args)], spaces between functions are ignored
+    ops, i = [], 0
+    while i < len(line):
+        op = line[i]
+        if op == " ":
+            i += 1
+            continue
+        if op not in RULE_ARITY:
+            raise ValueError(f"unsupported rule function {op!r}")
+        arity = RULE_ARITY[op]
+        args = line[i + 1:i + 1 + arity]
+        if len(args) < arity:
+            raise ValueError(f"{op!r} needs {arity} argument(s)")
+        ops.append((op, args))
+        i += 1 + arity
+    return ops
+
+
+def compile_rule(ops):
+    fns = []
+    k = 0
+    while k < len(ops):
+        op, args = ops[k]
+        if op == ":":
+            k += 1
+            continue
+        if op in "$^":
+            run = []
+            while k < len(ops) and ops[k][0] == op:
+                run.append(ops[k][1])
+                k += 1
+            if op == "$":
+                tail = "".join(run).encode("latin-1")
+                fns.append(lambda w, tail=tail: w + tail)
+            else:
+                head = "".join(reversed(run)).encode("latin-1")
+                fns.append(lambda w, head=head: head + w)
+            continue
+        if op in "s@":
+            # substitutions compose: track where every input byte ends up (None = purged)
+            dest = list(range(256))
+            while k < len(ops) and ops[k][0] in "s@":
+                sop, sargs = ops[k]
+                x = ord(sargs[0])
+                y = ord(sargs[1]) if sop == "s" else None
+                dest = [y if d == x else d for d in dest]
+                k += 1
+            table = bytes(b if d is None else d for b, d in enumerate(dest))
+            purge = bytes(b for b, d in enumerate(dest) if d is None)
+            fns.append(lambda w, table=table, purge=purge: w.translate(table, purge))
+            continue
+        fns.append(_rule_fn(op, args))
+        k += 1
+    if not fns:
+        return bytes
+    if len(fns) == 1:
+        return fns[0]
+
+    def run(w, fns=tuple(fns)):
+        for fn in fns:
+            w = fn(w)
+        return w
+    return run
+
+
+class RuleSet:
+    def __init__(self, lines, name: str = "rules"):
+        self.name = name
+        self.lines = []
+        self.fns = []
+        for lineno, raw in enumerate(lines, 1):
+            line = raw.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            try:
+                self.fns.append(compile_rule(parse_rule(line)))
+            except ValueError as e:
+                raise ValueError(f"{name}:{lineno}: {e}") from None
+            self.lines.append(line)
+        if not self.fns:
+            raise ValueError(f"{name}: no rules")
+        self.digest = hashlib.sha1("\n".join(self.lines).encode("latin-1")).hexdigest()[:16]
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r", encoding="latin-1") as f:
+            return cls(f.readlines(), os.path.basename(path))
+
+    def __len__(self):
+        return len(self.fns)
+
+    def keyspace(self, words: int) -> int:
+        return words * len(self.fns)
+
+    def expand(self, words, start: int = 0):
+        # (word, end offset) -> (candidate, offset). Only a word's last rule reports its end
+        # offset, so a checkpoint never lands halfway through one word's expansions.
+        first, last = self.fns[:-1], self.fns[-1]
+        pos = start
+        for word, end in words:
+            w = bytes(word)
+            for fn in first:
+                yield fn(w), pos
+            yield last(w), end
+            pos = end
+
+    def expand_batch(self, words):
+        # -> list of candidates for a list of base words, rule-major within each word
+        fns = self.fns
+        return [fn(w) for w in words for fn in fns]
+
+
+# ---------- Mask keyspace ----------
+# Masks like "?u?l?l?l?d?d?s" are mixed-radix numbers: candidate i is decoded
+# straight from its index (last position varies fastest), so a range [a, b) can
+# be handed out, resumed at any k, and counted exactly. Candidates are produced a
+# block at a time into a preallocated buffer (vectorised when numpy is present).
+
+MASK_CHARSETS = {
+    "l": b"abcdefghijklmnopqrstuvwxyz",
+    "u": b"ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "d": b"0123456789",
+    "s": b" !\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~",
+    "h": b"0123456789abcdef",
+    "H": b"0123456789ABCDEF",
+}
+MASK_CHARSETS["a"] = MASK_CHARSETS["l"] + MASK_CHARSETS["u"] + MASK_CHARSETS["d"] + MASK_CHARSETS["s"]
+MASK_BLOCK = 4096
+
+
+def _expand_charset(spec: str, custom: dict) -> bytes:
+    out, i = bytearray(), 0
+    while i < len(spec):
+        ch = spec[i]
+        if ch == "?" and i + 1 < len(spec):
+            key = spec[i + 1]
+            if key == "?":
+                out += b"?"
+            elif key in MASK_CHARSETS:
+                out += MASK_CHARSETS[key]
+            elif key in custom:
+                out += custom[key]
+            else:
+                raise ValueError(f"unknown charset ?{key}")
+            i += 2
+        else:
+            out += ch.encode("latin-1")
+            i += 1
+    # keep first occurrences only so every index maps to a distinct candidate
+    return bytes(dict.fromkeys(out))
+
+
+def parse_mask(mask: str, custom: dict = None):
+    # -> list of per-position charsets; custom maps "1".."4" to charset specs (which may use ?l etc.)
+    resolved = {}
+    for key, spec in (custom or {}).items():
+        resolved[key] = _expand_charset(spec, resolved)
+    positions, i = [], 0
+    while i < len(mask):
+        if mask[i] == "?":
+            if i + 1 >= len(mask):
+                raise ValueError("mask ends with a lone '?'")
+            positions.append(_expand_charset(mask[i:i + 2], resolved))
+            i += 2
+        else:
+            positions.append(mask[i].encode("latin-1"))
+            i += 1
+    if not positions or not all(positions):
+        raise ValueError(f"empty mask or charset in {mask!r}")
+    return positions
+
+
+class MaskSource:
+    def __init__(self, mask: str, custom: dict = None, start: int = 0, stop: int = None):
+        self.mask = mask
+        self.custom = dict(custom or {})
+        self.charsets = parse_mask(mask, self.custom)
+        self.width = len(self.charsets)
+        self.radices = [len(cs) for cs in self.charsets]
+        self.keyspace = math.prod(self.radices)
+        self.start = start
+        self.stop = self.keyspace if stop is None else stop
+        if not 0 <= self.start <= self.stop <= self.keyspace:
+            raise ValueError(f"range [{start}, {stop}) outside keyspace {self.keyspace}")
+        # uint64 lanes only while every index fits
+        self._vector = np is not None and self.keyspace < 2 ** 63
+        if self._vector:
+            self._luts = [np.frombuffer(cs, dtype=np.uint8) for cs in self.charsets]
+
+    @property
+    def spec(self) -> str:
+        extra = "".join(f" -{k} {v}" for k, v in sorted(self.custom.items()))
+        return self.mask + extra
+
+    @property
+    def label(self) -> str:
+        if self.start == 0 and self.stop == self.keyspace:
+            return f"mask {self.mask}"
+        return f"mask {self.mask} [{self.start}:{self.stop})"
+
+    @property
+    def size(self) -> int:
+        return self.stop - self.start
+
+    def shard(self, start: int, stop: int):
+        return MaskSource(self.mask, self.custom, start, stop)
+
+    def _digits(self, i: int):
+        digits = [0] * self.width
+        for p in range(self.width - 1, -1, -1):
+            i, digits[p] = divmod(i, self.radices[p])
+        return digits
+
+    def candidate(self, i: int) -> bytes:
+        return bytes(cs[d] for cs, d in zip(self.charsets, self._digits(i)))
+
+    def new_buffer(self, count: int = MASK_BLOCK):
+        if self._vector:
+            return np.empty((count, self.width), dtype=np.uint8)
+        return bytearray(count * self.width)
+
+    def fill(self, buf, first: int, count: int):
+        # writes candidates first .. first+count-1 into rows of buf (from new_buffer)
+        w = self.width
+        if self._vector:
+            idx = np.arange(first, first + count, dtype=np.int64)
+            digit = np.empty_like(idx)
+            for p in range(w - 1, -1, -1):
+                np.remainder(idx, self.radices[p], out=digit)
+                np.floor_divide(idx, self.radices[p], out=idx)
+                buf[:count, p] = self._luts[p][digit]
+            return
+        digits = self._digits(first)
+        row = bytearray(cs[d] for cs, d in zip(self.charsets, digits))
+        charsets, radices = self.charsets, self.radices
+        for k in range(count):
+            buf[k * w:(k + 1) * w] = row
+            p = w - 1
+            while p >= 0:
+                digits[p] += 1
+                if digits[p] < radices[p]:
+                    row[p] = charsets[p][digits[p]]
+                    break
+                digits[p] = 0
+                row[p] = charsets[p][0]
+                p -= 1
+
+    def iter(self, pos: int = 0):
+        # yields (candidate view, next index); blocks are frozen to bytes so batches may hold views across refills
+        pos = max(pos, self.start)
+        w = self.width
+        buf = self.new_buffer()
+        while pos < self.stop:
+            n = min(MASK_BLOCK, self.stop - pos)
+            self.fill(buf, pos, n)
+            block = memoryview(buf[:n].tobytes() if self._vector else bytes(buf[:n * w]))
+            for k in range(n):
+                pos += 1
+                yield block[k * w:(k + 1) * w], pos
+
+
+def source_span(source, rules: RuleSet = None):
+    # -> (candidates, end position); positions are byte offsets in wordlists, indexes in masks
+    # and packed per-list ranks in merges
+    if isinstance(source, (MaskSource, FastLane)):
+        return source.size, source.stop
+    if isinstance(source, MergedSource):
+        return (rules.keyspace(source.size) if rules is not None else source.size), source.stop
+    if is_compressed(source):
+        lines, end = compressed_span(source)
+        return (rules.keyspace(lines) if rules is not None else lines), end
+    index = wordlist_index(source)
+    return (rules.keyspace(index.lines) if rules is not None else index.lines), index.size
+
+
+def source_candidates(source, start: int = 0, rules: RuleSet = None, progress: dict = None):
+    # progress (optional) is filled in by compressed sources, whose keyspace is only an estimate
+    if isinstance(source, (MaskSource, FastLane)):
+        return source.iter(start)
+    if isinstance(source, MergedSource):
+        candidates = source.iter(start)
+    elif is_compressed(source):
+        if progress is not None:
+            progress["per_line"] = len(rules) if rules is not None else 1
+        candidates = iter_lines_compressed(source, start, progress)
+    else:
+        candidates = iter_lines_mmap(source, start)
+    return rules.expand(candidates, start) if rules is not None else candidates
+
+
+def source_label(source, rules: RuleSet = None) -> str:
+    if isinstance(source, (MaskSource, FastLane)):
+        return source.label
+    name = source.label if isinstance(source, MergedSource) else source
+    return name if rules is None else f"{name} + {rules.name}"
+
+
+# ---------- Merged wordlists ----------
+# Several wordlists interleaved into one stream in roughly descending
+# probability, each read once front to back. A plain list is taken to be
+# frequency-sorted (Zipf: p ~ 1/rank); a counts list ("count:password" or
+# `uniq -c` output) scores by its own counts. Both are scaled so a list's first
+# entry gets weight / H(lines), which makes lists of different sizes comparable.
+# A position packs every list's line rank under their sum, so it is a plain
+# int that orders like the stream and resumes without replaying the merge.
+
+COUNT_LINE = re.compile(rb"\s*(\d+)[:\s]")
+
+
+def harmonic(n: int) -> float:
+    return 1.0 if n <= 1 else math.log(n) + 0.5772156649 + 1 / (2 * n)
+
+
+class MergedSource:
+    def __init__(self, entries):
+        # entries: (path, weight, counts) per wordlist
+        self.lists = []
+        for path, weight, counts in entries:
+            if weight <= 0:
+                raise ValueError(f"{path}: weight must be positive")
+            if is_compressed(path):
+                raise ValueError(f"{path}: compressed lists cannot be merged")
+            index = wordlist_index(path)
+            zipf = weight / harmonic(index.lines)
+            top = 1
+            if counts:
+                first = next(iter_lines_mmap(path), None)
+                m = COUNT_LINE.match(first[0]) if first is not None else None
+                top = max(1, int(m.group(1))) if m else 1
+            self.lists.append({"path": path, "weight": weight, "counts": counts, "index": index,
+                               "zipf": zipf, "scale": zipf / top})
+        if not self.lists:
+            raise ValueError("nothing to merge")
+        self.size = sum(lst["index"].lines for lst in self.lists)
+        self.stop = self.pack([lst["index"].lines for lst in self.lists])
+
+    @property
+    def spec(self) -> str:
+        return "|".join(f"{os.path.abspath(lst['path'])}:{lst['index'].size}:{lst['index'].mtime_ns}:{lst['weight']}:"
+                        f"{'counts' if lst['counts'] else 'rank'}" for lst in self.lists)
+
+    @property
+    def label(self) -> str:
+        return "merge of " + ", ".join(os.path.basename(lst["path"]) for lst in self.lists)
+
+    def pack(self, ranks) -> int:
+        pos = sum(ranks)
+        for r in ranks:
+            pos = (pos << MERGE_RANK_BITS) | r
+        return pos
+
+    def unpack(self, pos: int):
+        mask = (1 << MERGE_RANK_BITS) - 1
+        ranks = []
+        for _ in self.lists:
+            ranks.append(pos & mask)
+            pos >>= MERGE_RANK_BITS
+        return ranks[::-1]
+
+    def _push(self, heap, i: int, lines, rank: int):
+        item = next(lines, None)
+        if item is None:
+            return
+        line, lst = item[0], self.lists[i]
+        m = COUNT_LINE.match(line) if lst["counts"] else None
+        if m is not None:
+            score = int(m.group(1)) * lst["scale"]
+            line = line[m.end():]
+        else:
+            score = lst["zipf"] / (rank + 1)
+        # (score, list, rank) is unique, so the line itself is never compared
+        heapq.heappush(heap, (-score, i, rank, line))
+
+    def iter(self, pos: int = 0):
+        ranks = self.unpack(pos)
+        heap, readers = [], []
+        for i, (lst, rank) in enumerate(zip(self.lists, ranks)):
+            readers.append(iter_lines_mmap(lst["path"], lst["index"].offset_of_line(rank)))
+            self._push(heap, i, readers[i], rank)
+        while heap:
+            _, i, rank, line = heapq.heappop(heap)
+            ranks[i] = rank + 1
+            yield line, self.pack(ranks)
+            self._push(heap, i, readers[i], rank + 1)
+
+
+# ---------- Fast lane ----------
+# Before the bulk sources, a small candidate set built from what is known about the
+# image without opening it: its name and the parts of it, its folder, the file's
+# owner, the UUID, the years of its timestamps (and of any dates in Info.plist) and
+# an operator hints file, put through generate_candidates. Rules do not apply; the
+# dedup filter keeps the bulk lists from checking these again.
+
+IMAGE_SUFFIX = re.compile(r"\.(sparsebundle|sparseimage|dmg|img)$", re.IGNORECASE)
+
+
+def load_hints(path: str) -> list:
+    with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def image_hints(image_path):
+    # -> (words, years), most telling words first
+    stem = IMAGE_SUFFIX.sub("", os.path.basename(os.path.normpath(image_path)))
+    parts = [p for p in re.split(r"[\s._-]+", stem) if p]
+    words = [stem] + (["".join(parts)] + parts if len(parts) > 1 else [])
+    words.append(os.path.basename(os.path.dirname(os.path.abspath(image_path))))
+    years = set()
+    try:
+        st = os.stat(image_path)
+        if _pwd_db is not None:
+            try:
+                words.append(_pwd_db.getpwuid(st.st_uid).pw_name)
+            except KeyError:
+                pass
+        for src in _image_sources(image_path) or [image_path]:
+            s = os.stat(src)
+            years.update(time.localtime(t).tm_year for t in (s.st_mtime, getattr(s, "st_birthtime", s.st_mtime)))
+    except OSError:
+        pass
+    plist = os.path.join(image_path, "Info.plist")
+    if os.path.isfile(plist):
+        try:
+            with open(plist, "rb") as f:
+                info = plistlib.load(f)
+            years.update(v.year for v in info.values() if hasattr(v, "year"))
+        except Exception:
+            pass
+    try:
+        entry = IMAGES.lookup(image_path) if IMAGES is not None else probe_image(image_path)
+    except OSError:
+        entry = None
+    if entry and entry.get("uuid"):
+        uuid = str(entry["uuid"])
+        words += [uuid, uuid.split("-")[0]]
+    return words, sorted(years, reverse=True)
+
+
+class FastLane:
+    def __init__(self, images, hints: str = None):
+        self.images = list(images)
+        words, years = (load_hints(hints) if hints else []), set()
+        for image in self.images:
+            w, y = image_hints(image)
+            words += w
+            years.update(y)
+        words = list(dict.fromkeys(w for w in words if len(w) >= FAST_MIN_WORD))
+        gen = generate_candidates(words, sorted(years, reverse=True))
+        self.candidates = [c for _, c in zip(range(FAST_LANE_MAX), gen)]
+        self.size = self.stop = len(self.candidates)
+        self.digest = hashlib.sha1(b"\n".join(self.candidates)).hexdigest()[:16]
+        names = ", ".join(IMAGE_SUFFIX.sub("", os.path.basename(os.path.normpath(i))) for i in self.images[:3])
+        self.label = f"fast lane ({names}{', ...' if len(self.images) > 3 else ''})"
+
+    def iter(self, start: int = 0):
+        for i in range(start, self.size):
+            yield self.candidates[i], i + 1
+
+
+def fast_lane_estimate(lane: FastLane, iterations: int = None, workers: int = 1) -> str:
+    # iterations None: no offline verifier, so every candidate is an hdiutil attach
+    if iterations is None:
+        secs, each = lane.size * SCHED_ATTACH_SECS, "one hdiutil attach"
+    else:
+        secs = lane.size * iterations * kdf_seconds_per_iteration() / max(1, min(workers, CPU_CORES))
+        each = f"PBKDF2 {human_int(iterations)} iterations"
+    return f"{lane.label}: {human_int(lane.size)} candidates at {each} each, about {timedelta(seconds=int(secs))}"
+
+
+# ---------- Helpers ----------
+
+def make_dashboard(bundle, label, dash):
+    with stage("ui.render"):
+        return _dashboard_panel(bundle, label, dash)
+
+
+def _dashboard_panel(bundle, label, dash):
+    rate = (dash["checked"] - dash.get("base", 0)) / max(time.time() - dash["start"], 1)
+    ewma = dash.get("ewma", 0.0)
+    todo = max(dash["total"] - dash["checked"] - dash.get("skipped", 0), 0)
+    eta = (todo / (ewma or rate)) if (ewma or rate) > 0 else 0
+    workers = ""
+    if "workers" in dash:
+        workers = (f"\n    [white]Workers:[/white] {dash['workers']} active, "
+                   f"{human_int(dash['units_done'])} / {human_int(dash['units'])} units done")
+    if dash.get("utilization") is not None:
+        workers += f"\n    [white]Worker utilization:[/white] {dash['utilization'] * 100:.0f}%"
+    if dash.get("tuning"):
+        workers += f"\n    [white]Concurrency:[/white] {dash['tuning']}"
+    body = f"""
+    [cyan]Image:[/cyan] {bundle}
+    [yellow]Source:[/yellow] {os.path.basename(label)}
+    [green]Checked:[/green] {human_int(dash['checked'])} / {human_int(dash['total'])}
+    [magenta]Rate:[/magenta] {rate:.1f}/sec (recent {ewma:.1f}/sec){workers}
+    [white]Duplicates skipped:[/white] {human_int(dash.get('skipped', 0))}
+    [blue]ETA:[/blue] {str(timedelta(seconds=int(eta)))}
+    """
+    return Panel(body, title="Cracker Status", border_style="bold blue")
+
+
+# ---------- Metrics ----------
+# Candidate loops only bump integers in their dash dict. A reporter thread samples
+# it at a fixed rate for the progress bar, the smoothed rate and the optional
+# JSONL / Prometheus textfile export, and Rich's Live pulls the panel on its own
+# refresh, so rendering cost no longer scales with candidates per second.
+
+METRICS_PROM = [
+    ("candidates_checked", "checked", "gauge", "Candidates verified from the current source"),
+    ("candidates_total", "total", "gauge", "Candidates in the current source"),
+    ("duplicates_skipped", "skipped", "gauge", "Duplicate candidates skipped in the current source"),
+    ("source_progress_ratio", "source_progress", "gauge", "Fraction of the current source done"),
+    ("rate", "rate", "gauge", "Average candidates per second for the current source"),
+    ("rate_ewma", "ewma_rate", "gauge", "Smoothed candidates per second"),
+    ("worker_utilization_ratio", "utilization", "gauge", "Share of worker process time spent verifying"),
+    ("concurrency", "concurrency", "gauge", "Workers or hdiutil attaches the tuner currently allows in flight"),
+    ("elapsed_seconds", "elapsed", "gauge", "Seconds spent on the current source"),
+]
+
+
+def _prom_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(sample: dict) -> str:
+    labels = f'image="{_prom_label(sample["image"])}",source="{_prom_label(sample["source"])}"'
+    lines = []
+    for name, key, kind, text in METRICS_PROM:
+        if sample.get(key) is None:
+            continue
+        lines.append(f"# HELP cracker_{name} {text}")
+        lines.append(f"# TYPE cracker_{name} {kind}")
+        lines.append(f"cracker_{name}{{{labels}}} {sample[key]}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    # *.prom -> Prometheus textfile (rewritten atomically), anything else -> appended JSON lines
+    def __init__(self, path: str, interval: float = METRICS_EXPORT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.prometheus = path.endswith(".prom")
+        self._last = 0.0
+
+    def maybe_write(self, sample: dict, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        if self.prometheus:
+            atomic_write_bytes(self.path, [prometheus_text(sample).encode()])
+        else:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(sample) + "\n")
+
+
+class MetricsReporter:
+    def __init__(self, dash: dict, progress=None, task=None, exporter: MetricsExporter = None, pool=None,
+                 skipped=None, refresh: float = DASH_REFRESH):
+        self.dash = dash
+        self.progress = progress
+        self.task = task
+        self.exporter = exporter
+        self.pool = pool
+        self.skipped = skipped
+        self.refresh = refresh
+        self._stop = Event()
+        self._t = threading.Thread(target=self._loop, daemon=True)
+        self._begin = (time.monotonic(), dash["checked"])
+        self._last = self._begin
+        self._busy0 = (time.monotonic(), pool.busy_secs) if pool is not None else None
+        dash.setdefault("ewma", 0.0)
+
+    def __enter__(self):
+        self._t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._t.join()
+        self.tick(final=True)
+
+    def _loop(self):
+        while not self._stop.wait(1.0 / self.refresh):
+            with stage("ui.sample"):
+                self.tick()
+
+    def tick(self, final: bool = False):
+        d = self.dash
+        now = time.monotonic()
+        checked = d["checked"]
+        if self.skipped is not None:
+            d["skipped"] = self.skipped()
+        stream = d.get("stream")
+        if stream and stream.get("raw_pos"):
+            # compressed source: extrapolate the keyspace from the compressed bytes consumed
+            lines = stream["lines"] if stream["done"] else stream["lines"] * stream["raw_size"] / stream["raw_pos"]
+            d["total"] = max(int(lines) * stream["per_line"], checked + d.get("skipped", 0))
+            if self.progress is not None:
+                self.progress.update(self.task, total=d["total"])
+        t0, c0 = self._last
+        if now - t0 >= 0.5 / self.refresh:
+            begin_t, begin_c = self._begin
+            if now - begin_t < METRICS_EWMA_SECS:
+                # warm-up: plain average until one smoothing window has passed
+                d["ewma"] = (checked - begin_c) / max(now - begin_t, 1e-9)
+            else:
+                alpha = 1.0 - math.exp(-(now - t0) / METRICS_EWMA_SECS)
+                d["ewma"] = alpha * (checked - c0) / (now - t0) + (1.0 - alpha) * d["ewma"]
+            self._last = (now, checked)
+        if self._busy0 is not None:
+            b_t0, busy0 = self._busy0
+            d["utilization"] = min(1.0, (self.pool.busy_secs - busy0) / max((now - b_t0) * self.pool.active, 1e-9))
+        if TUNING is not None and TUNING.active is not None:
+            d["concurrency"] = TUNING.active.level
+            d["tuning"] = TUNING.active.status()
+        if self.progress is not None:
+            self.progress.update(self.task, completed=checked + d.get("skipped", 0))
+        if self.exporter is not None:
+            self.exporter.maybe_write(self.sample(), force=final)
+
+    def sample(self) -> dict:
+        d = self.dash
+        elapsed = max(time.time() - d["start"], 1e-9)
+        done = d["checked"] + d.get("skipped", 0)
+        util = d.get("utilization")
+        return {
+            "ts": round(time.time(), 3),
+            "image": d.get("image", ""),
+            "source": d.get("label", ""),
+            "checked": d["checked"],
+            "total": d["total"],
+            "skipped": d.get("skipped", 0),
+            "source_progress": round(min(1.0, done / d["total"]), 6) if d["total"] else 1.0,
+            "rate": round((d["checked"] - d.get("base", 0)) / elapsed, 3),
+            "ewma_rate": round(d["ewma"], 3),
+            "utilization": round(util, 4) if util is not None else None,
+            "concurrency": d.get("concurrency"),
+            "elapsed": round(elapsed, 3),
+        }
+
+
+# ---------- Long ETA prompt with countdown ----------
+
+def prompt_skip_or_jump_if_slow(current_idx: int, sources: list, sizes_bytes: list, eta_seconds: float):
+    if eta_seconds <= ETA_THRESHOLD_SECS:
+        return "continue"
+    console.rule("[bold yellow]Long ETA Detected")
+    console.print(f"[yellow]Estimated time for current file: {str(timedelta(seconds=int(eta_seconds)))} (> 2 minutes).[/yellow]")
+    console.print("[cyan]Press Enter to continue, type 's' to skip, or enter a number to jump.[/cyan]")
+    tbl = Table(show_header=True, header_style="bold magenta")
+    tbl.add_column("#", justify="right", style="cyan", no_wrap=True)
+    tbl.add_column("Wordlist", style="white")
+    tbl.add_column("Size", justify="right", style="green")
+    for i, src in enumerate(sources, start=1):
+        fname = os.path.basename(src) if isinstance(src, str) else src.label
+        sz = sizes_bytes[i - 1]
+        marker = " " if (i - 1) != current_idx else "→ "
+        tbl.add_row(str(i), f"{marker}{fname}", human_size(sz))
+    console.print(tbl)
+
+    countdown = min(30, max(5, int(eta_seconds))) if eta_seconds >= 5 else 5
+    countdown = min(30, countdown)
+
+    start = time.time()
+    remaining = countdown
+    printed_notices = []
+    if countdown >= 30:
+        console.print(f"[dim]You have [bold yellow]30s[/bold yellow] to choose...[/dim]")
+        printed_notices.append(30)
+    if countdown >= 20 and 20 not in printed_notices:
+        console.print(f"[dim]You have [bold yellow]20s[/bold yellow] to choose...[/dim]")
+        printed_notices.append(20)
+    last_notice = printed_notices[-1] if printed_notices else None
+
+    while True:
+        try:
+            r, _, _ = select.select([sys.stdin], [], [], 1.0)
+            if r:
+                ans = sys.stdin.readline().strip().lower()
+                if ans == "":
+                    return "continue"
+                if ans == "s":
+                    return "skip"
+                try:
+                    jump = int(ans)
+                    if 1 <= jump <= len(sources):
+                        return jump - 1
+                    else:
+                        console.print(f"[red]Please enter a number 1–{len(sources)}.[/red]")
+                except ValueError:
+                    console.print("Invalid input. Enter nothing, 's', or a number.")
+            elapsed = int(time.time() - start)
+            remaining = countdown - elapsed
+            if remaining <= 0:
+                console.print("[dim]No input — continuing.[/dim]")
+                return "continue"
+            if remaining % 10 == 0 and remaining != last_notice:
+                console.print(f"[dim]You have [bold yellow]{remaining}s[/bold yellow] to choose...[/dim]")
+                last_notice = remaining
+        except KeyboardInterrupt:
+            console.print("[dim]Interrupted — continuing.[/dim]")
+            return "continue"
+
+
+# ---------- Cracking one image ----------
+
+def report_found(bundle, pwd: bytes, elapsed: float, backend: AttachBackend, offline_only: bool):
+    console.rule("[bold green]SUCCESS")
+    try:
+        shown = pwd.decode("utf-8")
+    except UnicodeDecodeError:
+        shown = None
+    if shown:
+        console.print(f"[bold green][+] PASSWORD FOUND:[/bold green] [white on green]{shown}[/white on green]")
+    console.print(f"[bold green][+] BYTES:[/bold green] {pwd!r}")
+    console.print(f"[bold green][+] Time:[/bold green] {elapsed:.1f}s")
+    if offline_only:
+        console.print("[yellow][!] Verified offline only (hdiutil not available to confirm).[/yellow]")
+    if IMAGES is not None:
+        IMAGES.mark_found(bundle)
+    backend.detach(bundle)
+
+
+def take_budget(candidates, budget: dict):
+    # stops after budget["limit"] candidates and flags it, so the caller can tell a paused source from an exhausted one
+    n = budget["limit"]
+    for item in candidates:
+        if n <= 0:
+            budget["hit"] = True
+            return
+        n -= 1
+        yield item
+
+
+def crack_bundle(bundle, sources, mode, watcher: InputWatcher, workers: int = 1,
+                 backend: AttachBackend = None, interactive: bool = True, checkpoints: CheckpointStore = None,
+                 resume: bool = False, dedup_settings: dict = None, rules: RuleSet = None,
+                 metrics: MetricsExporter = None, pool: VerifierPool = None, target=0, limit: int = None,
+                 dedup: CandidateDedup = None, fast_settings: dict = None):
+    # pool/target/dedup may be shared by a caller running many images; limit caps the
+    # candidates verified in this call (a scheduler slice) and returns "paused" when hit;
+    # fast_settings (FastLane keywords) puts a fast lane for this image ahead of the sources
+    backend = backend or default_backend()
+    console.rule(f"[bold green]Starting: {bundle}")
+    verifier = backend.offline_verifier(bundle)
+    if verifier is not None:
+        console.print(f"[blue][*] Offline verifier: encrcdsa v{verifier.header['version']}, "
+                      f"PBKDF2 {human_int(verifier.iterations)} iterations[/blue]")
+    elif not backend.can_attempt(bundle):
+        console.print(f"[red][-] {bundle}: no offline verifier and hdiutil is not available; skipping.[/red]")
+        return "skipped_bundle"
+    offline_only = verifier is not None and not backend.confirms(bundle)
+    image_id = image_identity(bundle)
+    own_dedup = dedup is None
+    if own_dedup and dedup_settings is not None:
+        dedup = open_dedup(image_id, **dedup_settings)
+
+    run_start = time.time()
+    bundle_checked = 0
+    if fast_settings is not None:
+        lane = FastLane([bundle], **fast_settings)
+        sources = [lane] + list(sources)
+        console.print(f"[blue][*] {fast_lane_estimate(lane, verifier.iterations if verifier else None, workers)}[/blue]")
+    processed = [False] * len(sources)
+    sizes_bytes = [os.path.getsize(s) if isinstance(s, str) and os.path.exists(s) else 0 for s in sources]
+
+    own_pool = pool is None
+    if verifier is None:
+        pool = None
+    elif own_pool and workers > 1:
+        pool = VerifierPool({target: verifier.header}, workers)
+        pool.start()
+        console.print(f"[blue][*] Verifying with {workers} worker processes[/blue]")
+    streamed = pool is None and backend.streams(bundle)
+    paused = False
+
+    try:
+        with Progress(
+            SpinnerColumn(), BarColumn(), "[progress.percentage]{task.percentage:>3.0f}%",
+            TextColumn("{task.description}"), TimeElapsedColumn(), TimeRemainingColumn(),
+            console=console, transient=True,
+        ) as progress:
+            i = 0
+            while i < len(sources):
+                while i < len(sources) and processed[i]:
+                    i += 1
+                if i >= len(sources):
+                    break
+                if watcher.quit_all.is_set():
+                    return "quit"
+                if watcher.skip_bundle.is_set():
+                    console.print("[yellow][!] Skipping bundle by request.[/yellow]")
+                    watcher.skip_bundle.clear()
+                    return "skipped_bundle"
+
+                source = sources[i]
+                ckpt_key = checkpoint_key(image_id, source, rules) if checkpoints is not None else None
+                start_offset, start_checked = 0, 0
+                entry = checkpoints.get(ckpt_key) if (resume and ckpt_key) else None
+                if entry is not None:
+                    if entry.get("done"):
+                        console.print(f"[dim]{source_label(source, rules)} was already exhausted for this image; skipping.[/dim]")
+                        processed[i] = True
+                        i += 1
+                        continue
+                    start_offset, start_checked = entry["offset"], entry["checked"]
+                    if isinstance(source, MergedSource):
+                        at = f"entry {human_int(sum(source.unpack(start_offset)))}"
+                    else:
+                        at = f"{'candidate' if isinstance(source, (MaskSource, FastLane)) else 'byte'} {human_int(start_offset)}"
+                    console.print(f"[blue][*] Resuming {source_label(source, rules)} at {at} "
+                                  f"({human_int(start_checked)} already checked)[/blue]")
+                keyspace, source_end = source_span(source, rules)
+                est_lines = max(0, keyspace - start_checked)
+                elapsed = max(0.0001, time.time() - run_start)
+                rate = max(DEFAULT_RATE, bundle_checked / elapsed)
+                eta_seconds = est_lines / max(rate, 0.0001)
+                decision = "continue"
+                if interactive:
+                    decision = prompt_skip_or_jump_if_slow(i, sources, sizes_bytes, eta_seconds)
+                if decision == "skip":
+                    console.print(f"[yellow][!] Skipping {source_label(source, rules)} by request.[/yellow]")
+                    processed[i] = True
+                    continue
+                elif isinstance(decision, int):
+                    i = decision
+                    continue
+
+                total_for_bar = keyspace
+                if total_for_bar <= 0:
+                    processed[i] = True
+                    i += 1
+                    continue
+                stream = {}
+                candidates = profiled(source_candidates(source, start_offset, rules, stream), "source")
+                skipped_base = 0
+                # masks never repeat a candidate, so only wordlists go through the filter
+                if dedup is not None and not isinstance(source, MaskSource):
+                    candidates = profiled(dedup.filter(candidates), "dedup", inner="source")
+                    skipped_base = dedup.skipped
+                budget = None
+                if limit is not None:
+                    budget = {"limit": limit, "hit": False}
+                    candidates = take_budget(candidates, budget)
+                label = source_label(source, rules)
+
+                console.print(f"[blue][*] Using source {label} ({human_int(total_for_bar)} entries)[/blue]")
+                task = progress.add_task(f"[cyan]{os.path.basename(label)}", total=total_for_bar, completed=start_checked)
+                dash = {"start": time.time(), "checked": start_checked, "base": start_checked, "total": total_for_bar,
+                        "skipped": 0, "image": bundle, "label": label, "stream": stream}
+                found_event = Event()
+                exhausted = True
+                skipped = (lambda base=skipped_base: dedup.skipped - base) if dedup is not None else None
+                with Live(get_renderable=lambda: make_dashboard(bundle, label, dash), refresh_per_second=DASH_REFRESH,
+                          console=console), MetricsReporter(dash, progress, task, metrics, pool, skipped):
+                    if pool is not None or streamed:
+                        def on_checked(n, committed_pos, committed_n):
+                            dash["checked"] += n
+                            if ckpt_key is not None and committed_pos is not None:
+                                checkpoints.update(ckpt_key, committed_pos, start_checked + committed_n)
+
+                        on_verified = dedup.verified if dedup is not None else None
+                        if pool is not None:
+                            status, pwd = run_source_pooled(pool, backend, bundle, candidates, watcher, on_checked,
+                                                            on_verified, (target,))
+                        else:
+                            status, pwd = backend.attach_stream(bundle, candidates, watcher, on_checked, on_verified)
+                        if status == "quit":
+                            return "quit"
+                        if status == "skip_bundle":
+                            console.print("[yellow][!] Skipping bundle by request.[/yellow]")
+                            watcher.skip_bundle.clear()
+                            return "skipped_bundle"
+                        if status == "skip_file":
+                            console.print("[yellow][!] Skipping current source by request.[/yellow]")
+                            watcher.skip_file.clear()
+                            exhausted = False
+                        if status == "found":
+                            report_found(bundle, pwd, time.time() - run_start, backend, offline_only)
+                            return "found"
+                    else:
+                        for pwd, pos in candidates:
+                            if watcher.quit_all.is_set():
+                                return "quit"
+                            if watcher.skip_bundle.is_set():
+                                console.print("[yellow][!] Skipping bundle by request.[/yellow]")
+                                watcher.skip_bundle.clear()
+                                return "skipped_bundle"
+                            if watcher.skip_file.is_set():
+                                console.print("[yellow][!] Skipping current source by request.[/yellow]")
+                                watcher.skip_file.clear()
+                                exhausted = False
+                                break
+
+                            with stage("attempt"):
+                                status, ok = backend.attach(bundle, pwd, watcher, found_event)
+                            if status == "quit":
+                                return "quit"
+                            if status == "skip_bundle":
+                                console.print("[yellow][!] Skipping bundle by request.[/yellow]")
+                                watcher.skip_bundle.clear()
+                                return "skipped_bundle"
+                            if status == "skip_file":
+                                console.print("[yellow][!] Skipping current source by request.[/yellow]")
+                                watcher.skip_file.clear()
+                                exhausted = False
+                                break
+
+                            dash["checked"] += 1
+                            if dedup is not None:
+                                dedup.verified((pwd,))
+                            if ckpt_key is not None:
+                                checkpoints.update(ckpt_key, pos, dash["checked"])
+
+                            if ok:
+                                report_found(bundle, bytes(pwd), time.time() - run_start, backend, offline_only)
+                                return "found"
+
+                if dedup is not None:
+                    dash["skipped"] = dedup.skipped - skipped_base
+                    dedup.end_source()
+                    if dash["skipped"]:
+                        console.print(f"[blue][*] {os.path.basename(label)}: skipped {human_int(dash['skipped'])} "
+                                      f"duplicate candidates[/blue]")
+                if budget is not None and budget["hit"]:
+                    paused, exhausted = True, False
+                    limit = 0
+                elif limit is not None:
+                    limit = max(0, limit - (dash["checked"] - dash["base"]))
+                if exhausted and ckpt_key is not None:
+                    checkpoints.update(ckpt_key, source_end, dash["checked"], done=True)
+                processed[i] = True
+                bundle_checked += dash["checked"] - dash["base"]
+                i += 1
+                if paused:
+                    break
+    finally:
+        if pool is not None and own_pool:
+            pool.close()
+        if checkpoints is not None:
+            checkpoints.flush()
+        if dedup is not None and own_dedup:
+            dedup.save()
+
+    if paused:
+        return "paused"
+    if limit is not None:
+        return "no_match"
+    console.rule("[bold red]No Match")
+    console.print(f"[red][-] No match for {bundle}.[/red]")
+    return "no_match"
+
+
+# ---------- Multi-image pass ----------
+# One streaming pass over each wordlist feeds every pending image: a batch is
+# read, decoded and de-duplicated once, then checked against all images still
+# in the fan-out. Found or skipped images drop out of later batches.
+
+def run_source_fanout(pool: VerifierPool, backend: AttachBackend, targets: dict, starts: dict, candidates,
+                      watcher: InputWatcher, on_batch, on_commit, on_found, on_verified=None):
+    # targets: id -> per-image state ("image", "status", ...); starts: id -> resume offset in this source.
+    # returns ok / quit / skip_file; "b" drops the first pending image in run order
+    inflight, ends = {}, {}
+    order = collections.deque()
+    completed = set()
+    pending = iter(batched(candidates, pool.batch_size))
+    status = "ok"
+    confirm_stop = Event()
+    try:
+        while True:
+            live_targets = [t for t, st in targets.items() if st["status"] == "pending"]
+            if not live_targets and status == "ok":
+                status = "done"
+                pool.cancel.set()
+            while status == "ok" and pending is not None and len(inflight) < pool.max_inflight:
+                items = next(pending, None)
+                if items is None:
+                    pending = None
+                    break
+                end_pos = items[-1][1]
+                # images resuming further into this list skip the range they already covered
+                batch_targets = [t for t in live_targets if starts.get(t, 0) < end_pos]
+                if not batch_targets:
+                    continue
+                batch = [bytes(pwd) for pwd, _ in items]
+                batch_id = pool.submit(batch, batch_targets)
+                inflight[batch_id] = (batch, batch_targets)
+                ends[batch_id] = end_pos
+                order.append(batch_id)
+            if not inflight:
+                return "ok" if status == "done" else status
+            if status == "ok":
+                event = watcher_status(watcher)
+                if event == "skip_bundle":
+                    watcher.skip_bundle.clear()
+                    if live_targets:
+                        targets[live_targets[0]]["status"] = "skipped"
+                        console.print(f"[yellow][!] Dropping {targets[live_targets[0]]['image']} by request.[/yellow]")
+                elif event != "ok":
+                    status = event
+                    pool.cancel.set()
+            try:
+                batch_id, checked, hits = pool.get_result(POOL_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            entry = inflight.pop(batch_id, None)
+            if entry is None:
+                continue
+            batch, batch_targets = entry
+            # as in run_source_pooled, a batch with an unconfirmed hit stays behind the watermark
+            settled = checked == len(batch)
+            if settled:
+                on_batch(batch_targets, checked)
+            for t, j in hits:
+                if targets[t]["status"] != "pending":
+                    continue
+                if status != "ok":
+                    settled = False
+                    break
+                with stage("confirm"):
+                    confirm_status, ok = backend.confirm(targets[t]["image"], batch[j], watcher, confirm_stop)
+                if confirm_status == "skip_bundle":
+                    watcher.skip_bundle.clear()
+                    targets[t]["status"] = "skipped"
+                elif confirm_status != "ok":
+                    status = confirm_status
+                    settled = False
+                    pool.cancel.set()
+                elif ok:
+                    targets[t]["status"] = "found"
+                    targets[t]["pwd"] = batch[j]
+                    on_found(t)
+            if settled:
+                if on_verified is not None:
+                    on_verified(batch)
+                completed.add(batch_id)
+                committed = None
+                while order and order[0] in completed:
+                    done_id = order.popleft()
+                    completed.discard(done_id)
+                    committed = ends.pop(done_id)
+                if committed is not None:
+                    on_commit(committed)
+    finally:
+        while inflight:
+            try:
+                batch_id, _, _ = pool.get_result(POOL_JOIN_TIMEOUT)
+            except (queue.Empty, PoolError):
+                break
+            inflight.pop(batch_id, None)
+        pool.cancel.clear()
+
+
+def make_fanout_dashboard(label, dash, targets: dict):
+    elapsed = max(time.time() - dash["start"], 1)
+    tbl = Table(show_header=True, header_style="bold magenta", expand=True)
+    tbl.add_column("Image", style="cyan")
+    tbl.add_column("Status")
+    tbl.add_column("Checked", justify="right", style="green")
+    styles = {"pending": "white", "found": "bold green", "skipped": "yellow"}
+    for st in targets.values():
+        tbl.add_row(os.path.basename(st["image"]), f"[{styles[st['status']]}]{st['status']}",
+                    human_int(st["checked"]))
+    rate = dash["checked"] / elapsed
+    ewma = dash.get("ewma", 0.0)
+    todo = max(dash["total"] - dash["checked"] - dash["skipped"], 0)
+    eta = todo / (ewma or rate) if (ewma or rate) > 0 else 0
+    util = dash.get("utilization")
+    tuning = f"\n[white]Concurrency:[/white] {dash['tuning']}" if dash.get("tuning") else ""
+    head = (f"[yellow]Source:[/yellow] {os.path.basename(label)}   "
+            f"[green]Read:[/green] {human_int(dash['checked'] + dash['skipped'])} / {human_int(dash['total'])}   "
+            f"[magenta]Rate:[/magenta] {rate:.1f} cand/sec (recent {ewma:.1f})   "
+            f"[white]Duplicates skipped:[/white] {human_int(dash['skipped'])}   "
+            + (f"[white]Workers busy:[/white] {util * 100:.0f}%   " if util is not None else "")
+            + f"[blue]ETA:[/blue] {str(timedelta(seconds=int(eta)))}" + tuning)
+    return Panel(Group(head, tbl), title="Cracker Status (multi-image)", border_style="bold blue")
+
+
+def crack_many(bundles, sources, watcher: InputWatcher, workers: int = CPU_CORES,
+               backend: AttachBackend = None, interactive: bool = True, checkpoints: CheckpointStore = None,
+               resume: bool = False, dedup_settings: dict = None, rules: RuleSet = None,
+               metrics: MetricsExporter = None, fast_settings: dict = None):
+    backend = backend or default_backend()
+    console.rule("[bold green]Multi-image pass")
+    targets, leftovers = {}, []
+    for b in bundles:
+        verifier = backend.offline_verifier(b)
+        if verifier is None:
+            leftovers.append(b)
+            continue
+        targets[len(targets)] = {"image": b, "header": verifier.header, "id": image_identity(b),
+                                 "status": "pending", "checked": 0}
+    if targets:
+        console.print(f"[blue][*] {len(targets)} image(s) share one pass over each wordlist "
+                      f"({workers} worker processes)[/blue]")
+    if leftovers:
+        console.print(f"[yellow][!] {len(leftovers)} image(s) without an offline verifier run one by one afterwards.[/yellow]")
+
+    dedup = None
+    if dedup_settings is not None:
+        if dedup_settings.get("persist"):
+            console.print("[yellow][!] Dedup filters are not persisted in multi-image mode.[/yellow]")
+        # one shared filter: images only ever leave the fan-out, so a candidate seen once
+        # has been checked against every image still pending
+        dedup = CandidateDedup(BloomFilter(dedup_settings["capacity"], dedup_settings["fp_rate"]))
+
+    passes = list(sources)
+    if targets and fast_settings is not None:
+        # one fast lane from every image's metadata; each candidate is checked against all of them
+        lane = FastLane([st["image"] for st in targets.values()], **fast_settings)
+        passes.insert(0, lane)
+        iterations = max(st["header"]["iterations"] for st in targets.values())
+        console.print(f"[blue][*] {fast_lane_estimate(lane, iterations, workers)}[/blue]")
+
+    run_start = time.time()
+    quit_requested = False
+    pool = None
+    if targets:
+        pool = VerifierPool({t: st["header"] for t, st in targets.items()}, workers)
+        pool.start()
+    try:
+        for source in (passes if targets else []):
+            pending = [t for t, st in targets.items() if st["status"] == "pending"]
+            if not pending:
+                break
+            if watcher.quit_all.is_set():
+                quit_requested = True
+                break
+            keyspace, source_end = source_span(source, rules)
+            if keyspace <= 0:
+                continue
+            keys, starts = {}, {}
+            for t in pending:
+                if checkpoints is None:
+                    continue
+                keys[t] = checkpoint_key(targets[t]["id"], source, rules)
+                entry = checkpoints.get(keys[t]) if resume else None
+                if entry is not None:
+                    starts[t] = source_end if entry.get("done") else entry["offset"]
+            start = min(starts.get(t, 0) for t in pending)
+            if start >= source_end:
+                console.print(f"[dim]{source_label(source, rules)} was already exhausted for every pending image; skipping.[/dim]")
+                continue
+
+            stream = {}
+            candidates = profiled(source_candidates(source, start, rules, stream), "source")
+            skipped_base = 0
+            if dedup is not None and not isinstance(source, MaskSource):
+                candidates = profiled(dedup.filter(candidates), "dedup", inner="source")
+                skipped_base = dedup.skipped
+            label = source_label(source, rules)
+            console.print(f"[blue][*] Using source {label} ({human_int(keyspace)} entries) "
+                          f"for {len(pending)} image(s)[/blue]")
+            dash = {"start": time.time(), "checked": 0, "skipped": 0, "total": keyspace,
+                    "image": ",".join(st["image"] for st in targets.values()), "label": label, "stream": stream}
+            skipped = (lambda base=skipped_base: dedup.skipped - base) if dedup is not None else None
+
+            with Live(get_renderable=lambda: make_fanout_dashboard(label, dash, targets), refresh_per_second=DASH_REFRESH,
+                      console=console), MetricsReporter(dash, exporter=metrics, pool=pool, skipped=skipped):
+                def on_batch(batch_targets, n):
+                    dash["checked"] += n
+                    for t in batch_targets:
+                        targets[t]["checked"] += n
+
+                def on_commit(pos):
+                    for t, key in keys.items():
+                        if targets[t]["status"] == "pending" and starts.get(t, 0) <= pos:
+                            checkpoints.update(key, pos, targets[t]["checked"])
+
+                def on_found(t):
+                    st = targets[t]
+                    report_found(st["image"], st["pwd"], time.time() - run_start, backend, not backend.confirms(st["image"]))
+
+                status = run_source_fanout(pool, backend, targets, starts, candidates, watcher, on_batch, on_commit,
+                                           on_found, dedup.verified if dedup is not None else None)
+            if dedup is not None:
+                dedup.end_source()
+            if status == "quit":
+                quit_requested = True
+                break
+            if status == "skip_file":
+                console.print("[yellow][!] Skipping current source by request.[/yellow]")
+                watcher.skip_file.clear()
+                continue
+            for t, key in keys.items():
+                if targets[t]["status"] == "pending":
+                    checkpoints.update(key, source_end, targets[t]["checked"], done=True)
+    finally:
+        if pool is not None:
+            pool.close()
+        if checkpoints is not None:
+            checkpoints.flush()
+
+    outcome = {"found": "found", "skipped": "skipped_bundle", "pending": "quit" if quit_requested else "no_match"}
+    results = {st["image"]: outcome[st["status"]] for st in targets.values()}
+    for b in leftovers:
+        if watcher.quit_all.is_set():
+            results[b] = "quit"
+            continue
+        results[b] = crack_bundle(b, sources, 1, watcher, workers=workers, backend=backend,
+                                  interactive=interactive, checkpoints=checkpoints, resume=resume,
+                                  dedup_settings=dedup_settings, rules=rules, metrics=metrics,
+                                  fast_settings=fast_settings)
+
+    console.rule("[bold cyan]Multi-image Results")
+    tbl = Table(show_header=True, header_style="bold magenta")
+    tbl.add_column("Image", style="cyan")
+    tbl.add_column("Result")
+    for b in bundles:
+        tbl.add_row(b, results.get(b, "no_match"))
+    console.print(tbl)
+    return results
+
+
+# ---------- Scheduled runs ----------
+# A job file names the images and sources, and nothing is asked interactively.
+# Each (image, source) pair costs remaining candidates x seconds per candidate,
+# taken from the header's PBKDF2 iterations or an attach estimate, and is
+# ranked by cost / yield, i.e. expected time-to-hit. Images take turns in
+# slices of about slice_secs, least-served first, so one expensive image
+# cannot starve the rest, and each works through its own pairs cheapest-first.
+
+def load_job(path: str) -> dict:
+    with open(path, "r") as f:
+        job = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+
+    def resolve(pattern):
+        # relative paths are relative to the job file
+        return sorted(glob.glob(os.path.join(base, os.path.expanduser(pattern))))
+
+    images = []
+    for pattern in job.get("images", []):
+        found = resolve(pattern)
+        if not found:
+            console.print(f"[yellow][!] Job: no image matches {pattern}[/yellow]")
+        images.extend(p for p in found if p not in images)
+    if job.get("scan"):
+        roots = [os.path.join(base, os.path.expanduser(r)) for r in job["scan"]]
+        images.extend(p for p in scan_images(roots, IMAGES) if p not in images)
+    sources = []
+    for entry in job.get("sources", []):
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        weight = float(entry.get("yield", 1.0))
+        if weight <= 0:
+            raise ValueError(f"yield must be positive: {entry}")
+        if "mask" in entry:
+            custom = {str(k): v for k, v in entry.get("charset", {}).items()}
+            if any(k not in ("1", "2", "3", "4") for k in custom):
+                raise ValueError("custom charsets are numbered 1-4")
+            mask = MaskSource(entry["mask"], custom)
+            if "range" in entry:
+                a, _, b = str(entry["range"]).partition(":")
+                mask = mask.shard(int(a or 0), int(b) if b else mask.keyspace)
+            sources.append((mask, weight))
+        elif "merge" in entry:
+            lists = []
+            for item in entry["merge"]:
+                if isinstance(item, str):
+                    item = {"path": item}
+                found = resolve(item["path"])
+                if not found:
+                    raise ValueError(f"no wordlist matches {item['path']}")
+                lists.extend((p, float(item.get("weight", 1.0)), bool(item.get("counts", False))) for p in found)
+            sources.append((MergedSource(lists), weight))
+        elif "path" in entry:
+            found = resolve(entry["path"])
+            if not found:
+                raise ValueError(f"no wordlist matches {entry['path']}")
+            sources.extend((p, weight) for p in found)
+        else:
+            raise ValueError(f"source needs a path, a mask or a merge: {entry}")
+    rules = None
+    if job.get("rules"):
+        rules = RuleSet.load(os.path.join(base, os.path.expanduser(job["rules"])))
+    fast = None
+    if job.get("fast_lane", True):
+        fast = {"hints": os.path.join(base, os.path.expanduser(job["hints"])) if job.get("hints") else None}
+        if fast["hints"] is not None and not os.path.isfile(fast["hints"]):
+            raise ValueError(f"no hints file {job['hints']}")
+    return {"images": images, "sources": sources, "rules": rules, "fast": fast,
+            "slice_secs": float(job.get("slice_secs", SCHED_SLICE_SECS)), "resume": bool(job.get("resume", True))}
+
+
+def kdf_seconds_per_iteration(iterations: int = SCHED_CALIBRATE_ITERATIONS) -> float:
+    t0 = time.perf_counter()
+    hashlib.pbkdf2_hmac("sha1", b"calibrate", bytes(20), iterations, 24)
+    return (time.perf_counter() - t0) / iterations
+
+
+def pair_priority(image: dict, pair: dict) -> float:
+    return pair["left"] * image["cost"] / pair["yield"]
+
+
+def plan_schedule(job: dict, backend: AttachBackend, checkpoints: CheckpointStore, workers: int):
+    rules = job["rules"]
+    per_iteration = kdf_seconds_per_iteration()
+    images = {}
+    for image in job["images"]:
+        verifier = backend.offline_verifier(image)
+        if verifier is None and not backend.can_attempt(image):
+            console.print(f"[red][-] {image}: no offline verifier and hdiutil is not available; skipping.[/red]")
+            continue
+        if verifier is not None:
+            # refined from the measured rate after the image's first slice
+            cost = verifier.iterations * per_iteration / max(1, min(workers, CPU_CORES))
+        else:
+            cost = SCHED_ATTACH_SECS
+        image_id = image_identity(image)
+        pairs = []
+        sources = job["sources"]
+        if job.get("fast") is not None:
+            sources = [(FastLane([image], **job["fast"]), FAST_LANE_YIELD)] + sources
+        for source, weight in sources:
+            keyspace, _ = source_span(source, rules)
+            key = checkpoint_key(image_id, source, rules)
+            entry = checkpoints.get(key) if job["resume"] else None
+            if entry is not None and entry.get("done"):
+                continue
+            left = keyspace - (entry["checked"] if entry is not None else 0)
+            if left > 0:
+                pairs.append({"source": source, "key": key, "yield": weight, "left": left, "started": False})
+        images[image] = {"verifier": verifier, "id": image_id, "target": len(images), "cost": cost,
+                         "pairs": pairs, "spent": 0.0, "status": "pending" if pairs else "no_match"}
+    return images
+
+
+def show_schedule(images: dict, rules: RuleSet = None):
+    tbl = Table(show_header=True, header_style="bold magenta", title="Schedule")
+    tbl.add_column("Image", style="white")
+    tbl.add_column("Check", style="cyan")
+    tbl.add_column("Per candidate", justify="right")
+    tbl.add_column("Candidates left", justify="right")
+    tbl.add_column("Est. total", justify="right", style="green")
+    tbl.add_column("First source", style="white")
+    ranked = sorted(images.items(), key=lambda kv: min((pair_priority(kv[1], p) for p in kv[1]["pairs"]),
+                                                       default=float("inf")))
+    for image, st in ranked:
+        left = sum(p["left"] for p in st["pairs"])
+        check = f"PBKDF2 {human_int(st['verifier'].iterations)}" if st["verifier"] is not None else "hdiutil"
+        first = min(st["pairs"], key=lambda p: pair_priority(st, p), default=None)
+        tbl.add_row(os.path.basename(image), check, f"{st['cost'] * 1000:.2f} ms", human_int(left),
+                    str(timedelta(seconds=int(left * st["cost"]))),
+                    source_label(first["source"], rules) if first is not None else "(nothing left)")
+    console.print(tbl)
+
+
+def run_schedule(job: dict, watcher: InputWatcher, workers: int = CPU_CORES,
+                 backend: AttachBackend = None, checkpoints: CheckpointStore = None, dedup_settings: dict = None,
+                 metrics: MetricsExporter = None):
+    backend = backend or default_backend()
+    checkpoints = checkpoints or CheckpointStore(os.path.join(STATE_DIR, CHECKPOINT_FILE))
+    rules, slice_secs = job["rules"], job["slice_secs"]
+    images = plan_schedule(job, backend, checkpoints, workers)
+    show_schedule(images, rules)
+
+    pool = None
+    headers = {st["target"]: st["verifier"].header for st in images.values() if st["verifier"] is not None}
+    if headers and workers > 1:
+        # one pool for the whole run; each slice only submits its own image as the target
+        pool = VerifierPool(headers, workers)
+        pool.start()
+        console.print(f"[blue][*] Verifying with {workers} worker processes[/blue]")
+    # a slice below one batch per worker would leave workers idle and skew the measured rate
+    min_slice = pool.batch_size * pool.workers if pool is not None else 1
+    dedups = {}
+    try:
+        while not watcher.quit_all.is_set():
+            live = [img for img, st in images.items() if st["status"] == "pending"]
+            if not live:
+                break
+            image = min(live, key=lambda img: (images[img]["spent"],
+                                               min(pair_priority(images[img], p) for p in images[img]["pairs"])))
+            st = images[image]
+            pair = min(st["pairs"], key=lambda p: pair_priority(st, p))
+            if dedup_settings is not None and image not in dedups:
+                dedups[image] = open_dedup(st["id"], **dedup_settings)
+            before = checkpoints.get(pair["key"]) if (job["resume"] or pair["started"]) else None
+            before = before["checked"] if before is not None else 0
+            t0 = time.time()
+            status = crack_bundle(image, [pair["source"]], 1, watcher, workers=workers,
+                                  backend=backend, interactive=False, checkpoints=checkpoints,
+                                  resume=job["resume"] or pair["started"], rules=rules, metrics=metrics, pool=pool,
+                                  target=st["target"], limit=max(min_slice, int(slice_secs / st["cost"])),
+                                  dedup=dedups.get(image))
+            secs = time.time() - t0
+            st["spent"] += secs
+            pair["started"] = True
+            entry = checkpoints.get(pair["key"]) or {"checked": before, "done": False}
+            done_now = entry["checked"] - before
+            if done_now > 0:
+                st["cost"] = secs / done_now
+            pair["left"] = max(0, pair["left"] - done_now)
+            if status == "quit":
+                break
+            if status == "found":
+                st["status"] = "found"
+            elif status == "skipped_bundle":
+                st["status"] = "skipped"
+            elif status == "no_match" or entry.get("done") or pair["left"] == 0:
+                st["pairs"].remove(pair)
+                if not st["pairs"]:
+                    st["status"] = "no_match"
+                    console.print(f"[red][-] No match for {image}.[/red]")
+    finally:
+        if pool is not None:
+            pool.close()
+        checkpoints.flush()
+        for dedup in dedups.values():
+            dedup.save()
+
+    console.rule("[bold cyan]Schedule results")
+    tbl = Table(show_header=True, header_style="bold magenta")
+    tbl.add_column("Image", style="white")
+    tbl.add_column("Result")
+    tbl.add_column("Time spent", justify="right")
+    for image, st in images.items():
+        tbl.add_row(os.path.basename(image), st["status"], str(timedelta(seconds=int(st["spent"]))))
+    console.print(tbl)
+    return {image: st["status"] for image, st in images.items()}
+
+
+# ---------- Distributed search ----------
+# A coordinator owns one image's header and splits its sources into work units
+# (wordlist byte ranges cut at line breaks, or mask index ranges). Workers lease
+# units over plain HTTP + JSON, verify them with their local pool and heartbeat
+# progress; a lease that stops heartbeating is handed to the next worker. Hits
+# are checked and attached on the coordinator's confirm thread while the worker
+# polls for the verdict; the first confirmed hit sets a stop flag that every
+# later response carries, and a rejected one lets the worker finish its unit.
+
+def header_to_json(header: dict) -> dict:
+    return {k: (v.hex() if isinstance(v, bytes) else v) for k, v in header.items()}
+
+
+def header_from_json(data: dict) -> dict:
+    return {k: (bytes.fromhex(v) if k in ("salt", "iv", "keyblob") else v) for k, v in data.items()}
+
+
+class Coordinator:
+    def __init__(self, image, verifier: EncrcdsaVerifier, sources, backend: AttachBackend, rules: RuleSet = None,
+                 unit_candidates: int = DIST_UNIT_CANDIDATES, lease_secs: float = DIST_LEASE_SECS):
+        self.image = image
+        self.verifier = verifier
+        self.sources = list(sources)
+        self.backend = backend
+        self.rules = rules
+        self.lease_secs = lease_secs
+        self.units = []
+        self.total = 0
+        for si, source in enumerate(self.sources):
+            self._split(si, source, unit_candidates)
+        self.lock = threading.Lock()
+        self.stop = Event()
+        self.found = None
+        self.reissued = 0
+        self.seen = {}
+        self.hits = {}
+        self.confirms = queue.Queue()
+
+    def _add(self, si: int, kind: str, start: int, stop: int):
+        self.units.append({"id": len(self.units), "source": si, "kind": kind, "start": start, "stop": stop,
+                           "state": "pending", "worker": None, "deadline": 0.0, "checked": 0})
+
+    def _split(self, si: int, source, per_unit: int):
+        if isinstance(source, MergedSource) or is_compressed(source):
+            # a merge order or a compressed stream can only be read front to back, not cut into ranges
+            console.print(f"[yellow][!] {source_label(source)} cannot be split into work units; skipping it.[/yellow]")
+            return
+        keyspace, end = source_span(source, self.rules)
+        self.total += keyspace
+        if isinstance(source, MaskSource):
+            for a in range(source.start, source.stop, per_unit):
+                self._add(si, "mask", a, min(a + per_unit, source.stop))
+            return
+        if keyspace <= 0:
+            return
+        # cut every ~per_unit candidates, moved forward to the next line break
+        words_per_unit = max(1, per_unit // (len(self.rules) if self.rules is not None else 1))
+        step = max(1, end * words_per_unit // max(1, wordlist_index(source).lines))
+        with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            a = 0
+            while a < end:
+                nl = mm.find(b"\n", min(a + step, end) - 1)
+                b = end if nl < 0 else nl + 1
+                self._add(si, "wordlist", a, b)
+                a = b
+
+    def job(self) -> dict:
+        return {"image": os.path.basename(os.path.normpath(self.image)), "header": header_to_json(self.verifier.header),
+                "rules": self.rules.lines if self.rules is not None else None, "stop": self.stop.is_set()}
+
+    def has_unit(self, unit_id, kind: str = None) -> bool:
+        if type(unit_id) is not int or not 0 <= unit_id < len(self.units):
+            return False
+        return kind is None or self.units[unit_id]["kind"] == kind
+
+    def unit_data(self, unit_id: int) -> bytes:
+        u = self.units[unit_id]
+        with open(self.sources[u["source"]], "rb") as f:
+            f.seek(u["start"])
+            return f.read(u["stop"] - u["start"])
+
+    def lease(self, worker: str) -> dict:
+        with self.lock:
+            now = time.monotonic()
+            self.seen[worker] = now
+            if self.stop.is_set():
+                return {"stop": True}
+            for u in self.units:
+                if u["state"] == "leased" and u["deadline"] < now:
+                    u.update(state="pending", worker=None, checked=0)
+                    self.reissued += 1
+            for u in self.units:
+                if u["state"] == "pending":
+                    u.update(state="leased", worker=worker, deadline=now + self.lease_secs, checked=0)
+                    spec = {"id": u["id"], "kind": u["kind"], "start": u["start"], "stop": u["stop"]}
+                    if u["kind"] == "mask":
+                        src = self.sources[u["source"]]
+                        spec.update(mask=src.mask, custom=src.custom)
+                    return {"unit": spec}
+            if all(u["state"] == "done" for u in self.units):
+                return {"stop": True}
+            return {"wait": DIST_IDLE_WAIT}
+
+    def progress(self, worker: str, unit_id: int, checked: int) -> dict:
+        with self.lock:
+            now = time.monotonic()
+            self.seen[worker] = now
+            u = self.units[unit_id]
+            if u["state"] != "leased" or u["worker"] != worker:
+                # the lease ran out and went to someone else
+                return {"stop": self.stop.is_set(), "lost": True}
+            u["checked"] = checked
+            u["deadline"] = now + self.lease_secs
+            return {"stop": self.stop.is_set()}
+
+    def done(self, worker: str, unit_id: int, checked: int) -> dict:
+        with self.lock:
+            self.seen[worker] = time.monotonic()
+            u = self.units[unit_id]
+            if u["state"] != "done":
+                u.update(state="done", worker=worker, checked=checked)
+            return {"stop": self.stop.is_set()}
+
+    def hit(self, worker: str, unit_id: int, pwd: bytes) -> dict:
+        # answered at once: the check and the confirming attach run on confirm_loop, and the
+        # worker asks again until the verdict is in
+        key = pwd.hex()
+        with self.lock:
+            now = time.monotonic()
+            self.seen[worker] = now
+            u = self.units[unit_id]
+            if u["state"] == "leased" and u["worker"] == worker:
+                u["deadline"] = now + self.lease_secs
+            state = self.hits.get(key)
+            if state is None:
+                state = self.hits[key] = "pending"
+                self.confirms.put((pwd, worker))
+            if state == "pending":
+                return {"stop": self.stop.is_set(), "pending": True}
+            return {"stop": self.stop.is_set(), "accepted": state == "accepted"}
+
+    def confirm_loop(self, watcher: InputWatcher):
+        while True:
+            item = self.confirms.get()
+            if item is None:
+                return
+            pwd, worker = item
+            ok = self.verifier.check(pwd)
+            while ok:
+                with stage("confirm"):
+                    status, ok = self.backend.confirm(self.image, pwd, watcher, self.stop)
+                if status not in ("skip_file", "skip_bundle"):
+                    ok = ok and status == "ok"
+                    break
+                # there is no current file or image to skip here; only q (or a found password) stops a confirm
+                watcher.skip_file.clear()
+                watcher.skip_bundle.clear()
+            with self.lock:
+                self.hits[pwd.hex()] = "accepted" if ok else "rejected"
+                if ok and self.found is None:
+                    self.found = (pwd, worker)
+                    self.stop.set()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            now = time.monotonic()
+            return {
+                "checked": sum(u["checked"] for u in self.units),
+                "units_done": sum(1 for u in self.units if u["state"] == "done"),
+                "workers": sum(1 for t in self.seen.values() if now - t < 3 * DIST_HEARTBEAT + DIST_IDLE_WAIT),
+            }
+
+
+class _CoordinatorHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: bytes, ctype: str = "application/json", code: int = 200):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code: int, message: str):
+        self._send(json.dumps({"error": message}).encode(), code=code)
+
+    def do_GET(self):
+        coord = self.server.coordinator
+        if self.path == "/job":
+            return self._send(json.dumps(coord.job()).encode())
+        if self.path.startswith("/data/"):
+            unit_id = self.path[6:]
+            if not unit_id.isdigit():
+                return self._error(400, "bad unit id")
+            if not coord.has_unit(int(unit_id), "wordlist"):
+                return self._error(404, "no such wordlist unit")
+            return self._send(coord.unit_data(int(unit_id)), "application/octet-stream")
+        self._error(404, "not found")
+
+    def do_POST(self):
+        coord = self.server.coordinator
+        try:
+            req = json.loads(self.rfile.read(max(0, int(self.headers.get("Content-Length", 0)))) or b"{}")
+            worker = str(req.get("worker", "?"))
+            if self.path == "/lease":
+                reply = coord.lease(worker)
+            elif self.path in ("/progress", "/done", "/hit"):
+                if not coord.has_unit(req["unit"]):
+                    return self._error(404, "no such unit")
+                if self.path == "/progress":
+                    reply = coord.progress(worker, req["unit"], int(req["checked"]))
+                elif self.path == "/done":
+                    reply = coord.done(worker, req["unit"], int(req["checked"]))
+                else:
+                    reply = coord.hit(worker, req["unit"], bytes.fromhex(req["password"]))
+            else:
+                return self._error(404, "not found")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            # malformed JSON, a body that is not an object, a missing key or a bad value
+            return self._error(400, f"bad request: {e!r}")
+        self._send(json.dumps(reply).encode(), code=202 if reply.get("pending") else 200)
+
+
+def serve_coordinator(coord: Coordinator, host: str, port: int, watcher: InputWatcher) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _CoordinatorHandler)
+    server.daemon_threads = True
+    server.coordinator = coord
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=coord.confirm_loop, args=(watcher,), daemon=True).start()
+    return server
+
+
+def close_coordinator(coord: Coordinator, server: ThreadingHTTPServer):
+    coord.confirms.put(None)
+    server.shutdown()
+    server.server_close()
+
+
+def run_coordinator(image, sources, address: str, watcher: InputWatcher, backend: AttachBackend = None,
+                    rules: RuleSet = None, unit_candidates: int = DIST_UNIT_CANDIDATES,
+                    lease_secs: float = DIST_LEASE_SECS):
+    backend = backend or default_backend()
+    console.rule(f"[bold green]Coordinating: {image}")
+    verifier = backend.offline_verifier(image)
+    if verifier is None:
+        console.print(f"[red][-] {image}: distributed mode needs an image with an offline verifier.[/red]")
+        return "skipped_bundle"
+    coord = Coordinator(image, verifier, sources, backend, rules, unit_candidates, lease_secs)
+    host, _, port = address.rpartition(":")
+    host = host or DIST_DEFAULT_HOST
+    if not host.startswith("127.") and host != "localhost":
+        # anyone who can reach the port can read the wordlists through /data
+        console.print(f"[yellow][!] Serving on {host} without authentication; only do this on a trusted network.[/yellow]")
+    server = serve_coordinator(coord, host, int(port), watcher)
+    public = socket.gethostname() if host == "0.0.0.0" else host
+    console.print(f"[blue][*] {human_int(coord.total)} candidates in {human_int(len(coord.units))} units; "
+                  f"workers connect with --worker http://{public}:{server.server_address[1]}[/blue]")
+
+    run_start = time.time()
+    dash = {"start": run_start, "checked": 0, "total": coord.total, "units": len(coord.units)}
+    label = f"{len(coord.sources)} source(s), distributed"
+    result = "no_match"
+    try:
+        with Live(make_dashboard(image, label, dash), refresh_per_second=4, console=console) as live:
+            while True:
+                dash.update(coord.snapshot())
+                live.update(make_dashboard(image, label, dash))
+                if coord.found is not None:
+                    result = "found"
+                    break
+                if dash["units_done"] == len(coord.units):
+                    break
+                if watcher.quit_all.is_set():
+                    result = "quit"
+                    break
+                coord.stop.wait(0.25)
+        coord.stop.set()
+        if coord.found is not None:
+            pwd, worker = coord.found
+            console.print(f"[green][+] Hit reported by {worker}[/green]")
+            report_found(image, pwd, time.time() - run_start, backend, not backend.confirms(image))
+        elif result == "no_match":
+            console.rule("[bold red]No Match")
+            console.print(f"[red][-] No match for {image}.[/red]")
+        if coord.reissued:
+            console.print(f"[yellow][!] {coord.reissued} expired lease(s) were re-issued.[/yellow]")
+        # let polling workers pick up the stop flag before the server goes away
+        time.sleep(DIST_STOP_GRACE)
+    finally:
+        close_coordinator(coord, server)
+    return result
+
+
+def _dist_call(url: str, path: str, payload: dict = None, timeout: float = 30.0):
+    data = None if payload is None else json.dumps(payload).encode()
+    req = urllib.request.Request(url.rstrip("/") + path, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        body = resp.read()
+    return body if path.startswith("/data/") else json.loads(body)
+
+
+class CoordinatorBackend(AttachBackend):
+    # a worker's confirming backend: hits go to the coordinator, which holds the image
+    name = "coordinator"
+
+    def __init__(self, url: str, worker: str):
+        self.url = url
+        self.worker = worker
+        self.unit = None
+
+    def _ask(self, pwd_bytes: bytes) -> dict:
+        return _dist_call(self.url, "/hit", {"worker": self.worker, "unit": self.unit, "password": bytes(pwd_bytes).hex()})
+
+    def attach(self, image_path, pwd_bytes: bytes, watcher: InputWatcher, stop_event: Event):
+        while True:
+            r = self._ask(pwd_bytes)
+            if not r.get("pending"):
+                return ("ok", bool(r.get("accepted")))
+            # the heartbeat keeps the lease alive meanwhile and sets quit_all on a lost lease or a stop
+            deadline = time.monotonic() + DIST_IDLE_WAIT
+            while time.monotonic() < deadline:
+                status = watcher_status(watcher)
+                if status == "ok" and stop_event.is_set():
+                    status = "stopped"
+                if status != "ok":
+                    # the stop may be this very hit being accepted
+                    if self._ask(pwd_bytes).get("accepted"):
+                        return ("ok", True)
+                    return ("ok", False) if status == "stopped" else (status, False)
+                time.sleep(ATTACH_POLL_INTERVAL)
+
+
+def run_worker(url: str, workers: int = CPU_CORES, name: str = None):
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    deadline = time.monotonic() + DIST_CONNECT_WAIT
+    while True:
+        try:
+            job = _dist_call(url, "/job")
+            break
+        except OSError as e:
+            if time.monotonic() > deadline:
+                console.print(f"[red][-] No coordinator at {url}: {e}[/red]")
+                return "unreachable"
+            time.sleep(DIST_IDLE_WAIT)
+    header = header_from_json(job["header"])
+    rules = RuleSet(job["rules"], "coordinator rules") if job.get("rules") else None
+    confirm = CoordinatorBackend(url, name)
+    backend = VerifierBackend(confirm)
+    pool = VerifierPool({0: header}, workers)
+    pool.start()
+    console.print(f"[blue][*] Worker {name}: {job['image']} from {url} ({workers} worker processes)[/blue]")
+    checked_total, units_done, result = 0, 0, "stopped"
+    try:
+        while True:
+            reply = _dist_call(url, "/lease", {"worker": name})
+            if reply.get("stop"):
+                break
+            if "unit" not in reply:
+                time.sleep(reply.get("wait", DIST_IDLE_WAIT))
+                continue
+            unit = reply["unit"]
+            confirm.unit = unit["id"]
+            if unit["kind"] == "mask":
+                candidates = MaskSource(unit["mask"], unit["custom"], unit["start"], unit["stop"]).iter()
+            else:
+                candidates = iter_lines_buffer(_dist_call(url, f"/data/{unit['id']}"), unit["start"])
+                if rules is not None:
+                    candidates = rules.expand(candidates, unit["start"])
+
+            watcher = InputWatcher()
+            progress = {"checked": 0}
+            beat_stop = Event()
+
+            def heartbeat():
+                while not beat_stop.wait(DIST_HEARTBEAT):
+                    try:
+                        r = _dist_call(url, "/progress", {"worker": name, "unit": unit["id"],
+                                                          "checked": progress["checked"]})
+                    except OSError:
+                        continue
+                    if r.get("stop") or r.get("lost"):
+                        watcher.quit_all.set()
+                        return
+
+            def on_checked(n, _pos, _committed):
+                progress["checked"] += n
+
+            beat = threading.Thread(target=heartbeat, daemon=True)
+            beat.start()
+            try:
+                status, pwd = run_source_pooled(pool, backend, job["image"], candidates, watcher, on_checked)
+            finally:
+                beat_stop.set()
+                beat.join()
+            checked_total += progress["checked"]
+            if status == "found":
+                # confirmed by the coordinator; a rejected hit just lets the unit run on to /done
+                console.print(f"[green][+] Found in unit {unit['id']}: {pwd!r}[/green]")
+                result = "found"
+                break
+            elif status == "ok":
+                units_done += 1
+                if _dist_call(url, "/done", {"worker": name, "unit": unit["id"], "checked": progress["checked"]}).get("stop"):
+                    break
+            # otherwise the coordinator stopped us or the lease moved on; ask again
+    except OSError as e:
+        console.print(f"[yellow][!] Coordinator at {url} went away: {e}[/yellow]")
+    except PoolError as e:
+        console.print(f"[red][-] {e}[/red]")
+        result = "error"
+    finally:
+        pool.close()
+    console.print(f"[blue][*] Worker {name}: {human_int(units_done)} units, {human_int(checked_total)} candidates checked[/blue]")
+    return result
+
+
+# ---------- Benchmarks ----------
+
+def bench_kdf(lanes: int, iterations: int):
+    if np is None:
+        console.print("[red]The numpy KDF benchmark needs numpy installed.[/red]")
+        return False
+    salt = os.urandom(20)
+    batch = [f"bench{i}".encode() for i in range(lanes)]
+
+    t0 = time.perf_counter()
+    keys = pbkdf2_hmac_sha1_batch(batch, salt, iterations, 24)
+    numpy_secs = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    expected = [hashlib.pbkdf2_hmac("sha1", pwd, salt, iterations, 24) for pwd in batch]
+    hashlib_secs = time.perf_counter() - t0
+
+    mismatches = sum(1 for j, key in enumerate(expected) if keys[j].tobytes() != key)
+    tbl = Table(show_header=True, header_style="bold magenta", title=f"PBKDF2-HMAC-SHA1, {human_int(iterations)} iterations")
+    tbl.add_column("Engine", style="cyan")
+    tbl.add_column("Lanes", justify="right")
+    tbl.add_column("Seconds", justify="right")
+    tbl.add_column("Candidates/sec", justify="right", style="green")
+    tbl.add_row("numpy", human_int(lanes), f"{numpy_secs:.3f}", f"{lanes / numpy_secs:,.1f}")
+    tbl.add_row("hashlib", human_int(lanes), f"{hashlib_secs:.3f}", f"{lanes / hashlib_secs:,.1f}")
+    console.print(tbl)
+    if mismatches:
+        console.print(f"[red][-] numpy engine disagrees with hashlib on {mismatches} of {lanes} lanes.[/red]")
+        return False
+    console.print(f"[green][+] numpy engine matches hashlib on all {lanes} lanes.[/green]")
+    return True
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def write_synthetic_wordlist(path: str, lines: int, hit: bytes = None):
+    with open(path, "wb") as f:
+        for k in range(0, lines, 1 << 16):
+            f.write(b"".join(b"cand%010d\n" % i for i in range(k, min(lines, k + (1 << 16)))))
+        if hit is not None:
+            f.write(hit + b"\n")
+
+
+def _run_headless(image, sources, backend, watcher, workers: int = 1):
+    was_quiet = console.quiet
+    console.quiet = True
+    try:
+        t0 = time.perf_counter()
+        result = crack_bundle(image, sources, 1, watcher, workers=workers, backend=backend, interactive=False)
+        return result, time.perf_counter() - t0
+    finally:
+        console.quiet = was_quiet
+
+
+def bench_e2e(lines: int, latency: float, jitter: float = 0.0):
+    hit = b"bench-hit"
+    with tempfile.TemporaryDirectory(prefix="cracker-bench-") as tmp:
+        image = os.path.join(tmp, "bench.sparsebundle")
+        os.makedirs(image)
+        wordlist = os.path.join(tmp, "bench.txt")
+        write_synthetic_wordlist(wordlist, lines, hit)
+
+        backend = FakeBackend(password=hit, latency=latency, jitter=jitter)
+        result, secs = _run_headless(image, [wordlist], backend, InputWatcher())
+
+        # cancellation: hang the attempt halfway through and skip the bundle once it hangs
+        hanger = FakeBackend(password=None, latency=latency, hang_on={max(1, lines // 2)})
+        watcher = InputWatcher()
+        fired = {}
+
+        def fire():
+            hanger.hanging.wait()
+            fired["at"] = time.perf_counter()
+            watcher.skip_bundle.set()
+
+        threading.Thread(target=fire, daemon=True).start()
+        cancel_result, _ = _run_headless(image, [wordlist], hanger, watcher)
+        cancel_secs = time.perf_counter() - fired.get("at", time.perf_counter())
+
+    lat = backend.latencies
+    tbl = Table(show_header=True, header_style="bold magenta",
+                title=f"End-to-end candidate loop (fake backend, {latency * 1000:.1f} ms latency)")
+    tbl.add_column("Metric", style="cyan")
+    tbl.add_column("Value", justify="right", style="green")
+    tbl.add_row("Result", f"{result} / {cancel_result}")
+    tbl.add_row("Candidates", human_int(backend.attempts))
+    tbl.add_row("Candidates/sec", f"{backend.attempts / max(secs, 1e-9):,.1f}")
+    for q in (50, 90, 99):
+        tbl.add_row(f"Attempt latency p{q}", f"{percentile(lat, q) * 1000:.2f} ms")
+    tbl.add_row("Loop overhead / candidate", f"{max(0.0, secs - sum(lat)) / max(1, len(lat)) * 1e6:.1f} us")
+    tbl.add_row("Cancellation latency", f"{cancel_secs * 1000:.1f} ms")
+    console.print(tbl)
+    return result == "found" and cancel_result == "skipped_bundle"
+
+
+FAKE_HDIUTIL = """#!/bin/sh
+# stand-in for hdiutil. attach: read the password, take a while, succeed only on the expected one and
+# mount it as /dev/disk<pid>. info -plist / detach work on the mounts listed in $FAKE_HDIUTIL_STATE.
+state="$FAKE_HDIUTIL_STATE"
+case "$1" in
+info)
+    echo '<plist version="1.0"><dict><key>images</key><array>'
+    [ -f "$state" ] && while read -r dev img; do
+        echo "<dict><key>image-path</key><string>$img</string><key>system-entities</key><array>"
+        echo "<dict><key>dev-entry</key><string>$dev</string></dict></array></dict>"
+    done < "$state"
+    echo '</array></dict></plist>'
+    ;;
+detach)
+    for dev; do :; done
+    grep -q "^$dev " "$state" 2>/dev/null || exit 1
+    grep -v "^$dev " "$state" > "$state.$$"; mv "$state.$$" "$state"
+    ;;
+*)
+    IFS= read -r pwd
+    sleep "$FAKE_HDIUTIL_LATENCY" > /dev/null  # not holding our stdout pipe open once sh is terminated
+    [ "$pwd" = "$FAKE_HDIUTIL_PASSWORD" ] || exit 1
+    echo "/dev/disk$$ $2" >> "$state"
+    echo '<plist version="1.0"><dict><key>system-entities</key><array>'
+    echo "<dict><key>dev-entry</key><string>/dev/disk$$</string></dict>"
+    echo "<dict><key>dev-entry</key><string>/dev/disk$$s1</string></dict></array></dict></plist>"
+    ;;
+esac
+"""
+
+
+def bench_attach(lines: int, latency: float, inflight: int):
+    hit = b"bench-hit"
+    saved = {k: os.environ.get(k) for k in ("FAKE_HDIUTIL_LATENCY", "FAKE_HDIUTIL_PASSWORD", "FAKE_HDIUTIL_STATE")}
+    os.environ["FAKE_HDIUTIL_LATENCY"] = f"{latency:.4f}"
+    os.environ["FAKE_HDIUTIL_PASSWORD"] = hit.decode()
+    rows, ok = [], True
+    try:
+        with tempfile.TemporaryDirectory(prefix="cracker-bench-") as tmp:
+            script = os.path.join(tmp, "hdiutil")
+            with open(script, "w") as f:
+                f.write(FAKE_HDIUTIL)
+            os.chmod(script, 0o755)
+            os.environ["FAKE_HDIUTIL_STATE"] = os.path.join(tmp, "mounts")
+            image = os.path.join(tmp, "bench.dmg")
+            open(image, "wb").close()
+            wordlist = os.path.join(tmp, "bench.txt")
+            write_synthetic_wordlist(wordlist, lines, hit)
+
+            for n in sorted({1, max(1, inflight)}):
+                backend = HdiutilBackend(inflight=n, hdiutil=script)
+                result, secs = _run_headless(image, [wordlist], backend, InputWatcher())
+                ok = ok and result == "found"
+                per = secs / (lines + 1)
+                rows.append((f"{n} in flight", result, f"{(lines + 1) / secs:,.1f}", f"{max(0.0, per - latency / n) * 1000:.2f} ms"))
+
+            # cancellation: skip the bundle while a full set of slow attempts is running
+            slow = HdiutilBackend(inflight=max(1, inflight), hdiutil=script)
+            os.environ["FAKE_HDIUTIL_LATENCY"] = "30"
+            watcher = InputWatcher()
+            fired = {}
+
+            def fire():
+                time.sleep(0.5)
+                fired["at"] = time.perf_counter()
+                watcher.skip_bundle.set()
+
+            threading.Thread(target=fire, daemon=True).start()
+            cancel_result, _ = _run_headless(image, [wordlist], slow, watcher)
+            cancel_secs = time.perf_counter() - fired.get("at", time.perf_counter())
+            ok = ok and cancel_result == "skipped_bundle"
+            # every hit was mounted once; each should have been detached by device node
+            slow.sweep()
+            leftover = hdiutil_mounts(script)
+            ok = ok and not leftover
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+    tbl = Table(show_header=True, header_style="bold magenta",
+                title=f"hdiutil attempts against a fake hdiutil ({latency * 1000:.0f} ms per attach)")
+    tbl.add_column("Engine", style="cyan")
+    tbl.add_column("Result")
+    tbl.add_column("Attempts/sec", justify="right", style="green")
+    tbl.add_column("Overhead / attempt", justify="right")
+    for row in rows:
+        tbl.add_row(*row)
+    tbl.add_row(f"cancel {max(1, inflight)} in flight", cancel_result, "", f"{cancel_secs * 1000:.1f} ms")
+    tbl.add_row("mounts left after run", "none" if not leftover else ", ".join(dev for _, dev in leftover), "", "")
+    console.print(tbl)
+    return ok
+
+
+BENCH_RULES = [":", "l", "u", "c", "t", "r", "d", "c $1", "c $1 $2 $3", "$2 $0 $2 $4", "$2 $0 $2 $5", "$!",
+               "^1", "sa@ se3 si1 so0 ss$", "c sa@ so0 $!", "T0 T2", "D0", "]", "p1", "E $1"]
+
+
+def bench_rules(lines: int, iterations: int, rules_path: str = None):
+    rules = RuleSet.load(rules_path) if rules_path else RuleSet(BENCH_RULES, "bench")
+    with tempfile.TemporaryDirectory(prefix="cracker-bench-") as tmp:
+        wordlist = os.path.join(tmp, "bench.txt")
+        write_synthetic_wordlist(wordlist, lines)
+
+        t0 = time.perf_counter()
+        produced = 0
+        for batch in batched(rules.expand(iter_lines_mmap(wordlist)), POOL_BATCH_SIZE):
+            produced += len(batch)
+        stream_secs = time.perf_counter() - t0
+
+        words = [bytes(w) for w, _ in iter_lines_mmap(wordlist)]
+        t0 = time.perf_counter()
+        flat = 0
+        for k in range(0, len(words), 1024):
+            flat += len(rules.expand_batch(words[k:k + 1024]))
+        batch_secs = time.perf_counter() - t0
+
+    # what the verifiers can take: one PBKDF2 per candidate on every core
+    salt = os.urandom(20)
+    t0 = time.perf_counter()
+    for j in range(8):
+        hashlib.pbkdf2_hmac("sha1", b"bench%d" % j, salt, iterations, 24)
+    verify_rate = 8 / (time.perf_counter() - t0) * CPU_CORES
+    stream_rate = produced / max(stream_secs, 1e-9)
+
+    tbl = Table(show_header=True, header_style="bold magenta",
+                title=f"Rule engine: {len(rules)} rules x {human_int(lines)} words")
+    tbl.add_column("Metric", style="cyan")
+    tbl.add_column("Value", justify="right", style="green")
+    tbl.add_row("Keyspace (reported / produced)", f"{human_int(rules.keyspace(lines))} / {human_int(produced)}")
+    tbl.add_row("Streamed candidates/sec (mmap + rules + batching)", f"{stream_rate:,.0f}")
+    tbl.add_row("expand_batch candidates/sec", f"{flat / max(batch_secs, 1e-9):,.0f}")
+    tbl.add_row(f"Verifier candidates/sec ({CPU_CORES} cores, {human_int(iterations)} iterations)", f"{verify_rate:,.0f}")
+    tbl.add_row("Headroom", f"{stream_rate / verify_rate:,.1f}x")
+    console.print(tbl)
+    ok = produced == rules.keyspace(lines) == flat
+    if not ok:
+        console.print("[red][-] Produced candidate count does not match the reported keyspace.[/red]")
+    elif stream_rate < verify_rate:
+        console.print("[yellow][!] The rule engine is slower than the verifiers at this iteration count.[/yellow]")
+    return ok
+
+
+BENCH_MASK = "?u?l?l?l?d?d?s"
+
+
+def bench_mask(mask: MaskSource, count: int, iterations: int):
+    count = min(count, mask.size)
+    first = mask.start + (mask.size - count) // 2
+    rates = {}
+    for engine, vector in (("numpy", True), ("python", False)):
+        if vector and not mask._vector:
+            continue
+        saved = mask._vector
+        mask._vector = vector
+        try:
+            buf = mask.new_buffer()
+            t0 = time.perf_counter()
+            for k in range(first, first + count, MASK_BLOCK):
+                mask.fill(buf, k, min(MASK_BLOCK, first + count - k))
+            rates[f"fill ({engine})"] = count / max(time.perf_counter() - t0, 1e-9)
+        finally:
+            mask._vector = saved
+
+    t0 = time.perf_counter()
+    produced, ok = 0, True
+    for batch in batched(mask.iter(first), POOL_BATCH_SIZE):
+        produced += len(batch)
+        if produced >= count:
+            break
+    rates["streamed (iter + batching)"] = produced / max(time.perf_counter() - t0, 1e-9)
+    # spot-check streaming against direct index decoding, including both range edges
+    rng = random.Random(1)
+    picks = {mask.start, mask.stop - 1} | {rng.randrange(mask.start, mask.stop) for _ in range(64)}
+    for i in picks:
+        view, nxt = next(mask.iter(i))
+        ok = ok and bytes(view) == mask.candidate(i) and nxt == i + 1
+
+    salt = os.urandom(20)
+    t0 = time.perf_counter()
+    for j in range(8):
+        hashlib.pbkdf2_hmac("sha1", b"bench%d" % j, salt, iterations, 24)
+    verify_rate = 8 / (time.perf_counter() - t0) * CPU_CORES
+
+    tbl = Table(show_header=True, header_style="bold magenta",
+                title=f"{mask.label}: keyspace {human_int(mask.keyspace)}")
+    tbl.add_column("Metric", style="cyan")
+    tbl.add_column("Candidates/sec", justify="right", style="green")
+    for name, rate in rates.items():
+        tbl.add_row(name, f"{rate:,.0f}")
+    tbl.add_row(f"verifier ({CPU_CORES} cores, {human_int(iterations)} iterations)", f"{verify_rate:,.0f}")
+    console.print(tbl)
+    if not ok:
+        console.print("[red][-] Streamed candidates disagree with index decoding.[/red]")
+    return ok
+
+
+def bench_merge(lines: int, samples: int):
+    # Zipf population pw0 (most common) .. pwN; passwords to find are drawn from the same
+    # distribution. Lists: a small one of rare words, a frequency-sorted half, and a counts list
+    # of everything. Size order checks the rare list first; the merge should not.
+    population = max(1000, lines)
+    words = [b"pw%07d" % i for i in range(population)]
+    rng = random.Random(7)
+    rare = sorted(rng.sample(range(population // 2, population), population // 10))
+    with tempfile.TemporaryDirectory(prefix="cracker-bench-") as tmp:
+        paths = {name: os.path.join(tmp, name) for name in ("rare.txt", "common.txt", "freq.txt")}
+        with open(paths["rare.txt"], "wb") as f:
+            f.writelines(words[i] + b"\n" for i in rare)
+        with open(paths["common.txt"], "wb") as f:
+            f.writelines(w + b"\n" for w in words[:population // 2])
+        with open(paths["freq.txt"], "wb") as f:
+            f.writelines(b"%d:%s\n" % (population * 10 // (i + 1), w) for i, w in enumerate(words))
+
+        def first_seen(stream):
+            seen = {}
+            for pwd, _ in stream:
+                seen.setdefault(bytes(pwd), len(seen))
+            return seen
+
+        def plain(path):
+            # the counts list without its count column, as it would have to be fed without the merge
+            for line, end in iter_lines_mmap(path):
+                m = COUNT_LINE.match(line) if path == paths["freq.txt"] else None
+                yield (line[m.end():] if m else line), end
+
+        sequential = first_seen(c for p in sorted(paths.values(), key=os.path.getsize) for c in plain(p))
+        merged = MergedSource([(paths["rare.txt"], 1.0, False), (paths["common.txt"], 1.0, False),
+                               (paths["freq.txt"], 1.0, True)])
+        t0 = time.perf_counter()
+        produced = sum(1 for _ in merged.iter())
+        merge_rate = produced / max(time.perf_counter() - t0, 1e-9)
+        ordered = first_seen(merged.iter())
+
+        # resuming from a mid-stream position continues with exactly the same candidates
+        full = [(bytes(pwd), pos) for pwd, pos in merged.iter()]
+        mid = len(full) // 2
+        resumed = [(bytes(pwd), pos) for pwd, pos in merged.iter(full[mid - 1][1])]
+        ok = resumed == full[mid:] and produced == merged.size and full[-1][1] == merged.stop
+    ok = ok and set(ordered) == set(sequential) == set(words)
+
+    targets = rng.choices(words, weights=[1 / (i + 1) for i in range(population)], k=max(1, samples))
+    rows = []
+    for name, positions in (("size order, sequential", sequential), ("merged by probability", ordered)):
+        hits = sorted(positions[t] + 1 for t in targets)
+        rows.append((name, f"{sum(hits) / len(hits):,.1f}", f"{percentile(hits, 50):,.0f}",
+                     f"{percentile(hits, 90):,.0f}"))
+
+    tbl = Table(show_header=True, header_style="bold magenta",
+                title=f"Candidates verified before the hit ({human_int(population)} word Zipf population, "
+                      f"{human_int(len(targets))} draws)")
+    tbl.add_column("Order", style="cyan")
+    tbl.add_column("Mean", justify="right", style="green")
+    tbl.add_column("p50", justify="right")
+    tbl.add_column("p90", justify="right")
+    for row in rows:
+        tbl.add_row(*row)
+    tbl.add_row("merge throughput", f"{merge_rate:,.0f}/s", "", "")
+    console.print(tbl)
+    if not ok:
+        console.print("[red][-] Merged stream lost candidates or did not resume where it left off.[/red]")
+    return ok
+
+
+def _transport_worker(tasks, results, slab_names):
+    # what a verifier does with a batch, minus the verifying
+    slabs = attach_slabs(slab_names)
+    try:
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+            batch_id, batch = item
+            if isinstance(batch, int):
+                batch = read_slab(slabs[batch].buf)
+            results.put((batch_id, len(batch), sum(map(len, batch))))
+    finally:
+        detach_slabs(slabs)
+
+
+def bench_ring(lines: int, workers: int):
+    # producer -> verifier transport alone: pickled batches on a queue vs slab ids
+    rows, ok = [], True
+    with tempfile.TemporaryDirectory(prefix="cracker-bench-") as tmp:
+        wordlist = os.path.join(tmp, "bench.txt")
+        write_synthetic_wordlist(wordlist, lines)
+        expected = os.path.getsize(wordlist) - lines
+        for batch_size in (POOL_BATCH_SIZE, KDF_LANE_BATCH):
+            for name, use_slabs in (("queue", False), ("slabs", True)):
+                max_inflight = workers * POOL_INFLIGHT_PER_WORKER
+                ring = SlabRing(max_inflight if use_slabs else 0, batch_size * SLAB_BYTES_PER_CANDIDATE)
+                tasks, results = multiprocessing.Queue(), multiprocessing.Queue()
+                procs = [multiprocessing.Process(target=_transport_worker, args=(tasks, results, ring.names),
+                                                 daemon=True) for _ in range(workers)]
+                for p in procs:
+                    p.start()
+                slab_of, inflight, got, got_bytes, fallbacks = {}, 0, 0, 0, 0
+                pending = batched(iter_lines_mmap(wordlist), batch_size)
+                t0, cpu0 = time.perf_counter(), time.process_time()
+                try:
+                    for batch_id, items in enumerate(pending):
+                        if inflight >= max_inflight:
+                            done_id, n, size = results.get()
+                            if done_id in slab_of:
+                                ring.release(slab_of.pop(done_id))
+                            inflight, got, got_bytes = inflight - 1, got + n, got_bytes + size
+                        batch = [bytes(pwd) for pwd, _ in items]
+                        slab = ring.pack(batch) if use_slabs else None
+                        if slab is not None:
+                            slab_of[batch_id] = slab
+                        fallbacks += use_slabs and slab is None
+                        tasks.put((batch_id, batch if slab is None else slab))
+                        inflight += 1
+                    for _ in range(inflight):
+                        _, n, size = results.get()
+                        got, got_bytes = got + n, got_bytes + size
+                    secs, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+                finally:
+                    for _ in procs:
+                        tasks.put(None)
+                    for p in procs:
+                        p.join(timeout=POOL_JOIN_TIMEOUT)
+                        if p.is_alive():
+                            p.terminate()
+                    ring.close()
+                ok = ok and got == lines and got_bytes == expected and not fallbacks
+                rows.append((name, batch_size, got / max(secs, 1e-9), cpu / max(1, got),
+                             len(ring.names) * ring.slab_bytes if use_slabs else None))
+
+    tbl = Table(show_header=True, header_style="bold magenta",
+                title=f"Batch transport to {workers} processes, {human_int(lines)} candidates")
+    tbl.add_column("Transport", style="cyan")
+    tbl.add_column("Batch", justify="right")
+    tbl.add_column("Candidates/sec", justify="right", style="green")
+    tbl.add_column("vs queue", justify="right")
+    tbl.add_column("Producer CPU", justify="right")
+    tbl.add_column("Shared memory", justify="right")
+    base = {}
+    for name, batch_size, rate, cpu, shm in rows:
+        base.setdefault(batch_size, rate)
+        tbl.add_row(name, human_int(batch_size), f"{rate:,.0f}", f"{rate / base[batch_size]:.2f}x",
+                    f"{cpu * 1e9:,.0f} ns/cand", f"{shm / 1024:,.0f} KiB" if shm is not None else "")
+    console.print(tbl)
+    if not ok:
+        console.print("[red][-] A transport lost candidates or a batch did not fit its slab.[/red]")
+    return ok
+
+
+BENCH_TUNE_CURVES = {
+    # in-flight level -> attempts/sec; the level the tuner should settle near
+    "cpu-bound (4 cores)": (lambda k: 10.0 * min(k, 4), 4),
+    "attach daemon, thrashes past 3": (lambda k: 6.0 * k if k <= 3 else 18.0 / (1 + 0.5 * (k - 3) ** 2), 3),
+    "throttling laptop (2 fast cores)": (lambda k: 10.0 * min(k, 2) + 2.0 * max(0, min(k, 6) - 2) - 3.0 * max(0, k - 6), 6),
+}
+
+
+def bench_tune(windows: int, high: int):
+    # drives the tuner with simulated throughput curves (with 5% noise) instead of real windows
+    rng = random.Random(7)
+    tbl = Table(show_header=True, header_style="bold magenta",
+                title=f"Concurrency tuner, {windows} windows of measurement, levels 1-{high}")
+    tbl.add_column("Curve", style="cyan")
+    tbl.add_column("Levels visited")
+    tbl.add_column("Best / optimum", justify="right")
+    tbl.add_column("Rate at best / optimum", justify="right", style="green")
+    tbl.add_column("Mean rate vs optimum", justify="right")
+    ok = True
+    for name, (curve, optimum) in BENCH_TUNE_CURVES.items():
+        tuner = ConcurrencyTuner(None, name, 1, high, 1)
+        visited, rates = [], []
+        for _ in range(windows):
+            visited.append(tuner.level)
+            rate = curve(tuner.level) * rng.uniform(0.95, 1.05)
+            rates.append(curve(tuner.level))
+            tuner.adjust(rate)
+        peak = curve(optimum)
+        mean = sum(rates) / len(rates)
+        tbl.add_row(name, " ".join(map(str, visited)), f"{tuner.best_level} / {optimum}",
+                    f"{curve(tuner.best_level):.1f} / {peak:.1f}", f"{mean / peak * 100:.0f}%")
+        ok = ok and curve(tuner.best_level) >= 0.9 * peak
+    console.print(tbl)
+    if not ok:
+        console.print("[red][-] The tuner did not find a level within 10% of the optimum.[/red]")
+    return ok
+
+
+def synthetic_encrcdsa_token(password: bytes, iterations: int) -> bytes:
+    # a v2 header with one password key entry, in the layout parse_encrcdsa_header reads
+    salt, iv = os.urandom(20), os.urandom(8)
+    key = hashlib.pbkdf2_hmac("sha1", password, salt, iterations, 24)
+    plain = os.urandom(24) + b"CKIE" + b"\x04" * 4
+    blob, prev = b"", iv
+    for k in range(0, len(plain), 8):
+        block = bytes(a ^ b for a, b in zip(plain[k:k + 8], prev))
+        prev, = des3_encrypt_blocks(key, [block])
+        blob += prev
+    h = bytearray(0x68 + len(blob))
+    struct.pack_into(">IIII", h, 0, 103, 0, iterations, len(salt))
+    h[0x10:0x10 + len(salt)] = salt
+    struct.pack_into(">I", h, 0x30, len(iv))
+    h[0x34:0x34 + len(iv)] = iv
+    struct.pack_into(">IIII", h, 0x58, 17, 7, 6, len(blob))
+    h[0x68:] = blob
+    data = bytearray(0x60)
+    data[:8] = ENCRCDSA_MAGIC
+    struct.pack_into(">I", data, 8, 2)
+    struct.pack_into(">I", data, 0x18, 128)
+    data[0x24:0x34] = os.urandom(16)
+    struct.pack_into(">I", data, 0x48, 1)
+    struct.pack_into(">IQQ", data, 0x4C, 1, len(data), len(h))
+    return bytes(data + h)
+
+
+def _bench_version() -> str:
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def _timed_rate(count_fn):
+    t0 = time.perf_counter()
+    n = count_fn()
+    return n, n / max(time.perf_counter() - t0, 1e-9)
+
+
+def bench_suite(max_lines: int, iterations: int, out_path: str):
+    # decades of synthetic wordlist through each stage, then one profiled crack of a synthetic
+    # encrcdsa image; the rates go to out_path so runs on the same host can be compared
+    global PROFILE
+    sizes = [10 ** k for k in range(SUITE_MIN_EXP, SUITE_MAX_EXP + 1) if k == SUITE_MIN_EXP or 10 ** k <= max_lines]
+    results, ok = {}, True
+    rules = RuleSet(BENCH_RULES, "bench")
+    hit = b"bench-hit"
+    with tempfile.TemporaryDirectory(prefix="cracker-bench-") as tmp:
+        for lines in sizes:
+            wordlist = os.path.join(tmp, f"bench{lines}.txt")
+            t0 = time.perf_counter()
+            write_synthetic_wordlist(wordlist, lines)
+            results[f"write@{lines}"] = lines / max(time.perf_counter() - t0, 1e-9)
+            _, results[f"index@{lines}"] = _timed_rate(
+                lambda: WordlistIndex.build(wordlist, os.stat(wordlist)).lines)
+            n, results[f"read@{lines}"] = _timed_rate(lambda: sum(1 for _ in iter_lines_mmap(wordlist)))
+            ok = ok and n == lines
+            if lines <= SUITE_DEDUP_MAX:
+                dedup = CandidateDedup(BloomFilter(lines, DEDUP_FP_RATE))
+                _, results[f"dedup@{lines}"] = _timed_rate(
+                    lambda: sum(1 for _ in dedup.filter(iter_lines_mmap(wordlist))))
+            if lines <= SUITE_STREAM_MAX:
+                _, results[f"rules@{lines}"] = _timed_rate(
+                    lambda: sum(len(b) for b in batched(rules.expand(iter_lines_mmap(wordlist)), POOL_BATCH_SIZE)))
+                packed = wordlist + ".gz"
+                with open(wordlist, "rb") as src, gzip.open(packed, "wb", compresslevel=1) as dst:
+                    shutil.copyfileobj(src, dst, DECOMPRESS_CHUNK)
+                n, results[f"gzip@{lines}"] = _timed_rate(lambda: sum(1 for _ in iter_lines_compressed(packed)))
+                ok = ok and n == lines
+            os.remove(wordlist)
+
+        # verifier stages against a synthetic token: the cost every candidate pays once
+        image = os.path.join(tmp, "bench.dmg")
+        with open(image, "wb") as f:
+            f.write(synthetic_encrcdsa_token(hit, iterations))
+        verifier = EncrcdsaVerifier.from_image(image)
+        probe = [b"probe%d" % j for j in range(SUITE_VERIFY_SAMPLE)]
+        _, results["verify.hashlib"] = _timed_rate(lambda: len(probe) if verifier.check_batch(probe) is not None else 0)
+        ok = ok and verifier.check(hit)
+        if np is not None:
+            _, results["verify.numpy"] = _timed_rate(lambda: len(pbkdf2_hmac_sha1_batch(probe, verifier.salt, verifier.iterations, 24)))
+
+        # the whole pipeline, hit on the last line, with stage counters on
+        lines = min(max_lines, SUITE_PIPELINE_LINES)
+        wordlist = os.path.join(tmp, "pipeline.txt")
+        write_synthetic_wordlist(wordlist, lines, hit)
+        saved, PROFILE = PROFILE, StageStats()
+        try:
+            result, secs = _run_headless(image, [wordlist], VerifierBackend(), InputWatcher(), workers=CPU_CORES)
+            pipeline = PROFILE
+        finally:
+            PROFILE = saved
+        results["pipeline"] = (lines + 1) / max(secs, 1e-9)
+        ok = ok and result == "found"
+
+    record = {"ts": time.time(), "version": _bench_version(), "host": platform.node(), "cores": CPU_CORES,
+              "python": platform.python_version(), "iterations": iterations, "results": results,
+              "stages": pipeline.summary()}
+    previous = None
+    try:
+        with open(out_path, "r") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                if r.get("host") == record["host"] and r.get("iterations") == iterations:
+                    previous = r
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    tbl = Table(show_header=True, header_style="bold magenta",
+                title=f"Benchmark suite ({human_int(iterations)} PBKDF2 iterations, {record['version']})")
+    tbl.add_column("Stage", style="cyan")
+    tbl.add_column("Items/sec", justify="right", style="green")
+    tbl.add_column(f"Previous ({previous['version']})" if previous else "Previous", justify="right")
+    tbl.add_column("Change", justify="right")
+    for key, rate in results.items():
+        before = (previous or {}).get("results", {}).get(key)
+        change = f"{(rate / before - 1) * 100:+.1f}%" if before else ""
+        tbl.add_row(key, f"{rate:,.0f}", f"{before:,.0f}" if before else "", change)
+    console.print(tbl)
+    console.print(pipeline.table())
+    console.print(f"[blue][*] Appended to {out_path}[/blue]")
+    if not ok:
+        console.print("[red][-] A stage lost lines or the pipeline missed the synthetic password.[/red]")
+    return ok
+
+
+# ---------- Bundle order UI ----------
+
+def choose_bundle_order(bundles):
+    console.rule("[bold cyan]Bundle Ordering")
+    auto_table = Table(show_header=True, header_style="bold magenta")
+    auto_table.add_column("#", justify="right", style="cyan", no_wrap=True)
+    auto_table.add_column("Bundle", style="white")
+    for i, b in enumerate(bundles, start=1):
+        auto_table.add_row(str(i), b)
+    console.print(auto_table)
+    resp = input("Press Enter to keep this auto order, or type 'm' to manually reorder: ").strip().lower()
+    if resp not in ("m", "manual", "y", "yes"):
+        return bundles[:]
+
+    n = len(bundles)
+    assigned, used = {}, set()
+    for idx, b in enumerate(bundles, start=1):
+        while True:
+            default_pos = idx
+            raw = input(f"Position for {b} (1–{n}) [Enter for {default_pos}]: ").strip()
+            if raw == "":
+                pos = default_pos
+            else:
+                try:
+                    pos = int(raw)
+                except Exception:
+                    console.print("[red]Please enter a number.[/red]")
+                    continue
+            if not (1 <= pos <= n):
+                console.print(f"[red]Invalid position (1–{n}).[/red]")
+                continue
+            if pos in used:
+                console.print(f"[red]Position {pos} already taken.[/red]")
+                continue
+            assigned[b] = pos
+            used.add(pos)
+            break
+
+    ordered = [None] * n
+    for b, p in assigned.items():
+        ordered[p - 1] = b
+    ordered = [b for b in ordered if b is not None]
+
+    final = Table(show_header=True, header_style="bold green")
+    final.add_column("Order", justify="right", style="green", no_wrap=True)
+    final.add_column("Bundle", style="white")
+    for i, b in enumerate(ordered, start=1):
+        final.add_row(str(i), b)
+    console.print(final)
+    confirm = input("Press Enter to confirm this order, or type 'r' to redo: ").strip().lower()
+    if confirm in ("r", "redo"):
+        return choose_bundle_order(bundles)
+    return ordered
+
+
+# ============================= Main =============================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recover passwords for macOS disk images from local wordlists.")
+    parser.add_argument("--workers", type=int, default=CPU_CORES,
+                        help=f"verifier processes for offline-checkable images (default: {CPU_CORES}; 1 = in-line)")
+    parser.add_argument("--backend", choices=["verifier", "hdiutil"], default="verifier",
+                        help="verifier = offline check where possible, confirmed by hdiutil; hdiutil = attach every candidate")
+    parser.add_argument("--multi", action="store_true",
+                        help="read each wordlist once and check every offline-checkable image in the same pass")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue each image/wordlist from its last checkpoint in {STATE_DIR}/")
+    parser.add_argument("--no-dedup", action="store_true", help="verify duplicate candidates again")
+    parser.add_argument("--dedup-capacity", type=int, default=DEDUP_CAPACITY,
+                        help="expected distinct candidates per image (sizes the dedup filter)")
+    parser.add_argument("--dedup-fp", type=float, default=DEDUP_FP_RATE,
+                        help="dedup filter false-positive rate, i.e. chance of wrongly skipping a new candidate")
+    parser.add_argument("--dedup-persist", action="store_true",
+                        help=f"keep each image's dedup filter in {STATE_DIR}/{DEDUP_DIR}/ across runs")
+    parser.add_argument("--rules", metavar="FILE", help="hashcat-style rules file applied to every wordlist entry")
+    parser.add_argument("--merge", action="store_true",
+                        help="interleave all wordlists into one stream in descending estimated probability")
+    parser.add_argument("--weight", action="append", default=[], metavar="FILE=W",
+                        help="scale a merged wordlist's probabilities by W (repeatable)")
+    parser.add_argument("--counts", action="append", default=[], metavar="FILE",
+                        help="merged wordlist whose lines are count:password (or `uniq -c` output) (repeatable)")
+    parser.add_argument("--mask", action="append", default=[],
+                        help="mask source such as ?u?l?l?l?d?d?s, run after the wordlists (repeatable)")
+    parser.add_argument("--charset", action="append", default=[], metavar="N=CHARS",
+                        help="custom charset ?1-?4 for masks, e.g. 1=?l?d (repeatable)")
+    parser.add_argument("--mask-range", metavar="A:B", help="only candidates A (inclusive) to B (exclusive) of each mask")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="export progress metrics: PATH.prom is a Prometheus textfile, anything else gets JSON lines")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_EXPORT_INTERVAL,
+                        help="seconds between metrics exports")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="coordinate a distributed search of the first image; workers lease work units over HTTP "
+                             "(HOST defaults to 127.0.0.1; give 0.0.0.0 to accept other machines)")
+    parser.add_argument("--worker", metavar="URL", help="join a coordinator (e.g. http://host:8765) instead of cracking locally")
+    parser.add_argument("--unit-size", type=int, default=DIST_UNIT_CANDIDATES, help="candidates per distributed work unit")
+    parser.add_argument("--lease-secs", type=float, default=DIST_LEASE_SECS,
+                        help="re-issue a work unit when its worker has not reported for this long")
+    parser.add_argument("--scan", action="append", default=[], metavar="DIR",
+                        help="find images recursively under DIR by their contents (repeatable)")
+    parser.add_argument("--include-found", action="store_true",
+                        help="also try images whose password was already recovered")
+    parser.add_argument("--hints", metavar="FILE",
+                        help="words the owner is likely to use (names, places, pets), one per line, tried first")
+    parser.add_argument("--no-fast-lane", action="store_true",
+                        help="do not try candidates built from image metadata and --hints before the sources")
+    parser.add_argument("--job", metavar="FILE",
+                        help="run unattended from a JSON job file (images, sources, rules, hints, slice_secs, resume)")
+    parser.add_argument("--attach-inflight", type=int, default=ATTACH_INFLIGHT,
+                        help="hdiutil attach attempts kept running at once for images without an offline verifier")
+    parser.add_argument("--tune", action="store_true",
+                        help="adjust verifier workers (up to --workers) and hdiutil attaches in flight to measured "
+                             "throughput, starting from the best setting saved for this host")
+    parser.add_argument("--stages", action="store_true", help="time each pipeline stage and print a breakdown at exit")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="run under cProfile, write pstats data to FILE and the stage breakdown next to it")
+    parser.add_argument("--bench", choices=["kdf", "e2e", "rules", "mask", "attach", "merge", "suite", "ring", "tune"],
+                        help="run a benchmark instead of cracking")
+    parser.add_argument("--bench-lanes", type=int, default=KDF_LANE_BATCH)
+    parser.add_argument("--bench-iterations", type=int, default=1000)
+    parser.add_argument("--bench-lines", type=int, default=2000)
+    parser.add_argument("--bench-latency", type=float, default=0.0, help="fake attach latency in seconds")
+    parser.add_argument("--bench-out", default=os.path.join(STATE_DIR, BENCH_FILE),
+                        help="where --bench suite appends its results")
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.exit(0 if run_worker(args.worker, max(1, args.workers)) == "found" else 1)
+    if args.bench == "kdf":
+        sys.exit(0 if bench_kdf(args.bench_lanes, args.bench_iterations) else 1)
+    if args.bench == "e2e":
+        sys.exit(0 if bench_e2e(args.bench_lines, args.bench_latency) else 1)
+    if args.bench == "attach":
+        sys.exit(0 if bench_attach(args.bench_lines, args.bench_latency or 0.05, args.attach_inflight) else 1)
+    if args.bench == "merge":
+        sys.exit(0 if bench_merge(args.bench_lines, args.bench_iterations) else 1)
+    if args.bench == "tune":
+        sys.exit(0 if bench_tune(args.bench_lines if args.bench_lines != 2000 else 40, max(8, args.workers)) else 1)
+    if args.bench == "ring":
+        sys.exit(0 if bench_ring(args.bench_lines, max(1, args.workers)) else 1)
+    if args.bench == "suite":
+        sys.exit(0 if bench_suite(args.bench_lines, args.bench_iterations, args.bench_out) else 1)
+    if (args.weight or args.counts) and not args.merge:
+        parser.error("--weight and --counts apply to --merge")
+    try:
+        weights = {os.path.abspath(f): float(w) for f, _, w in (spec.rpartition("=") for spec in args.weight)}
+    except ValueError:
+        parser.error("--weight takes FILE=W with a numeric W")
+    if any(w <= 0 for w in weights.values()):
+        parser.error("--weight must be positive")
+    counts = {os.path.abspath(f) for f in args.counts}
+    rules = None
+    if args.rules:
+        try:
+            rules = RuleSet.load(args.rules)
+        except (OSError, ValueError) as e:
+            parser.error(f"--rules: {e}")
+    if args.bench == "rules":
+        sys.exit(0 if bench_rules(args.bench_lines, args.bench_iterations, args.rules) else 1)
+    masks = []
+    try:
+        custom = dict(spec.split("=", 1) for spec in args.charset)
+        if any(k not in ("1", "2", "3", "4") for k in custom):
+            raise ValueError("custom charsets are numbered 1-4")
+        for m in args.mask:
+            mask = MaskSource(m, custom)
+            if args.mask_range:
+                a, _, b = args.mask_range.partition(":")
+                mask = mask.shard(int(a or 0), int(b) if b else mask.keyspace)
+            masks.append(mask)
+    except ValueError as e:
+        parser.error(f"--mask: {e}")
+    if args.bench == "mask":
+        sys.exit(0 if bench_mask(masks[0] if masks else MaskSource(BENCH_MASK), args.bench_lines,
+                                 args.bench_iterations) else 1)
+
+    if args.hints and not os.path.isfile(args.hints):
+        parser.error(f"--hints: no such file: {args.hints}")
+    fast_settings = None if args.no_fast_lane else {"hints": args.hints}
+
+    IMAGES = ImageIndex(os.path.join(STATE_DIR, IMAGE_INDEX_FILE))
+    job = None
+    if args.job:
+        try:
+            job = load_job(args.job)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"--job: {e}")
+        if job["rules"] is None:
+            job["rules"] = rules
+        rules = job["rules"]
+        if args.no_fast_lane:
+            job["fast"] = None
+        elif job["fast"] is not None and job["fast"]["hints"] is None:
+            job["fast"]["hints"] = args.hints
+
+    if args.tune:
+        TUNING = TuningStore(os.path.join(STATE_DIR, TUNE_FILE))
+    if args.backend == "hdiutil":
+        backend = HdiutilBackend(args.attach_inflight)
+    else:
+        backend = default_backend(args.attach_inflight)
+    if job is not None:
+        # unattended: no mode prompt, no ordering UI, the scheduler decides
+        mode = 1
+        bundles = job["images"]
+        sources = [s for s, _ in job["sources"]]
+    else:
+        # Mode selection reduced to Mode 1 only
+        mode = get_mode()
+        bundles = scan_images(args.scan, IMAGES) if args.scan else discover_images()
+        sources = discover_password_files()
+        plain = [p for p in sources if not is_compressed(p)]
+        if args.merge and plain:
+            # compressed lists cannot be seeked by line, so they stay separate sources after the merge
+            sources = [MergedSource([(p, weights.get(os.path.abspath(p), 1.0), os.path.abspath(p) in counts)
+                                     for p in plain])] + [p for p in sources if is_compressed(p)]
+        sources += masks
+    if not bundles:
+        console.print("[red]No supported disk images (.sparsebundle, .dmg, .sparseimage) found in this folder.[/red]")
+        sys.exit(1)
+    if args.scan:
+        show_images(bundles, IMAGES)
+    bundles = settle_images(bundles, IMAGES, args.include_found)
+    if not bundles:
+        console.print("[blue][*] Every image is unencrypted or already recovered.[/blue]")
+        sys.exit(0)
+    clean_mounts(backend, bundles)
+
+    # Only Local Wordlists mode is available
+    if not sources:
+        console.print("[red]No sources found for this mode.[/red]")
+        sys.exit(1)
+
+    # Decide bundle order (manual or auto)
+    ordered = bundles if job is not None else choose_bundle_order(bundles)
+
+    console.rule("[bold cyan]Summary")
+    console.print(f"[cyan]Mode:[/cyan] 1 (Local Wordlists)")
+    console.print(f"[cyan]Detected {len(bundles)} images[/cyan]")
+    console.print(f"[cyan]Sources:[/cyan] {[source_label(s) for s in sources]}")
+
+    # SIGTERM / SIGHUP (e.g. a dropped SSH session) unwind normally so checkpoints get flushed
+    for sig in (signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, lambda signum, frame: sys.exit(128 + signum))
+    checkpoints = CheckpointStore(os.path.join(STATE_DIR, CHECKPOINT_FILE))
+    dedup_settings = None
+    if not args.no_dedup:
+        dedup_settings = {"capacity": args.dedup_capacity, "fp_rate": args.dedup_fp, "persist": args.dedup_persist}
+
+    metrics = MetricsExporter(args.metrics_file, args.metrics_interval) if args.metrics_file else None
+
+    if args.stages or args.profile:
+        PROFILE = StageStats()
+    profiler = cProfile.Profile() if args.profile else None
+
+    watcher = InputWatcher()
+    watcher.start()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        if job is not None:
+            run_schedule(job, watcher, workers=max(1, args.workers), backend=backend,
+                         checkpoints=checkpoints, dedup_settings=dedup_settings, metrics=metrics)
+        elif args.serve:
+            run_coordinator(ordered[0], sources, args.serve, watcher, backend=backend, rules=rules,
+                            unit_candidates=max(1, args.unit_size), lease_secs=args.lease_secs)
+        elif args.multi:
+            crack_many(ordered, sources, watcher, workers=max(1, args.workers),
+                       backend=backend, checkpoints=checkpoints, resume=args.resume, dedup_settings=dedup_settings,
+                       rules=rules, metrics=metrics, fast_settings=fast_settings)
+        else:
+            for b in ordered:
+                if watcher.quit_all.is_set():
+                    break
+                crack_bundle(b, sources, mode, watcher, workers=max(1, args.workers),
+                             backend=backend, checkpoints=checkpoints, resume=args.resume,
+                             dedup_settings=dedup_settings, rules=rules, metrics=metrics,
+                             fast_settings=fast_settings)
+    except PoolError as e:
+        console.print(f"[red][-] {e}[/red]")
+        sys.exit(1)
     finally:
+        if profiler is not None:
+            profiler.disable()
+        backend.sweep()
         watcher.stop()
+        if TUNING is not None:
+            TUNING.save()
+        report_profile(profiler, args.profile)
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+SAMPLE_IMAGE = os.path.join(ROOT, "test.sparsebundle")
+SAMPLE_PASSWORD = b"test"
+
+
+@pytest.fixture
+def sample_image():
+    return SAMPLE_IMAGE
+
+
+@pytest.fixture
+def make_image(tmp_path):
+    # a sparsebundle-shaped folder whose token is a synthetic encrcdsa header
+    import cracker
+
+    def make(name: str, password: bytes, iterations: int = 50) -> str:
+        path = tmp_path / f"{name}.sparsebundle"
+        path.mkdir()
+        (path / "token").write_bytes(cracker.synthetic_encrcdsa_token(password, iterations))
+        return str(path)
+
+    return make
+
+
+@pytest.fixture
+def quiet(monkeypatch):
+    import cracker
+
+    monkeypatch.setattr(cracker.console, "quiet", True)
@@ -0,0 +1,40 @@
+import asyncio
+
+import cracker
+
+
+def test_hit_beats_key_press_in_same_wakeup(monkeypatch):
+    watcher = cracker.InputWatcher()
+
+    async def attach_once(hdiutil, image_path, pwd, mounts=None):
+        await asyncio.sleep(0)
+        watcher.quit_all.set()
+        return pwd == b"right"
+
+    async def watch_events(w, stop_event=None):
+        while cracker.watcher_status(w) == "ok":
+            await asyncio.sleep(0)
+        return cracker.watcher_status(w)
+
+    monkeypatch.setattr(cracker, "_attach_once", attach_once)
+    monkeypatch.setattr(cracker, "_watch_events", watch_events)
+    checked = []
+    result = asyncio.run(cracker.attach_stream_async("hdiutil", "img", [(b"right", 6)], 1, watcher,
+                                                     lambda *a: checked.append(a)))
+    assert result == ("found", b"right")
+    assert checked == [(1, 6, 1)]
+
+
+def test_key_press_stops_stream(monkeypatch):
+    watcher = cracker.InputWatcher()
+
+    async def attach_once(hdiutil, image_path, pwd, mounts=None):
+        watcher.skip_file.set()
+        await asyncio.sleep(10)
+        return False
+
+    monkeypatch.setattr(cracker, "_attach_once", attach_once)
+    monkeypatch.setattr(cracker, "ATTACH_POLL_INTERVAL", 0.01)
+    result = asyncio.run(cracker.attach_stream_async("hdiutil", "img", [(b"a", 2), (b"b", 4)], 2, watcher,
+                                                     lambda *a: None))
+    assert result == ("skip_file", None)
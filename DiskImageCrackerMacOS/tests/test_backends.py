@@ -0,0 +1,27 @@
+import pytest
+
+import cracker
+
+
+def test_incomplete_backend_fails_on_creation():
+    class NoAttach(cracker.AttachBackend):
+        name = "broken"
+
+    with pytest.raises(TypeError):
+        NoAttach()
+
+
+def test_default_attach_stream_reports_positions():
+    backend = cracker.FakeBackend(password=b"c")
+    checked, verified = [], []
+    status, pwd = backend.attach_stream("img", [(b"a", 2), (b"b", 4), (b"c", 6), (b"d", 8)], cracker.InputWatcher(),
+                                        lambda *a: checked.append(a), verified.extend)
+    assert (status, pwd) == ("found", b"c")
+    assert checked == [(1, 2, 1), (1, 4, 2), (1, 6, 3)]
+    assert verified == [b"a", b"b", b"c"]
+
+
+def test_default_attach_stream_stops_on_key_press():
+    watcher = cracker.InputWatcher()
+    watcher.skip_file.set()
+    assert cracker.FakeBackend().attach_stream("img", [(b"a", 2)], watcher, lambda *a: None) == ("skip_file", None)
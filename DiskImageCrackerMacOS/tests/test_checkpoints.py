@@ -0,0 +1,111 @@
+import json
+
+import cracker
+
+
+def write_words(path, words):
+    path.write_bytes(b"".join(w + b"\n" for w in words))
+    return str(path)
+
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "ckpt.json")
+    store = cracker.CheckpointStore(path, interval=3600)
+    store.update("k", 120, 12)
+    # buffered until the interval passes or flush() is called
+    assert cracker.CheckpointStore(path).get("k") is None
+    store.flush()
+    entry = cracker.CheckpointStore(path).get("k")
+    assert (entry["offset"], entry["checked"], entry["done"]) == (120, 12, False)
+
+
+def test_corrupt_store_starts_empty(tmp_path):
+    path = tmp_path / "ckpt.json"
+    path.write_text("{not json")
+    assert cracker.CheckpointStore(str(path)).get("k") is None
+
+
+def test_key_changes_with_the_wordlist(tmp_path):
+    wordlist = write_words(tmp_path / "w.txt", [b"a", b"b"])
+    key = cracker.checkpoint_key("img", wordlist)
+    write_words(tmp_path / "w.txt", [b"a", b"b", b"c"])
+    assert cracker.checkpoint_key("img", wordlist) != key
+    assert cracker.checkpoint_key("img", wordlist, cracker.RuleSet([":"])) != cracker.checkpoint_key("img", wordlist)
+
+
+class HangingConfirm(cracker.AttachBackend):
+    # the confirming attach is interrupted by q, so the hit stays unconfirmed
+    def attach(self, image_path, pwd_bytes, watcher, stop_event):
+        return ("quit", False)
+
+
+def test_watermark_stays_behind_an_unconfirmed_hit(make_image):
+    image = make_image("img", b"needle")
+    backend = cracker.VerifierBackend(HangingConfirm())
+    words = [b"hay%d" % i for i in range(200)]
+    words[40] = b"needle"
+    pool = cracker.VerifierPool({0: backend.offline_verifier(image).header}, 2)
+    pool.start()
+    commits = []
+    try:
+        status, found = cracker.run_source_pooled(
+            pool, backend, image, ((w, i + 1) for i, w in enumerate(words)), cracker.InputWatcher(),
+            lambda n, pos, committed: commits.append(pos) if pos is not None else None)
+    finally:
+        pool.close()
+    assert (status, found) == ("quit", None)
+    # batches of POOL_BATCH_SIZE: the hit's batch ends at position 48, the one before at 32
+    assert cracker.POOL_BATCH_SIZE == 16
+    assert commits and max(commits) <= 32
+
+
+class Recording(cracker.VerifierBackend):
+    def __init__(self, quit_after=None):
+        super().__init__(None)
+        self.quit_after = quit_after
+        self.tried = []
+
+    def attach(self, image_path, pwd_bytes, watcher, stop_event):
+        if len(self.tried) == self.quit_after:
+            watcher.quit_all.set()
+            return ("quit", False)
+        self.tried.append(bytes(pwd_bytes))
+        return super().attach(image_path, pwd_bytes, watcher, stop_event)
+
+
+def test_resume_restarts_at_the_checkpoint(tmp_path, make_image, quiet):
+    words = [b"w%02d" % i for i in range(50)]
+    image = make_image("img", b"w30")
+    wordlist = write_words(tmp_path / "words.txt", words)
+    path = str(tmp_path / "ckpt.json")
+
+    watcher = cracker.InputWatcher()
+    first = Recording(quit_after=20)
+    result = cracker.crack_bundle(image, [wordlist], 1, watcher, backend=first, interactive=False,
+                                  checkpoints=cracker.CheckpointStore(path), resume=True)
+    assert result == "quit"
+    assert first.tried == words[:20]
+    saved = json.load(open(path))
+    (entry,) = saved.values()
+    assert (entry["offset"], entry["checked"], entry["done"]) == (20 * 4, 20, False)
+
+    watcher = cracker.InputWatcher()
+    second = Recording()
+    result = cracker.crack_bundle(image, [wordlist], 1, watcher, backend=second, interactive=False,
+                                  checkpoints=cracker.CheckpointStore(path), resume=True)
+    assert result == "found"
+    assert second.tried == words[20:31]
+
+
+def test_exhausted_source_is_skipped_on_resume(tmp_path, make_image, quiet):
+    image = make_image("img", b"absent")
+    wordlist = write_words(tmp_path / "words.txt", [b"a", b"b", b"c"])
+    path = str(tmp_path / "ckpt.json")
+    backend = Recording()
+    assert cracker.crack_bundle(image, [wordlist], 1, cracker.InputWatcher(), backend=backend, interactive=False,
+                                checkpoints=cracker.CheckpointStore(path), resume=True) == "no_match"
+    assert len(backend.tried) == 3
+    backend = Recording()
+    assert cracker.crack_bundle(image, [wordlist], 1, cracker.InputWatcher(), backend=backend, interactive=False,
+                                checkpoints=cracker.CheckpointStore(path), resume=True) == "no_match"
+    assert backend.tried == []
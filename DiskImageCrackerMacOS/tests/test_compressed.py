@@ -0,0 +1,86 @@
+import bz2
+import gzip
+import lzma
+import queue
+import threading
+from threading import Event
+
+import pytest
+
+import cracker
+
+COMPRESS = {".gz": gzip.compress, ".bz2": bz2.compress, ".xz": lzma.compress}
+
+
+def test_reader_error_does_not_block_on_a_full_queue(tmp_path):
+    bad = tmp_path / "bad.txt.gz"
+    bad.write_bytes(b"this is not gzip data")
+    chunks = queue.Queue(maxsize=1)
+    chunks.put((b"unread", 0))
+    stop = Event()
+    t = threading.Thread(target=cracker._decompress_reader, args=(str(bad), chunks, stop), daemon=True)
+    t.start()
+    # the consumer has gone away without draining: the reader hits the error, waits, then sees stop
+    t.join(0.3)
+    stop.set()
+    t.join(2)
+    assert not t.is_alive()
+    assert chunks.get_nowait() == (b"unread", 0)
+
+
+def test_reader_error_reaches_the_consumer(tmp_path):
+    bad = tmp_path / "bad.txt.gz"
+    bad.write_bytes(b"this is not gzip data")
+    with pytest.raises(OSError, match="bad.txt.gz"):
+        list(cracker.iter_lines_compressed(str(bad)))
+
+
+def lines_and_offsets(it):
+    return [(bytes(line), pos) for line, pos in it]
+
+
+@pytest.fixture(params=sorted(COMPRESS) + [".zst"])
+def wordlists(request, tmp_path, monkeypatch):
+    # the same list plain and compressed; chunks small enough that lines straddle them
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cracker, "DECOMPRESS_CHUNK", 97)
+    data = b"".join(b"word%d\n" % i for i in range(400)) + b"\n\r\ncrlf\r\nno-newline"
+    if request.param == ".zst":
+        zstandard = pytest.importorskip("zstandard")
+        packed = zstandard.ZstdCompressor().compress(data)
+    else:
+        packed = COMPRESS[request.param](data)
+    plain = tmp_path / "list.txt"
+    plain.write_bytes(data)
+    packed_path = tmp_path / f"list.txt{request.param}"
+    packed_path.write_bytes(packed)
+    return str(plain), str(packed_path)
+
+
+def test_same_lines_and_offsets_as_plain(wordlists):
+    plain, packed = wordlists
+    expected = lines_and_offsets(cracker.iter_lines_mmap(plain))
+    progress = {}
+    assert lines_and_offsets(cracker.iter_lines_compressed(packed, 0, progress)) == expected
+    assert progress["done"] and progress["raw_pos"] == progress["raw_size"]
+    assert expected[-1] == (b"no-newline", len(open(plain, "rb").read()))
+
+
+def test_resume_from_any_offset(wordlists):
+    plain, packed = wordlists
+    expected = lines_and_offsets(cracker.iter_lines_mmap(plain))
+    for k in (1, 2, 57, 200, len(expected) - 1, len(expected)):
+        start = expected[k - 1][1]
+        assert lines_and_offsets(cracker.iter_lines_compressed(packed, start)) == expected[k:]
+
+
+def test_span_is_exact_after_one_pass(wordlists, monkeypatch):
+    plain, packed = wordlists
+    idx = cracker.wordlist_index(plain)
+    size = len(open(plain, "rb").read())
+    # small enough that the first estimate comes from a sample
+    monkeypatch.setattr(cracker, "COMPRESSED_SAMPLE", 512)
+    lines, end = cracker.compressed_span(packed)
+    assert end == cracker.COMPRESSED_END and lines > 0
+    list(cracker.iter_lines_compressed(packed))
+    assert cracker.compressed_span(packed) == (idx.lines, size)
@@ -0,0 +1,26 @@
+import cracker
+
+
+def test_bloom_has_no_false_negatives(tmp_path):
+    bloom = cracker.BloomFilter(20000, 1e-3)
+    items = [b"pw%d" % i for i in range(20000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_pos = sum(b"other%d" % i in bloom for i in range(20000))
+    assert false_pos < 20000 * 1e-3 * 4
+    path = str(tmp_path / "f.bloom")
+    bloom.save(path)
+    loaded = cracker.BloomFilter.load(path)
+    assert loaded.count == bloom.count and all(item in loaded for item in items)
+
+
+def test_dedup_skips_only_verified_candidates():
+    dedup = cracker.CandidateDedup(cracker.BloomFilter(1000, 1e-6))
+    first = list(dedup.filter([(b"a", 1), (b"b", 2), (b"a", 3)]))
+    assert first == [(b"a", 1), (b"b", 2)]
+    dedup.verified([b"a"])
+    dedup.end_source()
+    # b was offered but never verified (a cancelled batch), so it comes back
+    assert list(dedup.filter([(b"a", 1), (b"b", 2), (b"c", 3)])) == [(b"b", 2), (b"c", 3)]
+    assert dedup.skipped == 2
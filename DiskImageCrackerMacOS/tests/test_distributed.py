@@ -0,0 +1,135 @@
+import multiprocessing
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import cracker
+from conftest import SAMPLE_PASSWORD
+
+
+@pytest.fixture
+def coordinator(sample_image):
+    servers = []
+
+    def start(sources, unit_candidates=4, lease_secs=cracker.DIST_LEASE_SECS):
+        backend = cracker.VerifierBackend(None)
+        coord = cracker.Coordinator(sample_image, backend.offline_verifier(sample_image), sources, backend,
+                                    unit_candidates=unit_candidates, lease_secs=lease_secs)
+        server = cracker.serve_coordinator(coord, "127.0.0.1", 0, cracker.InputWatcher())
+        servers.append((coord, server))
+        return coord, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for coord, server in servers:
+        cracker.close_coordinator(coord, server)
+
+
+def wait_for(cond, timeout: float):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_worker_processes_find_the_password(tmp_path, coordinator):
+    words = [b"alpha", b"bravo", b"charlie", b"delta", b"echo", b"foxtrot", b"golf", b"hotel", b"india",
+             SAMPLE_PASSWORD, b"juliet", b"kilo"]
+    wordlist = tmp_path / "short.txt"
+    wordlist.write_bytes(b"".join(w + b"\n" for w in words))
+    coord, url = coordinator([str(wordlist)], unit_candidates=3)
+    assert len(coord.units) == 4
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=cracker.run_worker, args=(url, 1, f"w{i}")) for i in range(2)]
+    for p in procs:
+        p.start()
+    try:
+        wait_for(lambda: coord.found is not None, 60)
+        assert coord.found[0] == SAMPLE_PASSWORD
+        assert coord.found[1] in ("w0", "w1")
+        # both workers pick up the stop flag and exit cleanly
+        for p in procs:
+            p.join(15)
+            assert p.exitcode == 0
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+    assert set(coord.seen) == {"w0", "w1"}
+
+
+def test_expired_lease_is_reissued(coordinator):
+    coord, url = coordinator([cracker.MaskSource("?d?d")], unit_candidates=50, lease_secs=0.2)
+    first = cracker._dist_call(url, "/lease", {"worker": "slow"})["unit"]
+    assert (first["start"], first["stop"]) == (0, 50)
+    # a heartbeat keeps the lease
+    time.sleep(0.1)
+    assert not cracker._dist_call(url, "/progress", {"worker": "slow", "unit": first["id"], "checked": 5}).get("lost")
+    time.sleep(0.1)
+    assert cracker._dist_call(url, "/lease", {"worker": "fast"})["unit"]["id"] != first["id"]
+    # without one it goes to the next worker that asks
+    time.sleep(0.3)
+    again = cracker._dist_call(url, "/lease", {"worker": "fast"})["unit"]
+    assert again["id"] == first["id"]
+    assert coord.reissued >= 1
+    assert cracker._dist_call(url, "/progress", {"worker": "slow", "unit": first["id"], "checked": 9})["lost"]
+    for u in coord.units:
+        cracker._dist_call(url, "/done", {"worker": "fast", "unit": u["id"], "checked": 50})
+    assert cracker._dist_call(url, "/lease", {"worker": "fast"}) == {"stop": True}
+
+
+def hit(url, worker, unit, pwd):
+    while True:
+        r = cracker._dist_call(url, "/hit", {"worker": worker, "unit": unit, "password": pwd.hex()})
+        if not r.get("pending"):
+            return r
+        time.sleep(0.05)
+
+
+def test_confirmed_hit_stops_everyone(coordinator):
+    coord, url = coordinator([cracker.MaskSource("?d?d")], unit_candidates=10)
+    a = cracker._dist_call(url, "/lease", {"worker": "a"})["unit"]
+    b = cracker._dist_call(url, "/lease", {"worker": "b"})["unit"]
+    r = hit(url, "a", a["id"], b"wrong")
+    assert r == {"stop": False, "accepted": False}
+    assert not coord.stop.is_set()
+    r = hit(url, "a", a["id"], SAMPLE_PASSWORD)
+    assert r["accepted"] and r["stop"]
+    assert coord.found == (SAMPLE_PASSWORD, "a")
+    assert cracker._dist_call(url, "/progress", {"worker": "b", "unit": b["id"], "checked": 1})["stop"]
+    assert cracker._dist_call(url, "/lease", {"worker": "c"}) == {"stop": True}
+    assert cracker._dist_call(url, "/job")["stop"]
+
+
+def status_of(url, path, body=None):
+    try:
+        cracker._dist_call(url, path, body)
+    except urllib.error.HTTPError as e:
+        return e.code
+    return 200
+
+
+def test_bad_unit_ids_are_rejected(tmp_path, coordinator):
+    wordlist = tmp_path / "w.txt"
+    wordlist.write_bytes(b"one\ntwo\n")
+    coord, url = coordinator([str(wordlist), cracker.MaskSource("?d")], unit_candidates=100)
+    mask_unit = len(coord.units) - 1
+    assert status_of(url, "/data/0") == 200
+    assert cracker._dist_call(url, "/data/0") == b"one\ntwo\n"
+    assert status_of(url, "/data/999") == 404
+    assert status_of(url, f"/data/{mask_unit}") == 404
+    assert status_of(url, "/data/-1") == 400
+    assert status_of(url, "/data/abc") == 400
+    for path in ("/progress", "/done", "/hit"):
+        assert status_of(url, path, {"worker": "w", "unit": 999, "checked": 1, "password": "00"}) == 404
+        assert status_of(url, path, {"worker": "w", "unit": -1, "checked": 1, "password": "00"}) == 404
+        assert status_of(url, path, {"worker": "w"}) == 400
+    assert status_of(url, "/hit", {"worker": "w", "unit": 0, "password": "zz"}) == 400
+    assert status_of(url, "/progress", [1, 2]) == 400
+    with pytest.raises(urllib.error.HTTPError) as bad:
+        urllib.request.urlopen(urllib.request.Request(url + "/hit", data=b"not json"), timeout=5)
+    assert bad.value.code == 400
+    # the coordinator keeps serving
+    assert status_of(url, "/job") == 200
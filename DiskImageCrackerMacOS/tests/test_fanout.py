@@ -0,0 +1,77 @@
+import cracker
+
+WORDS = [b"w%03d" % i for i in range(200)]
+
+
+class RefuseFor(cracker.AttachBackend):
+    # confirming attach that is skipped ("b") for one image and accepts every other hit
+    def __init__(self, image):
+        self.image = image
+
+    def attach(self, image_path, pwd_bytes, watcher, stop_event):
+        return ("skip_bundle", False) if image_path == self.image else ("ok", True)
+
+
+def fanout(make_image, passwords, watcher=None, confirm=None):
+    targets = {}
+    for t, pw in enumerate(passwords):
+        image = make_image(f"img{t}", pw)
+        targets[t] = {"image": image, "status": "pending", "checked": 0}
+    backend = cracker.VerifierBackend(confirm(targets[0]["image"]) if confirm else None)
+    headers = {t: backend.offline_verifier(st["image"]).header for t, st in targets.items()}
+    log = {"batches": [], "commits": [], "found": []}
+    pool = cracker.VerifierPool(headers, 2)
+    pool.start()
+    try:
+        status = cracker.run_source_fanout(
+            pool, backend, targets, {}, ((w, i + 1) for i, w in enumerate(WORDS)), watcher or cracker.InputWatcher(),
+            lambda ts, n: log["batches"].append((tuple(ts), n)), log["commits"].append, log["found"].append)
+    finally:
+        pool.close()
+    return status, targets, log
+
+
+def test_found_image_drops_out_and_the_rest_continue(make_image):
+    status, targets, log = fanout(make_image, [b"w010", b"w100", b"absent"])
+    assert status == "ok"
+    assert [targets[t]["status"] for t in range(3)] == ["found", "found", "pending"]
+    assert (targets[0]["pwd"], targets[1]["pwd"]) == (b"w010", b"w100")
+    assert log["found"] == [0, 1]
+    # once found, an image only sees the batches already in flight; the list is still read to the end
+    inflight = 2 * cracker.POOL_INFLIGHT_PER_WORKER
+    assert sum(0 in ts for ts, _ in log["batches"]) <= 1 + inflight
+    assert sum(1 in ts for ts, _ in log["batches"]) <= 100 // cracker.POOL_BATCH_SIZE + 1 + inflight
+    assert log["batches"][-1][0] == (2,)
+    assert sum(n for ts, n in log["batches"] if 2 in ts) == len(WORDS)
+    assert log["commits"][-1] == len(WORDS)
+
+
+def test_skipped_image_drops_out_and_the_rest_continue(make_image):
+    watcher = cracker.InputWatcher()
+    watcher.skip_bundle.set()
+    status, targets, log = fanout(make_image, [b"w010", b"w150", b"absent"], watcher)
+    assert status == "ok"
+    assert [targets[t]["status"] for t in range(3)] == ["skipped", "found", "pending"]
+    assert log["found"] == [1]
+    assert sum(0 in ts for ts, _ in log["batches"]) <= 2 * cracker.POOL_INFLIGHT_PER_WORKER
+    assert not watcher.skip_bundle.is_set()
+    assert log["commits"][-1] == len(WORDS)
+
+
+def test_hit_skipped_during_its_confirm_leaves_the_others(make_image):
+    status, targets, log = fanout(make_image, [b"w010", b"w150", b"absent"], confirm=RefuseFor)
+    assert status == "ok"
+    assert [targets[t]["status"] for t in range(3)] == ["skipped", "found", "pending"]
+    assert log["commits"][-1] == len(WORDS)
+
+
+def test_crack_many_results_and_checkpoints(tmp_path, make_image, quiet):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_bytes(b"".join(w + b"\n" for w in WORDS))
+    images = [make_image("a", b"w042"), make_image("b", b"absent")]
+    store = cracker.CheckpointStore(str(tmp_path / "ckpt.json"))
+    results = cracker.crack_many(images, [str(wordlist)], cracker.InputWatcher(), workers=2,
+                                 backend=cracker.VerifierBackend(None), interactive=False, checkpoints=store)
+    assert results == {images[0]: "found", images[1]: "no_match"}
+    entry = store.get(cracker.checkpoint_key(cracker.image_identity(images[1]), str(wordlist)))
+    assert entry["done"] and entry["checked"] == len(WORDS)
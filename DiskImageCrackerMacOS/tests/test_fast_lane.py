@@ -0,0 +1,87 @@
+import datetime
+import os
+import plistlib
+
+import cracker
+
+
+class Recording(cracker.VerifierBackend):
+    def __init__(self):
+        super().__init__(None)
+        self.tried = []
+
+    def attach(self, image_path, pwd_bytes, watcher, stop_event):
+        self.tried.append(bytes(pwd_bytes))
+        return super().attach(image_path, pwd_bytes, watcher, stop_event)
+
+
+def test_generate_candidates_tiers():
+    out = list(cracker.generate_candidates(["Fido", "rex"], [2021]))
+    assert out[:8] == [b"Fido", b"fido", b"FIDO", b"rex", b"Rex", b"REX", b"Fido2021", b"Fido2021!"]
+    assert len(out) == len(set(out))
+    # then suffixes, leetspeak and pairs, and the bare years last
+    assert out.index(b"Fido21") < out.index(b"fido123") < out.index(b"f1d0") < out.index(b"Fidorex")
+    assert out[-2:] == [b"2021", b"21"]
+    assert b"Fido-rex" in out and b"FidoRex" in out
+
+
+def test_image_hints(tmp_path):
+    folder = tmp_path / "finance"
+    image = folder / "Tax_Return-2019.sparsebundle"
+    image.mkdir(parents=True)
+    (image / "Info.plist").write_bytes(plistlib.dumps({
+        "diskimage-bundle-type": "com.apple.diskimage.sparsebundle",
+        "uuid": "ABCD1234-0000-1111-2222-333344445555",
+        "created": datetime.datetime(2015, 6, 1)}))
+    words, years = cracker.image_hints(str(image))
+    assert words[:6] == ["Tax_Return-2019", "TaxReturn2019", "Tax", "Return", "2019", "finance"]
+    assert words[-2:] == ["ABCD1234-0000-1111-2222-333344445555", "ABCD1234"]
+    if cracker._pwd_db is not None:
+        assert cracker._pwd_db.getpwuid(os.stat(image).st_uid).pw_name in words
+    assert 2015 in years and datetime.date.today().year in years
+    assert years == sorted(years, reverse=True)
+
+
+def test_fast_lane_hints_come_first_and_are_capped(tmp_path, make_image, monkeypatch):
+    hints = tmp_path / "owner.txt"
+    hints.write_text("# the owner's dog\nbiscuit\n\nab\n")
+    image = make_image("holiday-photos", b"x")
+    lane = cracker.FastLane([image], hints=str(hints))
+    assert lane.candidates[:4] == [b"biscuit", b"Biscuit", b"BISCUIT", b"holiday-photos"]
+    # words under FAST_MIN_WORD letters are dropped
+    assert b"ab" not in lane.candidates
+    assert [pos for _, pos in lane.iter(lane.size - 2)] == [lane.size - 1, lane.size]
+    assert lane.label == "fast lane (holiday-photos)"
+    assert cracker.FastLane([image], hints=str(hints)).digest == lane.digest
+    assert cracker.FastLane([image]).digest != lane.digest
+    monkeypatch.setattr(cracker, "FAST_LANE_MAX", 50)
+    capped = cracker.FastLane([image], hints=str(hints))
+    assert capped.candidates == lane.candidates[:50] and capped.size == 50
+
+
+def test_fast_lane_finds_the_password_before_the_wordlists(tmp_path, make_image, quiet):
+    image = make_image("summer-trip", b"summertrip123")
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_bytes(b"alpha\nsummertrip123\n")
+    backend = Recording()
+    result = cracker.crack_bundle(image, [str(wordlist)], 1, cracker.InputWatcher(), backend=backend,
+                                  interactive=False, fast_settings={})
+    assert result == "found"
+    assert b"alpha" not in backend.tried
+    assert backend.tried[-1] == b"summertrip123"
+
+
+def test_wordlists_skip_what_the_fast_lane_tried(tmp_path, make_image, monkeypatch, quiet):
+    monkeypatch.chdir(tmp_path)
+    image = make_image("vault", b"not-in-any-list")
+    lane = cracker.FastLane([image])
+    overlap = [lane.candidates[0], lane.candidates[5], lane.candidates[-1]]
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_bytes(b"".join(w + b"\n" for w in [b"fresh1"] + overlap + [b"fresh2"]))
+    backend = Recording()
+    result = cracker.crack_bundle(image, [str(wordlist)], 1, cracker.InputWatcher(), backend=backend,
+                                  interactive=False, fast_settings={},
+                                  dedup_settings={"capacity": 10000, "fp_rate": 1e-6})
+    assert result == "no_match"
+    assert backend.tried[:lane.size] == lane.candidates
+    assert backend.tried[lane.size:] == [b"fresh1", b"fresh2"]
@@ -0,0 +1,104 @@
+import os
+import plistlib
+
+import pytest
+
+import cracker
+
+UUID = "10c66d69-45c0-44b9-b0c6-b740ea8f45a6"
+
+
+def bundle(path, token: bytes = None, kind="com.apple.diskimage.sparsebundle"):
+    path.mkdir(parents=True)
+    (path / "Info.plist").write_bytes(plistlib.dumps({"diskimage-bundle-type": kind, "band-size": 1 << 20,
+                                                      "uuid": f"uuid-{path.name}"}))
+    (path / "bands").mkdir()
+    if token is not None:
+        (path / "token").write_bytes(token)
+    return str(path)
+
+
+def test_probe_sample_image(sample_image):
+    info = cracker.probe_image(sample_image)
+    assert (info["kind"], info["encrypted"], info["uuid"], info["band_size"]) == ("sparsebundle", True, UUID, 8388608)
+    assert info["kdf"] == {"iterations": 222222, "key_bits": info["kdf"]["key_bits"], "salt_len": 20}
+    assert info["identity"] == f"uuid:{UUID}"
+
+
+def test_probe_flat_files(tmp_path):
+    def probe(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return cracker.probe_image(str(path))
+
+    info = probe("enc.dmg", cracker.synthetic_encrcdsa_token(b"x", 1234))
+    assert (info["kind"], info["encrypted"], info["kdf"]["iterations"]) == ("encrcdsa", True, 1234)
+    assert probe("s.sparseimage", b"sprs" + bytes(1000))["kind"] == "sparseimage"
+    info = probe("u.dmg", bytes(2000) + b"koly" + bytes(508))
+    assert (info["kind"], info["encrypted"]) == ("udif", False)
+    info = probe("v1.dmg", bytes(2000) + b"cdsaencr")
+    assert (info["kind"], info["encrypted"]) == ("cdsaencr", True)
+    assert probe("notes.txt", b"hello " * 200)["kind"] is None
+
+
+def test_probe_bundles(tmp_path):
+    info = cracker.probe_image(bundle(tmp_path / "plain.sparsebundle"))
+    assert (info["kind"], info["encrypted"], info["uuid"]) == ("sparsebundle", False, "uuid-plain.sparsebundle")
+    info = cracker.probe_image(bundle(tmp_path / "enc.sparsebundle", cracker.synthetic_encrcdsa_token(b"x", 77)))
+    assert (info["encrypted"], info["kdf"]["iterations"]) == (True, 77)
+    assert cracker.probe_image(bundle(tmp_path / "other", kind="something.else"))["kind"] is None
+    assert cracker.probe_image(str(tmp_path))["kind"] is None
+
+
+def test_index_caches_until_a_file_changes(tmp_path):
+    image = bundle(tmp_path / "a.sparsebundle", cracker.synthetic_encrcdsa_token(b"x", 10))
+    path = str(tmp_path / "images.json")
+    index = cracker.ImageIndex(path)
+    assert index.lookup(image)["kdf"]["iterations"] == 10
+    assert index.lookup(image)["kdf"]["iterations"] == 10
+    assert index.probed == 1
+    index.flush()
+
+    # a fresh process reads the cache from disk
+    index = cracker.ImageIndex(path)
+    assert index.lookup(image)["encrypted"]
+    assert index.probed == 0
+
+    # a new token (re-encrypted image) is probed again
+    token = os.path.join(image, "token")
+    with open(token, "wb") as f:
+        f.write(cracker.synthetic_encrcdsa_token(b"x", 20))
+    st = os.stat(token)
+    os.utime(token, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert index.lookup(image)["kdf"]["iterations"] == 20
+    assert index.probed == 1
+
+    assert index.lookup(str(tmp_path / "gone.dmg")) is None
+
+
+def test_found_flag_survives_a_reload(tmp_path, quiet):
+    image = bundle(tmp_path / "a.sparsebundle", cracker.synthetic_encrcdsa_token(b"x", 10))
+    plain = bundle(tmp_path / "b.sparsebundle")
+    path = str(tmp_path / "images.json")
+    cracker.ImageIndex(path).mark_found(image)
+    index = cracker.ImageIndex(path)
+    assert index.lookup(image)["found"]
+    assert cracker.settle_images([image, plain], index) == []
+    assert cracker.settle_images([image, plain], index, include_found=True) == [image]
+
+
+def test_scan_finds_images_and_reuses_the_cache(tmp_path, quiet):
+    root = tmp_path / "evidence"
+    a = bundle(root / "case1" / "a.sparsebundle", cracker.synthetic_encrcdsa_token(b"x", 10))
+    (root / "case2" / "deep").mkdir(parents=True)
+    flat = root / "case2" / "deep" / "disk.dmg"
+    flat.write_bytes(cracker.synthetic_encrcdsa_token(b"x", 10) + bytes(4096))
+    (root / "case2" / "tiny.dmg").write_bytes(b"encrcdsa")           # under 512 bytes: not considered
+    (root / "case2" / "notes.txt").write_bytes(b"text " * 200)       # considered, but not an image
+    bundle(root / ".hidden" / "h.sparsebundle", cracker.synthetic_encrcdsa_token(b"x", 10))
+    index = cracker.ImageIndex(str(tmp_path / "images.json"))
+    assert cracker.scan_images([str(root)], index) == [a, str(flat)]
+    probed = index.probed
+    assert probed == 3
+    assert cracker.scan_images([str(root)], index) == [a, str(flat)]
+    assert index.probed == probed
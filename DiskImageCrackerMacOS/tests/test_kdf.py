@@ -0,0 +1,23 @@
+import hashlib
+
+import pytest
+
+import cracker
+
+pytest.importorskip("numpy")
+
+PASSWORDS = [b"", b"a", b"password", b"x" * 63, b"y" * 64, b"z" * 65, bytes(range(200)), "pässwörd".encode()]
+
+
+@pytest.mark.parametrize("iterations, dklen", [(1, 20), (1, 24), (1, 7), (2, 41), (3, 1), (50, 24)])
+@pytest.mark.parametrize("salt", [bytes(range(20)), b"", bytes(range(60))])
+def test_pbkdf2_batch_matches_hashlib(iterations, dklen, salt):
+    keys = cracker.pbkdf2_hmac_sha1_batch(PASSWORDS, salt, iterations, dklen)
+    assert keys.shape == (len(PASSWORDS), dklen)
+    for j, pwd in enumerate(PASSWORDS):
+        assert keys[j].tobytes() == hashlib.pbkdf2_hmac("sha1", pwd, salt, iterations, dklen), pwd
+
+
+def test_pbkdf2_batch_cancel():
+    assert cracker.pbkdf2_hmac_sha1_batch([b"a", b"b"], b"salt", cracker.KDF_CANCEL_EVERY + 1, 24, lambda: True) is None
+
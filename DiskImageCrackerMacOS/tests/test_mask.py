@@ -0,0 +1,75 @@
+import pytest
+
+import cracker
+
+
+def index_of(mask, candidate: bytes) -> int:
+    i = 0
+    for cs, ch in zip(mask.charsets, candidate):
+        i = i * len(cs) + cs.index(ch)
+    return i
+
+
+@pytest.mark.parametrize("vector", [True, False])
+def test_index_candidate_round_trip(vector):
+    mask = cracker.MaskSource("?1?d?l", {"1": "Ab"})
+    if not vector:
+        mask._vector = False
+    assert mask.keyspace == 2 * 10 * 26
+    seen = set()
+    for cand, pos in mask.iter():
+        cand = bytes(cand)
+        i = pos - 1
+        assert cand == mask.candidate(i)
+        assert index_of(mask, cand) == i
+        seen.add(cand)
+    assert len(seen) == mask.keyspace
+    assert mask.candidate(0) == b"A0a" and mask.candidate(mask.keyspace - 1) == b"b9z"
+
+
+def test_vector_and_scalar_fill_agree():
+    pytest.importorskip("numpy")
+    fast = cracker.MaskSource("?u?d?s?h")
+    slow = cracker.MaskSource("?u?d?s?h")
+    slow._vector = False
+    assert [bytes(c) for c, _ in fast.iter(1234)] == [bytes(c) for c, _ in slow.iter(1234)]
+
+
+def test_shards_partition_the_keyspace():
+    mask = cracker.MaskSource("?d?d?d")
+    cuts = [0, 1, 250, 999, 1000]
+    parts = []
+    for a, b in zip(cuts, cuts[1:]):
+        shard = mask.shard(a, b)
+        assert shard.size == b - a
+        got = list(shard.iter())
+        assert [p for _, p in got] == list(range(a + 1, b + 1))
+        parts.extend(bytes(c) for c, _ in got)
+    assert parts == [b"%03d" % i for i in range(1000)]
+
+
+def test_shard_resume_and_bounds():
+    shard = cracker.MaskSource("?d?d").shard(10, 20)
+    assert [bytes(c) for c, _ in shard.iter(15)] == [b"15", b"16", b"17", b"18", b"19"]
+    assert list(shard.iter(20)) == []
+    for a, b in ((-1, 5), (5, 4), (0, 101)):
+        with pytest.raises(ValueError):
+            cracker.MaskSource("?d?d", start=a, stop=b)
+
+
+def test_literals_and_escapes():
+    mask = cracker.MaskSource("x??y?d")
+    assert mask.keyspace == 10
+    assert mask.candidate(7) == b"x?y7"
+
+
+def test_skip_prompt_names_the_source(make_image, monkeypatch, capsys):
+    # answering "s" at the long-ETA prompt reports the mask by its label, not its repr
+    image = make_image("img", b"absent")
+    monkeypatch.setattr(cracker, "prompt_skip_or_jump_if_slow", lambda *a: "skip")
+    result = cracker.crack_bundle(image, [cracker.MaskSource("?d?d")], 1, cracker.InputWatcher(),
+                                  backend=cracker.VerifierBackend(None))
+    assert result == "no_match"
+    out = capsys.readouterr().out
+    assert "Skipping mask ?d?d by request." in out
+    assert "object at 0x" not in out
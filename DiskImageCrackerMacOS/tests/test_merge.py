@@ -0,0 +1,46 @@
+import cracker
+
+
+def write(path, lines):
+    path.write_bytes(b"".join(line + b"\n" for line in lines))
+    return str(path)
+
+
+def scores(merge, ranks_seen):
+    return [merge.lists[i]["zipf"] / (r + 1) for i, r in ranks_seen]
+
+
+def test_merge_order_and_coverage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    a = write(tmp_path / "a.txt", [b"a%d" % i for i in range(5)])
+    b = write(tmp_path / "b.txt", [b"b%d" % i for i in range(40)])
+    merge = cracker.MergedSource([(a, 1.0, False), (b, 1.0, False)])
+    out = list(merge.iter())
+    lines = [bytes(line) for line, _ in out]
+    assert sorted(lines) == sorted([b"a%d" % i for i in range(5)] + [b"b%d" % i for i in range(40)])
+    # each list stays in its own order, and the stream is in descending score
+    assert [x for x in lines if x.startswith(b"a")] == [b"a%d" % i for i in range(5)]
+    seen = [(0 if x.startswith(b"a") else 1, int(x[1:])) for x in lines]
+    s = scores(merge, seen)
+    assert s == sorted(s, reverse=True)
+    # the short list's head outranks the long list's: its scale is 1/H(5) vs 1/H(40)
+    assert lines[0] == b"a0"
+    assert out[-1][1] == merge.stop
+
+
+def test_merge_resume_continues_the_stream(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    a = write(tmp_path / "a.txt", [b"a%d" % i for i in range(7)])
+    b = write(tmp_path / "b.txt", [b"b%d" % i for i in range(9)])
+    merge = cracker.MergedSource([(a, 2.0, False), (b, 1.0, False)])
+    out = [(bytes(line), pos) for line, pos in merge.iter()]
+    for k in (1, 5, len(out) - 1):
+        assert [(bytes(line), pos) for line, pos in merge.iter(out[k - 1][1])] == out[k:]
+    assert merge.unpack(merge.pack([3, 4])) == [3, 4]
+
+
+def test_counts_list_orders_by_count(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    c = write(tmp_path / "c.txt", [b"100:top", b"90:second", b"1:rare"])
+    merge = cracker.MergedSource([(c, 1.0, True)])
+    assert [bytes(line) for line, _ in merge.iter()] == [b"top", b"second", b"rare"]
@@ -0,0 +1,73 @@
+import json
+import time
+
+import cracker
+
+
+def dash(**extra):
+    d = {"start": time.time(), "checked": 0, "total": 1000, "skipped": 0, "image": "a.sparsebundle",
+         "label": "rockyou.txt"}
+    d.update(extra)
+    return d
+
+
+def test_prometheus_text():
+    text = cracker.prometheus_text({"image": 'we"ird\\name\n', "source": "s.txt", "checked": 5, "total": 10,
+                                    "rate": 2.5, "utilization": None})
+    lines = text.splitlines()
+    labels = 'image="we\\"ird\\\\name\\n",source="s.txt"'
+    assert "# HELP cracker_candidates_checked Candidates verified from the current source" in lines
+    assert "# TYPE cracker_candidates_checked gauge" in lines
+    assert f"cracker_candidates_checked{{{labels}}} 5" in lines
+    assert f"cracker_candidates_total{{{labels}}} 10" in lines
+    assert f"cracker_rate{{{labels}}} 2.5" in lines
+    # missing and None values are left out rather than exported as 0
+    assert not any("utilization" in line or "concurrency" in line for line in lines)
+    assert text.endswith("\n")
+    samples = [line for line in lines if not line.startswith("#")]
+    assert len(samples) == 3 and len(lines) == 9
+
+
+def test_reporter_writes_json_lines(tmp_path):
+    path = tmp_path / "run.jsonl"
+    d = dash()
+    exporter = cracker.MetricsExporter(str(path), interval=3600)
+    with cracker.MetricsReporter(d, exporter=exporter, skipped=lambda: 7, refresh=50) as reporter:
+        d["checked"] = 100
+        time.sleep(0.1)
+        # the interval has not passed, so only the first sample was written
+        assert len(path.read_text().splitlines()) == 1
+        d["checked"] = 400
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(rows) == 2
+    last = rows[-1]
+    assert (last["image"], last["source"], last["checked"], last["total"], last["skipped"]) == \
+        ("a.sparsebundle", "rockyou.txt", 400, 1000, 7)
+    assert last["source_progress"] == round(407 / 1000, 6)
+    assert last["ewma_rate"] > 0 and last["rate"] > 0
+    assert last["utilization"] is None
+    assert reporter.sample()["checked"] == 400
+
+
+def test_reporter_rewrites_the_prom_file(tmp_path):
+    path = tmp_path / "cracker.prom"
+    d = dash()
+    exporter = cracker.MetricsExporter(str(path), interval=0)
+    with cracker.MetricsReporter(d, exporter=exporter, refresh=50):
+        d["checked"] = 250
+        time.sleep(0.1)
+    text = path.read_text()
+    assert text.count("# TYPE cracker_candidates_checked gauge") == 1
+    assert 'cracker_candidates_checked{image="a.sparsebundle",source="rockyou.txt"} 250' in text
+    assert 'cracker_source_progress_ratio{image="a.sparsebundle",source="rockyou.txt"} 0.25' in text
+
+
+def test_ewma_follows_the_rate():
+    d = dash()
+    reporter = cracker.MetricsReporter(d, refresh=1000)
+    for _ in range(5):
+        time.sleep(0.02)
+        d["checked"] += 20
+        reporter.tick()
+    # 20 candidates per 20 ms during warm-up is about 1000/s
+    assert 200 < d["ewma"] < 1100
@@ -0,0 +1,83 @@
+import os
+from threading import Event
+
+import pytest
+
+import cracker
+
+
+@pytest.fixture
+def hdiutil(tmp_path, monkeypatch):
+    script = tmp_path / "hdiutil"
+    script.write_text(cracker.FAKE_HDIUTIL)
+    script.chmod(0o755)
+    state = tmp_path / "mounts"
+    monkeypatch.setenv("FAKE_HDIUTIL_STATE", str(state))
+    monkeypatch.setenv("FAKE_HDIUTIL_PASSWORD", "right")
+    monkeypatch.setenv("FAKE_HDIUTIL_LATENCY", "0")
+    return str(script), state
+
+
+def image(tmp_path, name="a.dmg"):
+    path = tmp_path / name
+    path.write_bytes(b"")
+    return str(path)
+
+
+def attach(script, registry, img, pwd):
+    return cracker.HdiutilBackend(1, script, registry).attach(img, pwd, cracker.InputWatcher(), Event())
+
+
+def test_attach_records_and_detach_removes_by_device(tmp_path, hdiutil):
+    script, state = hdiutil
+    registry = cracker.MountRegistry(script)
+    a, b = image(tmp_path, "a.dmg"), image(tmp_path, "b.dmg")
+    assert attach(script, registry, a, b"wrong") == ("ok", False)
+    assert registry.devices == {}
+    assert attach(script, registry, a, b"right") == ("ok", True)
+    assert attach(script, registry, b, b"right") == ("ok", True)
+    devs_a = registry.devices[os.path.realpath(a)]
+    whole = min(devs_a)
+    assert devs_a == {whole, whole + "s1"}
+    assert len(cracker.hdiutil_mounts(script)) == 2
+
+    # only a's whole disk is detached; b stays mounted and recorded
+    assert registry.detach(a) == []
+    assert [img for img, _ in cracker.hdiutil_mounts(script)] == [b]
+    assert list(registry.devices) == [os.path.realpath(b)]
+    registry.shutdown()
+    assert cracker.hdiutil_mounts(script) == []
+    assert registry.devices == {}
+
+
+def test_adopt_picks_up_mounts_from_an_earlier_run(tmp_path, hdiutil):
+    script, state = hdiutil
+    a = image(tmp_path)
+    state.write_text(f"/dev/disk71 {a}\n/dev/disk72 /elsewhere/other.dmg\n")
+    registry = cracker.MountRegistry(script)
+    registry.adopt([a])
+    assert registry.devices == {os.path.realpath(a): {"/dev/disk71"}}
+    assert registry.detach(a) == []
+    assert state.read_text() == "/dev/disk72 /elsewhere/other.dmg\n"
+
+
+def test_unreadable_attach_output_is_adopted_on_release(tmp_path, hdiutil):
+    script, state = hdiutil
+    a = image(tmp_path)
+    state.write_text(f"/dev/disk73 {a}\n")
+    registry = cracker.MountRegistry(script)
+    registry.record_attach_output(a, b"not a plist")
+    assert registry.suspects == {os.path.realpath(a)}
+    registry.release(a)
+    assert registry.suspects == set()
+    assert state.read_text() == ""
+
+
+def test_detach_reports_devices_that_will_not_go(tmp_path, hdiutil):
+    script, state = hdiutil
+    a = image(tmp_path)
+    registry = cracker.MountRegistry(script)
+    registry.record(a, ["/dev/disk74s2"])
+    # the fake refuses devices it did not mount, with or without -force
+    assert registry.detach(a) == ["/dev/disk74"]
+    assert registry.devices == {}
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+
+import pytest
+
+import cracker
+
+
+def header(password: bytes, iterations: int) -> dict:
+    return cracker.parse_encrcdsa_header(cracker.synthetic_encrcdsa_token(password, iterations))
+
+
+def numbered(words):
+    return ((w, i + 1) for i, w in enumerate(words))
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def start(headers, workers=1):
+        pool = cracker.VerifierPool(headers, workers)
+        pool.start()
+        pools.append(pool)
+        return pool
+
+    yield start
+    for pool in pools:
+        pool.close()
+
+
+def test_first_hit_is_returned(make_pool):
+    pool = make_pool({0: header(b"needle", 100)}, workers=2)
+    words = [b"hay%d" % i for i in range(200)]
+    words[137] = b"needle"
+    words[180] = b"needle"
+    seen = []
+    status, found = cracker.run_source_pooled(pool, cracker.VerifierBackend(None), "synthetic", numbered(words),
+                                              cracker.InputWatcher(), lambda n, pos, committed: seen.append(n))
+    assert (status, found) == ("found", b"needle")
+    assert sum(seen) >= 138
+
+
+def test_no_hit_commits_every_candidate(make_pool):
+    pool = make_pool({0: header(b"needle", 100)}, workers=2)
+    committed = []
+    status, found = cracker.run_source_pooled(pool, cracker.VerifierBackend(None), "synthetic",
+                                              numbered([b"hay%d" % i for i in range(100)]), cracker.InputWatcher(),
+                                              lambda n, pos, c: committed.append((pos, c)))
+    assert (status, found) == ("ok", None)
+    assert committed[-1] == (100, 100)
+
+
+@pytest.mark.parametrize("event", ["skip_file", "skip_bundle", "quit_all"])
+def test_cancel_reaches_the_workers(make_pool, event):
+    # one uncancelled batch would hold the worker for several seconds, longer than
+    # the pool's drain timeout, so a quick return means the workers stopped
+    pool = make_pool({0: header(b"needle", 400000)})
+    watcher = cracker.InputWatcher()
+    result = {}
+
+    def run():
+        result["r"] = cracker.run_source_pooled(pool, cracker.VerifierBackend(None), "synthetic",
+                                                numbered(b"hay%d" % i for i in range(10 ** 6)), watcher,
+                                                lambda *a: None)
+        result["t"] = time.perf_counter()
+
+    t = threading.Thread(target=run)
+    t.start()
+    time.sleep(0.5)
+    t0 = time.perf_counter()
+    getattr(watcher, event).set()
+    t.join(10)
+    assert not t.is_alive()
+    assert result["r"] == (event.replace("_all", ""), None)
+    assert result["t"] - t0 < 1.5
+    # the worker is free again at once
+    pool.submit([b"x"])
+    assert pool.get_result(2.0)[1] == 1
+
+
+def test_worker_exception_raises_pool_error(make_pool, monkeypatch):
+    def boom(self, passwords, cancel=None):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(cracker.EncrcdsaVerifier, "check_batch", boom)
+    pool = make_pool({0: header(b"needle", 10)})
+    with pytest.raises(cracker.PoolError, match="boom"):
+        cracker.run_source_pooled(pool, cracker.VerifierBackend(None), "synthetic", numbered([b"a", b"b"]),
+                                  cracker.InputWatcher(), lambda *a: None)
+
+
+def test_dead_worker_raises_pool_error(make_pool, monkeypatch):
+    def die(self, passwords, cancel=None):
+        os._exit(3)
+
+    monkeypatch.setattr(cracker.EncrcdsaVerifier, "check_batch", die)
+    pool = make_pool({0: header(b"needle", 10)})
+    t0 = time.perf_counter()
+    with pytest.raises(cracker.PoolError, match="exit code 3"):
+        cracker.run_source_pooled(pool, cracker.VerifierBackend(None), "synthetic", numbered([b"a", b"b"]),
+                                  cracker.InputWatcher(), lambda *a: None)
+    assert time.perf_counter() - t0 < 5
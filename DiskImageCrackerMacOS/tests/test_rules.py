@@ -0,0 +1,56 @@
+import pytest
+
+import cracker
+
+# examples from the hashcat rule-based attack documentation, applied to "p@ssW0rd"
+HASHCAT = [
+    (":", "p@ssW0rd"), ("l", "p@ssw0rd"), ("u", "P@SSW0RD"), ("c", "P@ssw0rd"), ("C", "p@SSW0RD"),
+    ("t", "P@SSw0RD"), ("T3", "p@sSW0rd"), ("r", "dr0Wss@p"), ("d", "p@ssW0rdp@ssW0rd"),
+    ("p2", "p@ssW0rdp@ssW0rdp@ssW0rd"), ("f", "p@ssW0rddr0Wss@p"), ("{", "@ssW0rdp"), ("}", "dp@ssW0r"),
+    ("$1$2", "p@ssW0rd12"), ("^2^1", "12p@ssW0rd"), ("[", "@ssW0rd"), ("]", "p@ssW0r"), ("D3", "p@sW0rd"),
+    ("x04", "p@ss"), ("O12", "psW0rd"), ("i4!", "p@ss!W0rd"), ("o3$", "p@s$W0rd"), ("'6", "p@ssW0"),
+    ("ss$", "p@$$W0rd"), ("@s", "p@W0rd"), ("z2", "ppp@ssW0rd"), ("Z2", "p@ssW0rddd"), ("q", "pp@@ssssWW00rrdd"),
+    ("k", "@pssW0rd"), ("K", "p@ssW0dr"), ("*34", "p@sWs0rd"), ("y2", "p@p@ssW0rd"), ("Y2", "p@ssW0rdrd"),
+]
+
+
+def apply(rule: str, word: str) -> str:
+    return cracker.compile_rule(cracker.parse_rule(rule))(word.encode()).decode()
+
+
+@pytest.mark.parametrize("rule, expected", HASHCAT)
+def test_hashcat_examples(rule, expected):
+    assert apply(rule, "p@ssW0rd") == expected
+
+
+def test_title_case():
+    assert apply("E", "p@ssW0rd w0rld") == "P@ssw0rd W0rld"
+
+
+def test_composed_functions():
+    # substitutions run in order, so the second sees the first's output
+    assert apply("sa@ s@a", "abc@") == "abca"
+    assert apply("c $2 $0 $2 $5 ^!", "summer") == "!Summer2025"
+    assert apply("l sa4 se3 $!", "Base") == "b4s3!"
+
+
+def test_positions_past_the_end_leave_the_word():
+    for rule in ("D9", "T9", "x39", "O39", "i9!", "o9!", "*09", "y9", "Y9"):
+        assert apply(rule, "abc") == "abc", rule
+
+
+def test_bad_rules():
+    for rule in ("$", "Q", "Ta", "x0"):
+        with pytest.raises(ValueError):
+            cracker.compile_rule(cracker.parse_rule(rule))
+    with pytest.raises(ValueError):
+        cracker.RuleSet(["# only a comment", ""])
+
+
+def test_ruleset_expand_positions():
+    rules = cracker.RuleSet([":", "u", "$1"])
+    assert rules.keyspace(2) == 6
+    out = list(rules.expand([(b"ab", 3), (b"cd", 6)], start=0))
+    # only a word's last rule reports its end offset
+    assert out == [(b"ab", 0), (b"AB", 0), (b"ab1", 3), (b"cd", 3), (b"CD", 3), (b"cd1", 6)]
+    assert rules.expand_batch([b"ab"]) == [b"ab", b"AB", b"ab1"]
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import cracker
+
+
+def write_words(path, n):
+    path.write_bytes(b"".join(b"w%d\n" % i for i in range(n)))
+    return str(path)
+
+
+@pytest.fixture
+def job(tmp_path, make_image, monkeypatch):
+    monkeypatch.setattr(cracker, "kdf_seconds_per_iteration", lambda *a: 1e-6)
+    make_image("cheap", b"x", 100)
+    make_image("dear", b"x", 10000)
+    write_words(tmp_path / "small.txt", 20)
+    write_words(tmp_path / "big.txt", 3000)
+    write_words(tmp_path / "likely.txt", 1000)
+    spec = {"images": ["cheap.sparsebundle", "dear.sparsebundle"],
+            "sources": ["small.txt", "big.txt", {"path": "likely.txt", "yield": 500}, {"mask": "?d?d"}],
+            "fast_lane": False}
+    path = tmp_path / "job.json"
+    path.write_text(json.dumps(spec))
+    return cracker.load_job(str(path))
+
+
+def ranked(images):
+    # every (image, source) pair in the order of expected time-to-hit
+    pairs = [(cracker.pair_priority(st, p), img.rsplit("/", 1)[-1].split(".")[0], cracker.source_label(p["source"]))
+             for img, st in images.items() for p in st["pairs"]]
+    return [(img, src.rsplit("/", 1)[-1]) for _, img, src in sorted(pairs)]
+
+
+def test_pairs_are_ranked_by_cost_over_yield(tmp_path, job):
+    store = cracker.CheckpointStore(str(tmp_path / "ckpt.json"))
+    images = cracker.plan_schedule(job, cracker.VerifierBackend(None), store, workers=1)
+    cheap, dear = images.values()
+    assert dear["cost"] == pytest.approx(100 * cheap["cost"])
+    # left x cost / yield: 2e-4, 2e-3, 1e-2, 2e-2, 0.2, 0.3, 1, 30 seconds
+    assert ranked(images) == [
+        ("cheap", "likely.txt"), ("cheap", "small.txt"), ("cheap", "mask ?d?d"), ("dear", "likely.txt"),
+        ("dear", "small.txt"), ("cheap", "big.txt"), ("dear", "mask ?d?d"), ("dear", "big.txt"),
+    ]
+    assert [p["left"] for p in cheap["pairs"]] == [20, 3000, 1000, 100]
+
+
+def test_checkpoints_shrink_and_drop_pairs(tmp_path, job):
+    store = cracker.CheckpointStore(str(tmp_path / "ckpt.json"))
+    cheap, dear = job["images"]
+    cheap_id = cracker.image_identity(cheap)
+    store.update(cracker.checkpoint_key(cheap_id, str(tmp_path / "big.txt")), 0, 2995)
+    store.update(cracker.checkpoint_key(cheap_id, str(tmp_path / "small.txt")), 0, 20, done=True)
+    images = cracker.plan_schedule(job, cracker.VerifierBackend(None), store, workers=1)
+    pairs = {cracker.source_label(p["source"]).rsplit("/", 1)[-1]: p["left"] for p in images[cheap]["pairs"]}
+    assert pairs == {"big.txt": 5, "likely.txt": 1000, "mask ?d?d": 100}
+    # with five candidates left, cheap's big list moves up to second
+    assert ranked(images)[:2] == [("cheap", "likely.txt"), ("cheap", "big.txt")]
+    # without resume the checkpoints are ignored
+    job["resume"] = False
+    images = cracker.plan_schedule(job, cracker.VerifierBackend(None), store, workers=1)
+    assert len(images[cheap]["pairs"]) == 4
+
+
+def test_attach_only_images(tmp_path, job, quiet):
+    plain = tmp_path / "plain.dmg"
+    plain.write_bytes(b"")
+    job["images"].append(str(plain))
+    store = cracker.CheckpointStore(str(tmp_path / "ckpt.json"))
+    # no verifier and no way to attach: left out of the plan
+    assert str(plain) not in cracker.plan_schedule(job, cracker.VerifierBackend(None), store, workers=1)
+    images = cracker.plan_schedule(job, cracker.VerifierBackend(cracker.FakeBackend()), store, workers=1)
+    assert images[str(plain)]["cost"] == cracker.SCHED_ATTACH_SECS
+    assert images[str(plain)]["verifier"] is None
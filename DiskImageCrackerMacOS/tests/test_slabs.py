@@ -0,0 +1,80 @@
+import queue
+import threading
+
+import pytest
+
+import cracker
+
+
+def test_slab_round_trip():
+    ring = cracker.SlabRing(2, 256)
+    try:
+        batch = [b"alpha", b"", b"\xff\x00bin", b"x" * 50]
+        slab = ring.pack(batch)
+        assert slab is not None
+        assert cracker.read_slab(ring.bufs[slab]) == batch
+        views = cracker.attach_slabs(ring.names)
+        try:
+            assert cracker.read_slab(views[slab].buf) == batch
+        finally:
+            for v in views:
+                v.close()
+    finally:
+        ring.close()
+
+
+def test_slab_fallbacks_and_release():
+    ring = cracker.SlabRing(1, 64)
+    try:
+        assert ring.pack([b"x" * 60]) is None          # does not fit
+        assert ring.pack([b"a\nb"]) is None            # would split into two candidates
+        slab = ring.pack([b"one", b"two"])
+        assert slab == 0
+        assert ring.pack([b"three"]) is None           # no free slab
+        ring.release(slab)
+        slab = ring.pack([b"three"])
+        assert cracker.read_slab(ring.bufs[slab]) == [b"three"]
+    finally:
+        ring.close()
+
+
+ATTACH = cracker.attach_slabs
+
+
+class Tracking:
+    # records the handles a worker attaches so the test can see whether it closed them
+    def __init__(self, monkeypatch):
+        self.handles = []
+        monkeypatch.setattr(cracker, "attach_slabs", lambda names: self.handles.extend(ATTACH(names)) or self.handles)
+
+    def all_closed(self):
+        return bool(self.handles) and all(h.buf is None for h in self.handles)
+
+
+def test_workers_close_their_slab_handles(monkeypatch):
+    header = cracker.parse_encrcdsa_header(cracker.synthetic_encrcdsa_token(b"pw", 10))
+    ring = cracker.SlabRing(2, 256)
+    try:
+        for worker, task in ((cracker._transport_worker, (0, 0)), (cracker._pool_worker, (0, 0, (0,)))):
+            tracking = Tracking(monkeypatch)
+            tasks, results = queue.Queue(), queue.Queue()
+            ring.pack([b"pw", b"other"])
+            tasks.put(task)
+            tasks.put(None)
+            if worker is cracker._pool_worker:
+                worker({0: header}, tasks, results, threading.Event(), ring.names)
+            else:
+                worker(tasks, results, ring.names)
+            assert results.get_nowait()[1] == 2
+            assert tracking.all_closed()
+            ring.release(0)
+
+        # and when the loop ends with an exception
+        tracking = Tracking(monkeypatch)
+        tasks = queue.Queue()
+        tasks.put(("not", "a", "task", "tuple"))
+        with pytest.raises(ValueError):
+            cracker._transport_worker(tasks, queue.Queue(), ring.names)
+        assert tracking.all_closed()
+    finally:
+        ring.close()
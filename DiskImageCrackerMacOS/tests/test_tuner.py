@@ -0,0 +1,87 @@
+import pytest
+
+import cracker
+
+
+def tuner(start, low=1, high=8, **kw):
+    return cracker.ConcurrencyTuner(None, "test", low, high, start, **kw)
+
+
+def test_steps_up_while_adding_helps():
+    t = tuner(1)
+    visited = []
+    for _ in range(7):
+        visited.append(t.level)
+        t.adjust(10.0 * t.level)
+    assert visited == [1, 2, 3, 4, 5, 6, 7]
+    assert t.level == 8 and t.best_level == 7
+
+
+def test_steps_back_down_and_settles_on_the_peak():
+    curve = {2: 15.0, 3: 17.0, 4: 20.0, 5: 17.0, 6: 16.0}
+    t = tuner(4)
+    visited = []
+    for _ in range(8):
+        visited.append(t.level)
+        t.adjust(curve[t.level])
+    # up to 5 (worse), back to 4, down to 3 (worse), back to 4 and stay
+    assert visited[:5] == [4, 5, 4, 3, 4]
+    assert set(visited[5:]) == {4}
+    assert t.best_level == 4
+
+
+def test_prefers_fewer_when_rates_are_within_the_margin():
+    t = tuner(3)
+    t.adjust(20.0)
+    assert t.level == 4
+    t.adjust(20.0 * (1 + cracker.TUNE_MARGIN / 2))
+    # 4 is barely better than 3, so the tuner drops back to 3
+    assert t.level == 3
+
+
+def test_collapse_after_a_step_up_halves_the_level():
+    t = tuner(6, high=16)
+    t.adjust(60.0)
+    assert t.level == 7
+    t.adjust(60.0 * (1 - cracker.TUNE_DROP) - 1)
+    assert t.level == 3
+    assert "halved" in t.note
+    t = tuner(1, high=4)
+    t.adjust(10.0)
+    t.adjust(1.0)
+    assert t.level == 1
+
+
+@pytest.mark.parametrize("name", sorted(cracker.BENCH_TUNE_CURVES))
+def test_simulated_curves(name):
+    curve, optimum = cracker.BENCH_TUNE_CURVES[name]
+    t = tuner(1, high=12)
+    for _ in range(30):
+        t.adjust(curve(t.level))
+    assert curve(t.best_level) >= 0.9 * curve(optimum)
+    assert abs(t.level - optimum) <= 1
+
+
+def test_record_waits_for_a_full_window():
+    now = [0.0]
+    t = tuner(2, clock=lambda: now[0])
+    for _ in range(cracker.TUNE_MIN_EVENTS - 1):
+        now[0] += cracker.TUNE_WINDOW_SECS
+        t.record(5)
+    assert t.windows == 0 and t.level == 2
+    t.record(5)
+    assert t.windows == 1 and t.level == 3
+    assert t.rates[2] == pytest.approx(5 * cracker.TUNE_MIN_EVENTS / (cracker.TUNE_WINDOW_SECS * (cracker.TUNE_MIN_EVENTS - 1)))
+
+
+def test_store_starts_from_the_saved_best(tmp_path):
+    path = str(tmp_path / "tuning.json")
+    store = cracker.TuningStore(path)
+    t = store.tuner("hdiutil", 1, 8, 2)
+    assert store.active is t
+    for rate in (10.0, 30.0, 20.0):
+        t.adjust(rate)
+    store.save()
+    again = cracker.TuningStore(path).tuner("hdiutil", 1, 8, 2)
+    assert again.level == t.best_level == 3
+    assert cracker.TuningStore(path).tuner("verifier-hashlib", 1, 8, 2).level == 2
@@ -0,0 +1,37 @@
+import pytest
+
+import cracker
+from conftest import SAMPLE_PASSWORD
+
+
+def test_sample_image_header(sample_image):
+    verifier = cracker.load_verifier(sample_image)
+    assert verifier is not None
+    assert verifier.header["version"] == 2
+    assert verifier.iterations == 222222
+    assert len(verifier.salt) == 20
+
+
+def test_sample_image_password(sample_image):
+    verifier = cracker.load_verifier(sample_image)
+    assert verifier.check(SAMPLE_PASSWORD)
+    assert not verifier.check(b"Test")
+    assert verifier.check_batch([b"wrong", SAMPLE_PASSWORD, b""]) == [1]
+
+
+def test_synthetic_header_round_trip():
+    header = cracker.parse_encrcdsa_header(cracker.synthetic_encrcdsa_token(b"hunter2", 50))
+    verifier = cracker.EncrcdsaVerifier(header)
+    assert header["iterations"] == 50
+    assert verifier.check_batch([b"hunter1", b"hunter2", b"hunter22"]) == [1]
+    assert verifier.check_batch([b"a", b"b"], lambda: True) is None
+
+
+def test_header_json_round_trip():
+    header = cracker.parse_encrcdsa_header(cracker.synthetic_encrcdsa_token(b"x", 10))
+    assert cracker.header_from_json(cracker.header_to_json(header)) == header
+
+
+def test_not_an_encrcdsa_header():
+    with pytest.raises(ValueError):
+        cracker.parse_encrcdsa_header(b"\0" * 512)
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+import cracker
+
+
+def offsets(data: bytes):
+    # offset of the start of every line, the way a reader counts them
+    out, pos = [0], 0
+    while True:
+        pos = data.find(b"\n", pos) + 1
+        if pos == 0:
+            return out
+        out.append(pos)
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\n",
+    b"one\n",
+    b"one",
+    b"alpha\nbravo\n\ncharlie\r\ndelta",
+    b"".join(b"w%d\n" % i for i in range(500)),
+    b"x" * 100 + b"\n" + b"y" * 40,
+])
+def test_counts_and_offsets(tmp_path, data):
+    path = tmp_path / "w.txt"
+    path.write_bytes(data)
+    # a tiny block so lines straddle block boundaries
+    idx = cracker.WordlistIndex.build(str(path), os.stat(path), block=16)
+    starts = offsets(data)
+    assert idx.lines == data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+    for n, off in enumerate(starts):
+        assert idx.offset_of_line(n) == off
+    assert idx.offset_of_line(len(starts) + 5) == len(data)
+    assert idx.offset_of_line(-1) == 0
+
+
+def test_index_is_cached_and_rebuilt_on_change(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    builds = []
+    build = cracker.WordlistIndex.build.__func__
+    monkeypatch.setattr(cracker.WordlistIndex, "build",
+                        classmethod(lambda cls, *a, **k: builds.append(a[0]) or build(cls, *a, **k)))
+    path = tmp_path / "w.txt"
+    path.write_bytes(b"a\nb\nc\n")
+    assert cracker.wordlist_index(str(path)).lines == 3
+    assert cracker.wordlist_index(str(path)).lines == 3
+    assert len(builds) == 1
+
+    # same size, new mtime
+    path.write_bytes(b"a\nb\n\n\n")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert cracker.wordlist_index(str(path)).lines == 4
+    assert len(builds) == 2
+
+    # new size, mtime forced back to the old one
+    st = os.stat(path)
+    path.write_bytes(b"a\nb\nc\nd\ne\n")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cracker.wordlist_index(str(path)).lines == 5
+    assert len(builds) == 3
+    assert cracker.wordlist_index(str(path)).lines == 5
+    assert len(builds) == 3
+
+
+def test_corrupt_index_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "w.txt"
+    path.write_bytes(b"a\nb\n")
+    cracker.wordlist_index(str(path))
+    (idx_file,) = (tmp_path / cracker.STATE_DIR / cracker.INDEX_DIR).iterdir()
+    idx_file.write_bytes(idx_file.read_bytes()[:-4])
+    assert cracker.wordlist_index(str(path)).lines == 2
+
+
+def test_mmap_reader_matches_offsets(tmp_path):
+    data = b"alpha\nbravo\n\ncharlie\r\ndelta"
+    path = tmp_path / "w.txt"
+    path.write_bytes(data)
+    got = [(bytes(line), pos) for line, pos in cracker.iter_lines_mmap(str(path))]
+    assert got == [(b"alpha", 6), (b"bravo", 12), (b"charlie", 22), (b"delta", 27)]
+    assert [(bytes(line), pos) for line, pos in cracker.iter_lines_mmap(str(path), 12)] == got[2:]
+    assert [(bytes(line), pos) for line, pos in cracker.iter_lines_buffer(data[6:], 6)] == got[1:]